@@ -0,0 +1,335 @@
+"""基因关系图各环节的性能测试
+
+    python bench_graph.py parse --lines 200000
+    python bench_graph.py layout --nodes 1000 10000 50000
+    python bench_graph.py config --edges 2000000
+    python bench_graph.py store --edges 2000000
+    python bench_graph.py exact --levels 10000
+    python bench_graph.py scenarios --nodes 100000 --count 300
+    python bench_graph.py search --nodes 200000
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+from chain_parser import parse_buffer
+from graph_store import GraphStore
+from layered_layout import layered_layout
+
+# 旧版解析器使用的匹配模式：可选的数字+节点名称
+LEGACY_PATTERN = r'(\d*)([a-zA-Z\u4e00-\u9fff_][a-zA-Z0-9\u4e00-\u9fff_]*)'
+
+
+def legacy_parse_chain(input_string):
+    """旧版逐行解析（多次 replace + split + 未编译的 re.findall），作为对照"""
+    input_string = input_string.replace('。', '.').replace('，', ',').replace('；', ',')
+    main_parts = input_string.split('.')
+    if len(main_parts) < 2:
+        raise ValueError("输入至少需要两个节点，如 a.b 或 2a。3b")
+
+    first_matches = re.findall(LEGACY_PATTERN, main_parts[0].strip())
+    if not first_matches:
+        raise ValueError("起始节点格式错误")
+    start_node_name = first_matches[0][1]
+    start_node_qty = int(first_matches[0][0]) if first_matches[0][0] else 1
+
+    edges = []
+    for i in range(1, len(main_parts)):
+        current_node_name = None
+        for parallel_part in main_parts[i].strip().split(','):
+            current_matches = re.findall(LEGACY_PATTERN, parallel_part.strip())
+            if not current_matches:
+                continue
+            current_node_name = current_matches[0][1]
+            current_node_qty = int(current_matches[0][0]) if current_matches[0][0] else 1
+            edges.append((start_node_name, start_node_qty, current_node_name, current_node_qty))
+        if current_node_name is not None:
+            start_node_name = current_node_name
+            start_node_qty = current_node_qty
+    return edges
+
+
+def legacy_parse_lines(lines):
+    edges = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            try:
+                edges.extend(legacy_parse_chain(line))
+            except ValueError:
+                pass
+    return edges
+
+
+def generate_relations(line_count, node_count=5000, seed=0):
+    """生成随机的链式关系文本，混合中英文名称、数量、并列关系和注释"""
+    rng = random.Random(seed)
+    names = [f'材料{i}' if i % 2 else f'item_{i}' for i in range(node_count)]
+    lines = []
+    for _ in range(line_count):
+        if rng.random() < 0.02:
+            lines.append('# 注释行')
+            continue
+        parts = []
+        for _ in range(rng.randint(2, 5)):
+            group = []
+            for _ in range(rng.choice((1, 1, 1, 2, 3))):
+                qty = str(rng.randint(2, 9)) if rng.random() < 0.4 else ''
+                group.append(qty + rng.choice(names))
+            parts.append(rng.choice((',', '，', '；')).join(group))
+        lines.append(rng.choice(('.', '。')).join(parts))
+    return '\n'.join(lines) + '\n'
+
+
+def bench_parse(args):
+    text = generate_relations(args.lines)
+    lines = text.splitlines()
+
+    start = time.perf_counter()
+    legacy_edges = legacy_parse_lines(lines)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    edges, _, _ = parse_buffer(text)
+    buffer_time = time.perf_counter() - start
+
+    if edges != legacy_edges:
+        raise SystemExit('解析结果与旧版解析器不一致')
+
+    size_mb = len(text.encode('utf-8')) / 1e6
+    print(f'{args.lines} 行, {size_mb:.1f} MB, {len(edges)} 条边')
+    print(f'旧版逐行解析: {legacy_time:.3f}s ({size_mb / legacy_time:.1f} MB/s)')
+    print(f'单遍解析:     {buffer_time:.3f}s ({size_mb / buffer_time:.1f} MB/s)')
+
+
+def generate_dag(node_count, seed=0, window=50):
+    """随机的有向无环图：每个节点有 1~2 个来自前面不远处节点的入边，类似合成树"""
+    rng = random.Random(seed)
+    G = nx.DiGraph()
+    G.add_nodes_from(range(node_count))
+    for i in range(1, node_count):
+        for _ in range(rng.choice((1, 1, 2))):
+            G.add_edge(rng.randrange(max(0, i - window), i), i)
+    return G
+
+
+def bench_layout(args):
+    from layout_worker import dot_layout  # 依赖 PyQt5，只在这里用到
+
+    for node_count in args.nodes:
+        G = generate_dag(node_count)
+        print(f'{node_count} 个节点, {G.number_of_edges()} 条边')
+
+        start = time.perf_counter()
+        layered_layout(G)
+        print(f'  内置分层布局: {time.perf_counter() - start:.2f}s')
+
+        if node_count > args.dot_max_nodes:
+            print(f'  dot: 跳过（超过 --dot-max-nodes {args.dot_max_nodes}）')
+            continue
+        start = time.perf_counter()
+        try:
+            dot_layout(G)
+        except ImportError as e:
+            print(f'  dot: 不可用 ({e})')
+            continue
+        print(f'  dot:          {time.perf_counter() - start:.2f}s')
+
+
+def bench_config(args):
+    from graph_engine import BINARY_CONFIG_SUFFIX, GraphEngine
+
+    engine = GraphEngine()
+    G = generate_dag(args.edges * 3 // 4)
+    engine.add_edges((f'材料{u}', 1, f'材料{v}', 2) for u, v in G.edges())
+    print(f'{len(engine.store)} 个节点, {engine.store.number_of_edges()} 条边')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, suffix in (('JSON', '.txt'), ('二进制', BINARY_CONFIG_SUFFIX)):
+            filename = os.path.join(directory, 'config' + suffix)
+            save_seconds = engine.save_config(filename)
+            start = time.perf_counter()
+            GraphEngine().load_config(filename)
+            load_seconds = time.perf_counter() - start
+            size_mb = os.path.getsize(filename) / 1e6
+            print(f'  {label}: {size_mb:.1f} MB, 写入 {save_seconds:.2f}s, 加载 {load_seconds:.2f}s')
+
+
+def _traced(build):
+    """返回 (build() 的结果, 结果占用的内存字节数, 耗时)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, seconds
+
+
+def bench_store(args):
+    G = generate_dag(args.edges * 3 // 4)
+    edges = [(f'材料{u}', f'材料{v}', 1, 2) for u, v in G.edges()]
+    del G
+    print(f'{len(edges)} 条边')
+
+    def build_networkx():
+        graph = nx.DiGraph()
+        graph.add_edges_from((u, v, {'source_quantity': source_qty, 'target_quantity': target_qty})
+                             for u, v, source_qty, target_qty in edges)
+        return graph
+
+    def build_store():
+        store = GraphStore()
+        store.add_edges(edges)
+        return store
+
+    graph, graph_size, graph_seconds = _traced(build_networkx)
+    del graph
+    store, store_size, store_seconds = _traced(build_store)
+    print(f'  nx.DiGraph: {graph_size / 1e6:.0f} MB, {graph_seconds:.2f}s')
+    print(f'  GraphStore: {store_size / 1e6:.0f} MB, {store_seconds:.2f}s ({graph_size / store_size:.1f}x)')
+
+    start = time.perf_counter()
+    store.topological_ids()
+    print(f'  拓扑排序: {time.perf_counter() - start:.2f}s')
+
+
+def _exact_chains(levels):
+    """两种深层结构：{名称: (边列表, 最后一层的节点)}"""
+    # 每层 L→M 1:1，L、M 再以 3:1、3:2 汇入下一层：L' = L/3 + 2M/3 = L，逐层都要做分数加法
+    ladder = []
+    for level in range(levels):
+        ladder.append((f'L{level}', 1, f'M{level}', 1))
+        ladder.append((f'L{level}', 3, f'L{level + 1}', 1))
+        ladder.append((f'M{level}', 3, f'L{level + 1}', 2))
+    # 每层数量乘 3：超过 2**53 之后浮点不再是精确整数，最后超出 float 范围
+    chain = [(f'C{level}', 1, f'C{level + 1}', 3) for level in range(levels)]
+    return {'分数汇合': (ladder, f'L{levels}'), '逐层放大': (chain, f'C{levels}')}
+
+
+def bench_exact(args):
+    from graph_engine import GraphEngine, format_quantity
+
+    for label, (edges, leaf) in _exact_chains(args.levels).items():
+        results = {}
+        for solver in ('python', 'exact'):
+            engine = GraphEngine()
+            engine.add_edges(edges)
+            engine.solver = solver
+            start = time.perf_counter()
+            engine.calculate_quantities()
+            results[solver] = (time.perf_counter() - start, engine.quantities())
+
+        (float_seconds, float_values), (exact_seconds, exact_values) = results['python'], results['exact']
+        wrong = sum(float_values[node] != value for node, value in exact_values.items())
+        print(f'{label}: {args.levels} 层, {len(edges)} 条边, 浮点 {float_seconds * 1000:.0f}ms, '
+              f'精确 {exact_seconds * 1000:.0f}ms ({exact_seconds / float_seconds:.1f}x), '
+              f'浮点结果不精确的节点 {wrong} 个, '
+              f'{leaf} = {format_quantity(float_values[leaf])} / {format_quantity(exact_values[leaf])}')
+
+
+def bench_scenarios(args):
+    from graph_engine import GraphEngine
+    from scenarios import solve_scenarios
+
+    engine = GraphEngine()
+    engine.add_edges((f'材料{u}', 1, f'材料{v}', 2) for u, v in generate_dag(args.nodes).edges())
+    roots = engine.store.roots()
+    rng = random.Random(0)
+    scenarios = [(f'场景{i}', {root: rng.randint(1, 100) for root in roots}) for i in range(args.count)]
+    print(f'{len(engine.store)} 个节点, {len(roots)} 个根节点, {args.count} 个场景')
+
+    start = time.perf_counter()
+    table = solve_scenarios(engine, scenarios)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for scenario in scenarios:
+        single = solve_scenarios(engine, [scenario])
+    single_seconds = time.perf_counter() - start
+    assert np.allclose(single.values[:, 0], table.values[:, -1], equal_nan=True)
+    print(f'  一次求解全部场景: {batch_seconds:.2f}s, 逐个求解: {single_seconds:.2f}s '
+          f'({single_seconds / batch_seconds:.1f}x)')
+
+
+def bench_search(args):
+    from graph_engine import GraphEngine
+
+    rng = random.Random(0)
+    characters = [chr(code) for code in range(0x4e00, 0x4e00 + 3000)]
+    names = list(dict.fromkeys(''.join(rng.choice(characters) for _ in range(rng.randint(2, 8)))
+                               for _ in range(args.nodes)))
+    engine = GraphEngine()
+    engine.add_edges((names[i], 1, names[i + 1], 2) for i in range(len(names) - 1))
+
+    start = time.perf_counter()
+    engine.sorted_nodes()
+    print(f'{len(names)} 个中文名称, 建立索引 {time.perf_counter() - start:.2f}s')
+    queries = {'前缀': [name[:2] for name in rng.sample(names, 20)],
+               '包含': [name[1:3] for name in rng.sample(names, 20)],
+               '模糊': [name[0] + name[-1] for name in rng.sample(names, 20)]}
+    for label, texts in queries.items():
+        start = time.perf_counter()
+        for text in texts:
+            engine.search_nodes(text)
+        print(f'  {label}: 每次 {(time.perf_counter() - start) / len(texts) * 1000:.1f}ms')
+
+    index = engine.name_index
+    start = time.perf_counter()
+    for text in queries['前缀']:
+        index.prefix_range(text)
+    print(f'  只做前缀二分: 每次 {(time.perf_counter() - start) / 20 * 1e6:.1f}us')
+    start = time.perf_counter()
+    for text in queries['前缀']:
+        [name for name in names if name.startswith(text)]
+    print(f'  对照（逐个比较前缀）: 每次 {(time.perf_counter() - start) / 20 * 1000:.1f}ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='基因关系图性能测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parse_parser = subparsers.add_parser('parse', help='比较旧版逐行解析和单遍解析器的吞吐量')
+    parse_parser.add_argument('--lines', type=int, default=200000)
+    parse_parser.set_defaults(func=bench_parse)
+
+    layout_parser = subparsers.add_parser('layout', help='比较内置分层布局和 dot 的耗时')
+    layout_parser.add_argument('--nodes', type=int, nargs='+', default=[1000, 10000, 50000])
+    layout_parser.add_argument('--dot-max-nodes', type=int, default=50000,
+                               help='节点数超过这个值时不运行 dot')
+    layout_parser.set_defaults(func=bench_layout)
+
+    config_parser = subparsers.add_parser('config', help='比较 JSON 配置和二进制快照的读写耗时')
+    config_parser.add_argument('--edges', type=int, default=2000000)
+    config_parser.set_defaults(func=bench_config)
+
+    store_parser = subparsers.add_parser('store', help='比较 nx.DiGraph 和紧凑图存储的内存占用')
+    store_parser.add_argument('--edges', type=int, default=2000000)
+    store_parser.set_defaults(func=bench_store)
+
+    exact_parser = subparsers.add_parser('exact', help='比较浮点计算和精确分数计算在深层关系链上的耗时')
+    exact_parser.add_argument('--levels', type=int, default=10000)
+    exact_parser.set_defaults(func=bench_exact)
+
+    scenarios_parser = subparsers.add_parser('scenarios', help='比较一次求解全部场景和逐个场景求解的耗时')
+    scenarios_parser.add_argument('--nodes', type=int, default=100000)
+    scenarios_parser.add_argument('--count', type=int, default=300)
+    scenarios_parser.set_defaults(func=bench_scenarios)
+
+    search_parser = subparsers.add_parser('search', help='测试中文节点名称的前缀、包含和模糊查找耗时')
+    search_parser.add_argument('--nodes', type=int, default=200000)
+    search_parser.set_defaults(func=bench_search)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
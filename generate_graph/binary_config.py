@@ -0,0 +1,193 @@
+"""二进制配置快照：节点名称表 + NumPy 边数组，加载时直接内存映射
+
+JSON 配置每条边都是一个带四个字符串键的字典，几百万条边时解析要几分钟、占几 GB 内存。
+二进制快照把节点名称去重后编号，边只存编号和数量：
+
+    b'GGSNAP\\0'                   魔数
+    uint8                          格式版本（目前为 1）
+    uint64（小端）                  头部长度
+    头部 JSON                      {"metadata": {...}, "arrays": {名称: [dtype, 长度, 偏移], ...}}
+    各数组的原始数据                按 64 字节对齐
+
+数组有 names（以 \\0 分隔的 UTF-8 节点名称）、sources / targets（int32 节点编号）、
+source_quantity / target_quantity（int64 或 float64），以及 name_order（int32，按名称排序的节点编号，
+加载后节点查找索引直接使用，旧文件中没有）。文件名以 .ggsnap 结尾时
+GraphEngine.load_config / save_config 自动使用这个格式；也可以在两种格式之间转换：
+
+    python binary_config.py gene_graph_config.txt gene_graph_config.ggsnap
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+MAGIC = b'GGSNAP\0'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+class BinaryConfig(NamedTuple):
+    metadata: dict
+    names: list  # 节点编号 -> 节点名称
+    sources: np.ndarray
+    targets: np.ndarray
+    source_quantity: np.ndarray
+    target_quantity: np.ndarray
+    name_order: np.ndarray = None  # 按名称排序的节点编号，旧文件中没有时为 None
+
+    def edges(self):
+        """按配置文件中的顺序产出 (源节点, 目标节点, 源数量, 目标数量)"""
+        names = self.names
+        return zip(map(names.__getitem__, self.sources.tolist()),
+                   map(names.__getitem__, self.targets.tolist()),
+                   _quantities(self.source_quantity), _quantities(self.target_quantity))
+
+
+def _quantities(array):
+    """整数列直接转换；整数和小数混合的列存成了 float64，其中的整数值还原成 int"""
+    values = array.tolist()
+    if array.dtype.kind == 'f':
+        values = [int(value) if value.is_integer() else value for value in values]
+    return values
+
+
+def _quantity_array(values):
+    """数量列：全是整数时为 int64，否则为 float64；存不下原值时报错，不悄悄舍入"""
+    if not values:
+        return np.empty(0, dtype=np.int64)
+    if all(type(value) is int for value in values):
+        try:
+            return np.asarray(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    else:
+        try:
+            array = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError, OverflowError):
+            array = None
+        if array is not None and all(value == stored for value, stored in zip(values, array.tolist())):
+            return array
+    inexact = next(value for value in values if not (type(value) in (int, float) and -2 ** 53 <= value <= 2 ** 53))
+    raise ValueError(f'数量 {inexact} 不能在二进制快照中精确保存（只支持 64 位整数和小数，'
+                     f'与小数混在同一列时整数不能超过 ±2^53），请保存为 JSON 配置')
+
+
+def snapshot_arrays(snapshot):
+    """把 ConfigSnapshot 的边转换成 {数组名: ndarray}，节点名称按首次出现的顺序编号"""
+    index = {}
+    sources = []
+    targets = []
+    source_quantity = []
+    target_quantity = []
+    for source, target, source_qty, target_qty in snapshot.edges:
+        sources.append(index.setdefault(source, len(index)))
+        targets.append(index.setdefault(target, len(index)))
+        source_quantity.append(source_qty)
+        target_quantity.append(target_qty)
+
+    for name in index:
+        if '\0' in name:
+            raise ValueError(f'节点名称中不能包含 \\0: {name!r}')
+    names = list(index)
+    order = sorted(range(len(names)), key=names.__getitem__)
+    names = '\0'.join(names).encode('utf-8')
+    return {
+        'names': np.frombuffer(names, dtype=np.uint8),
+        'sources': np.asarray(sources, dtype=np.int32),
+        'targets': np.asarray(targets, dtype=np.int32),
+        'source_quantity': _quantity_array(source_quantity),
+        'target_quantity': _quantity_array(target_quantity),
+        'name_order': np.asarray(order, dtype=np.int32),
+    }
+
+
+def write_binary_config(snapshot, filename):
+    """把快照写成二进制配置文件，返回耗时（秒）；和 write_config 一样先写临时文件再替换"""
+    start = time.perf_counter()
+    arrays = snapshot_arrays(snapshot)
+
+    # 头部长度影响数组偏移，偏移的位数又影响头部长度，先按最长的偏移估算一次
+    specs = {name: [array.dtype.str, len(array), 2 ** 63] for name, array in arrays.items()}
+    header_size = len(MAGIC) + 8 + len(json.dumps(
+        {'metadata': dict(snapshot.metadata), 'arrays': specs}, ensure_ascii=False).encode('utf-8'))
+    offset = header_size
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        specs[name][2] = offset
+        offset += array.nbytes
+    header = json.dumps({'metadata': dict(snapshot.metadata), 'arrays': specs},
+                        ensure_ascii=False).encode('utf-8')
+
+    fd, temp_file = tempfile.mkstemp(prefix=os.path.basename(filename) + '.',
+                                     suffix='.tmp', dir=os.path.dirname(filename) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + bytes([FORMAT_VERSION]))
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.write(b'\0' * (specs[name][2] - f.tell()))
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, filename)
+    except BaseException:
+        os.unlink(temp_file)
+        raise
+    return time.perf_counter() - start
+
+
+def read_binary_config(filename):
+    """读取二进制配置文件，数组以只读内存映射的方式打开，不复制到内存"""
+    with open(filename, 'rb') as f:
+        magic = f.read(len(MAGIC) + 1)
+        if magic[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{filename} 不是二进制配置文件')
+        if magic[len(MAGIC):] != bytes([FORMAT_VERSION]):
+            version = magic[len(MAGIC)] if len(magic) > len(MAGIC) else '缺失'
+            raise ValueError(f'{filename} 的格式版本 {version} 不受支持，这个版本的程序只能读取版本 {FORMAT_VERSION}')
+        try:
+            (header_size,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_size).decode('utf-8'))
+        except (struct.error, ValueError) as e:
+            raise ValueError(f'{filename} 的头部已损坏: {e}') from e
+
+    arrays = {}
+    for name, (dtype, length, offset) in header['arrays'].items():
+        if length:
+            arrays[name] = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=(length,))
+        else:
+            arrays[name] = np.empty(0, dtype=dtype)
+
+    names = arrays.pop('names')
+    names = names.tobytes().decode('utf-8').split('\0') if len(arrays['sources']) else []
+    return BinaryConfig(header['metadata'], names, **arrays)
+
+
+def main(argv=None):
+    from graph_engine import BINARY_CONFIG_SUFFIX, GraphEngine
+
+    parser = argparse.ArgumentParser(description='在 JSON 配置和二进制配置之间转换')
+    parser.add_argument('input', help='要转换的配置文件（旁边的日志会一起重放）')
+    parser.add_argument('output', help=f'输出文件，以 {BINARY_CONFIG_SUFFIX} 结尾时写二进制格式，否则写 JSON')
+    args = parser.parse_args(argv)
+
+    engine = GraphEngine()
+    start = time.perf_counter()
+    if not engine.load_config(args.input):
+        print(f'{args.input} 不存在', file=sys.stderr)
+        return 1
+    load_seconds = time.perf_counter() - start
+    save_seconds = engine.save_config(args.output)
+    print(f'{engine.store.number_of_edges()} 条边: 加载 {load_seconds:.2f}s, 写入 {save_seconds:.2f}s')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""链式关系的单遍解析器
+
+用一个预编译的正则把整段文本一次切成片段：每个片段由前面的分隔符（句号、逗号、换行）、
+紧跟在开头的节点（可选的数字+名称）和片段剩余部分组成。re.findall 在 C 层完成切分，
+Python 层只需按片段走一个小状态机生成边列表 [(源节点, 源数量, 目标节点, 目标数量), ...]，
+同一名称的多次出现共用一个字符串对象。
+节点前有杂项字符的少数片段再用 NODE_PATTERN 单独查找。
+
+解析结果与逐行 split + re.findall 的旧写法一致：
+每个片段只取第一个节点，首个片段不按逗号拆分，以 # 开头的行是注释。
+"""
+import gc
+import re
+
+_NAME = '[a-zA-Z\u4e00-\u9fff_][a-zA-Z0-9\u4e00-\u9fff_]*'
+_SEPARATORS = '.。,，；\n'
+
+# 匹配模式：可选的数字+节点名称
+NODE_PATTERN = re.compile('(\\d*)(' + _NAME + ')')
+
+# 分隔符、片段开头的节点（允许前置空白）、片段剩余部分
+_FRAGMENT = re.compile(
+    '([' + _SEPARATORS + ']?)'
+    '(?:[^\\S\\n]*(\\d*)(' + _NAME + '))?'
+    '([^' + _SEPARATORS + ']*)'
+)
+
+_TOO_SHORT = "输入至少需要两个节点，如 a.b 或 2a。3b"
+_BAD_START = "起始节点格式错误"
+
+
+class ChainSyntaxError(ValueError):
+    """链式关系格式错误，带行号和列号（均从 1 开始）"""
+
+    def __init__(self, message, line=1, column=1):
+        super().__init__(message)
+        self.line = line
+        self.column = column
+
+    def __reduce__(self):
+        # 保证跨进程传递（pickle）时保留行号和列号
+        return self.__class__, (str(self), self.line, self.column)
+
+
+def parse_buffer(text, first_line=1, comments=True):
+    """解析一整段文本，每行一条链式关系
+
+    返回 (边列表, 成功解析的行数, [ChainSyntaxError, ...])；出错的行不会产生任何边。
+    解析期间暂停垃圾回收：边都是只含字符串和整数的元组，不会形成循环引用，
+    而大量新建的元组会反复触发对整个堆的回收，小段文本上这部分开销比解析本身还大。
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        edges, success_count, failures = _parse_fragments(text, first_line, comments)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return edges, success_count, _locate_errors(text, first_line, failures)
+
+
+def _parse_fragments(text, first_line, comments):
+    """parse_buffer 的主体，返回 (边列表, 成功解析的行数, [(行号, 错误信息), ...])"""
+    edges = []
+    append_edge = edges.append
+    search_node = NODE_PATTERN.search
+    # 同一名称的多次出现共用一个字符串对象：边列表更省内存，跨进程传递时也只序列化一次
+    same_name = {}.setdefault
+    failures = []  # (行号, 错误信息)，列号在最后统一计算
+    success_count = 0
+
+    line = first_line
+    skip_line = False  # 注释行或已经出错的行
+    in_first = True  # 是否还在第一个片段（起始节点）中
+    line_nonblank = False  # 第一个片段中是否出现过非空白内容
+    start_name = None  # 当前链的起始节点
+    start_qty = 1
+    part_last = None  # 当前部分的最后一个节点 (名称, 数量)
+
+    for sep, qty, name, rest in _FRAGMENT.findall(text):
+        if sep == '\n' or not sep:
+            if sep:
+                if not skip_line:
+                    if not in_first:
+                        success_count += 1
+                    elif line_nonblank:
+                        failures.append((line, _TOO_SHORT))
+                line += 1
+                skip_line = line_nonblank = False
+                in_first = True
+                start_name = part_last = None
+            # 行首片段：检查注释
+            if comments and not name and rest.lstrip().startswith('#'):
+                skip_line = True
+                continue
+        elif skip_line:
+            continue
+        elif sep == '.' or sep == '。':
+            if in_first:
+                if start_name is None:
+                    failures.append((line, _BAD_START))
+                    skip_line = True
+                    continue
+                in_first = False
+            elif part_last is not None:
+                # 更新起始节点为当前部分的最后一个节点，用于链式关系
+                start_name, start_qty = part_last
+                part_last = None
+        elif in_first:
+            # 首个片段不按逗号拆分
+            line_nonblank = True
+
+        if not name:
+            if not rest:
+                continue
+            match = search_node(rest)
+            if match is None:
+                if in_first and not line_nonblank and not rest.isspace():
+                    line_nonblank = True
+                continue
+            qty, name = match.groups()
+        name = same_name(name, name)
+
+        if in_first:
+            line_nonblank = True
+            if start_name is None:
+                start_name = name
+                start_qty = int(qty) if qty else 1
+        else:
+            node_qty = int(qty) if qty else 1
+            append_edge((start_name, start_qty, name, node_qty))
+            part_last = (name, node_qty)
+
+    # 最后一行可能没有换行符
+    if not skip_line:
+        if not in_first:
+            success_count += 1
+        elif line_nonblank:
+            failures.append((line, _TOO_SHORT))
+
+    return edges, success_count, failures
+
+
+def _locate_errors(text, first_line, failures):
+    """为出错的行补上列号：起始节点错误指向第一个句号，节点不足指向行尾"""
+    if not failures:
+        return []
+    lines = text.split('\n')
+    errors = []
+    for line, message in failures:
+        line_text = lines[line - first_line]
+        if message == _BAD_START:
+            column = min(i for i in (line_text.find('.'), line_text.find('。')) if i >= 0) + 1
+        else:
+            column = len(line_text) + 1
+        errors.append(ChainSyntaxError(message, line, column))
+    return errors
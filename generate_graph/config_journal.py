@@ -0,0 +1,141 @@
+"""配置文件的追加式日志：每次编辑只在配置文件旁的 .journal 文件末尾追加一行
+
+日志每行是一个 JSON 数组：
+
+    ["generation", "3f2a..."]            分代标记，之后的记录基于该分代的完整配置
+    ["add", 源节点, 目标节点, 源数量, 目标数量]
+    ["remove", 源节点, 目标节点]
+    ["root", 根节点数量]
+    ["node_root", 节点, 数量]             单独设置某个根节点的数量，数量为 null 时改回全局数量
+    ["clear"]
+
+配置文件中记录了它对应的分代（journal_generation），加载时先读完整配置，再重放日志中
+该分代标记之后的记录。合并（compaction）时先写入新的分代标记，再把当前状态写成完整配置，
+写完之后把新标记之前的记录从日志中删掉；中途崩溃时旧配置加上旧标记之后的全部记录仍然完整。
+"""
+import json
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+JOURNAL_SUFFIX = '.journal'
+# 自上次合并以来追加的记录数超过这个值时，重新写一份完整配置
+JOURNAL_COMPACT_RECORDS = 5000
+
+
+def journal_path(config_file):
+    return config_file + JOURNAL_SUFFIX
+
+
+def read_journal(config_file, generation):
+    """返回日志中 generation 分代标记之后的记录；没有日志或找不到该标记时返回空列表"""
+    path = journal_path(config_file)
+    if generation is None or not os.path.exists(path):
+        return []
+
+    records = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 写到一半就崩溃留下的残行
+            if not isinstance(record, list) or not record:
+                break  # 不是本模块写出的记录，日志已损坏，只重放之前的部分
+            if record[0] == 'generation':
+                if record[1] == generation:
+                    records = []
+            elif records is not None:
+                records.append(record)
+    return records or []
+
+
+class ConfigJournal:
+    def __init__(self, config_file, compact_records=JOURNAL_COMPACT_RECORDS):
+        self.config_file = config_file
+        self.path = journal_path(config_file)
+        self.compact_records = compact_records
+        self.pending_records = 0  # 自上次分代标记以来追加的记录数
+        self._deferred = 0  # deferred() 的嵌套层数
+        self._buffer = []  # 推迟写入的行
+        self._file = open(self.path, 'a', encoding='utf-8')
+        # 上次崩溃时留下的残行没有换行符，先补上，免得和新记录连成一行
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write('\n')
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def append(self, records):
+        """一次写入若干条记录并刷新到操作系统，耗时只与记录条数有关"""
+        lines = [json.dumps(record, ensure_ascii=False) + '\n' for record in records]
+        if not lines:
+            return
+        self.pending_records += len(lines)
+        if self._deferred:
+            self._buffer.extend(lines)
+            return
+        self._file.write(''.join(lines))
+        self._file.flush()
+
+    @contextmanager
+    def deferred(self):
+        """期间追加的记录先留在内存里，结束时一次写入（批量编辑用，见 GraphEngine.batch）"""
+        self._deferred += 1
+        try:
+            yield
+        finally:
+            self._deferred -= 1
+            if not self._deferred:
+                self._flush_buffer()
+
+    def _flush_buffer(self):
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._file.flush()
+            self._buffer = []
+
+    def needs_compaction(self):
+        return self.pending_records >= self.compact_records
+
+    def mark(self):
+        """写入新的分代标记并返回分代编号，随后应把当前状态写成该分代的完整配置"""
+        generation = uuid.uuid4().hex
+        self._flush_buffer()  # 标记之前的改动属于上一分代
+        self._file.write(json.dumps(['generation', generation]) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.pending_records = 0
+        return generation
+
+    def compact(self, generation):
+        """generation 分代的完整配置已经写好，删掉日志中该标记之前的记录"""
+        header = json.dumps(['generation', generation]) + '\n'
+        self._flush_buffer()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        if header not in lines:
+            return  # 之后已经有更新的合并完成
+        tail = lines[lines.index(header):]
+
+        self._file.close()
+        fd, temp_file = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.',
+                                         suffix='.tmp', dir=os.path.dirname(self.path) or '.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.path)
+        except BaseException:
+            os.unlink(temp_file)
+            raise
+        finally:
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        self._flush_buffer()
+        self._file.close()
@@ -0,0 +1,43 @@
+"""在后台线程中保存配置，避免大图的 JSON 序列化和写盘阻塞 Qt 界面
+
+界面线程在防抖时间到期后生成配置的不可变快照（ConfigSnapshot）并附上递增的请求编号，
+工作线程只写最新的快照，排队中的旧请求直接跳过。写入本身是原子的（临时文件 + 替换）。
+布局缓存文件同样经过防抖后在这个线程中写入。
+"""
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from graph_engine import write_config
+from layout_cache import write_layout_cache
+from profiling import profiler
+
+
+class ConfigSaveWorker(QObject):
+    saved = pyqtSignal(int, str, float)  # 请求编号, 文件名, 耗时（秒）
+    failed = pyqtSignal(int, str, str)  # 请求编号, 文件名, 错误信息
+    layout_cache_saved = pyqtSignal(int)  # 请求编号（失败时也发出，错误已经打印）
+
+    def __init__(self):
+        super().__init__()
+        self.latest_request = 0  # 由界面线程更新，用来跳过过期的请求
+        self.latest_layout_cache_request = 0
+
+    @pyqtSlot(int, object, str)
+    def save(self, request_id, snapshot, filename):
+        if request_id != self.latest_request:
+            return
+        try:
+            seconds = write_config(snapshot, filename)
+        except Exception as e:
+            self.failed.emit(request_id, filename, str(e))
+            return
+        profiler.record('save', seconds)
+        self.saved.emit(request_id, filename, seconds)
+
+    @pyqtSlot(int, object, str)
+    def save_layout_cache(self, request_id, entries, filename):
+        if request_id == self.latest_layout_cache_request:
+            try:
+                write_layout_cache(entries, filename)
+            except OSError as e:
+                print(f'保存布局缓存失败: {e}')
+        self.layout_cache_saved.emit(request_id)
@@ -0,0 +1,59 @@
+"""精确数量计算：数量保持为整数或分数，不受浮点舍入误差影响
+
+浮点计算中 1/3 + 2/3 这样的和每层都会带来舍入误差，几千层之后整数数量会显示成 2.99 或 3.01。
+精确模式下数量是 int 或 fractions.Fraction：比例能整除时只做 int 乘除（绝大多数基因关系
+都是这种情况），不能整除时才转成 Fraction，分母为 1 的分数立即还原成 int。
+每种数量关系约分后的比例 (分子, 分母) 缓存起来，同样的关系不重复求最大公约数。
+"""
+from fractions import Fraction
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+
+def rational(value):
+    """把配置中的数量（int 或 float）转换成 int / Fraction；小数按书写的十进制值转换"""
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else Fraction(repr(value))
+    return value
+
+
+@lru_cache(maxsize=None)
+def ratio(source_qty, target_qty):
+    """边上的比例 target_qty / source_qty，约分成 (分子, 分母)"""
+    source_qty, target_qty = rational(source_qty), rational(target_qty)
+    if type(source_qty) is int and type(target_qty) is int:
+        divisor = gcd(source_qty, target_qty)
+        return target_qty // divisor, source_qty // divisor
+    value = Fraction(target_qty) / Fraction(source_qty)
+    return value.numerator, value.denominator
+
+
+def normalize(value):
+    """分母为 1 的分数还原成 int"""
+    if type(value) is Fraction and value.denominator == 1:
+        return value.numerator
+    return value
+
+
+def scale(quantity, numerator, denominator):
+    """quantity * numerator / denominator，能整除时结果仍是 int"""
+    if type(quantity) is int:
+        product = quantity * numerator
+        if denominator == 1:
+            return product
+        if product % denominator == 0:
+            return product // denominator
+        return Fraction(product, denominator)
+    return normalize(quantity * numerator / denominator)
+
+
+def to_float(value):
+    """精确数量对应的浮点值（绘图和按比例缩放用），没有数量时为 NaN，超出 float 范围时为 inf"""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except OverflowError:
+        return np.inf
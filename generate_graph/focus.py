@@ -0,0 +1,66 @@
+"""子图聚焦：只显示选中节点的上游（祖先）和下游（后代）锥体
+
+在很大的图上查看某一种材料的合成树时，不必对整张图布局和绘制。锥体按层数限制
+做广度优先搜索，结果按 (节点, 方向, 层数) 缓存，图结构（topology_version）变化后整体失效。
+锥体内的数量单独重新计算：锥体最上游的节点作为根节点，得到的是这棵子树自身的用量。
+"""
+from collections import OrderedDict, deque
+
+from graph_engine import GraphEngine
+
+
+class ConeCache:
+    def __init__(self, engine, max_entries=64):
+        self.engine = engine
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = engine.topology_version
+
+    def _reachable(self, node, depth, upstream):
+        """depth 层以内可到达的节点（含 node 本身）；depth 为 0 表示不限层数"""
+        if self._version != self.engine.topology_version:
+            self._entries.clear()
+            self._version = self.engine.topology_version
+        key = (node, upstream, depth)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            return cached
+
+        store = self.engine.store
+        neighbors = store.predecessors if upstream else store.successors
+        reached = {node}
+        frontier = deque([(node, 0)])
+        while frontier:
+            current, distance = frontier.popleft()
+            if depth and distance >= depth:
+                continue
+            for neighbor in neighbors(current):
+                if neighbor not in reached:
+                    reached.add(neighbor)
+                    frontier.append((neighbor, distance + 1))
+
+        reached = frozenset(reached)
+        self._entries[key] = reached
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return reached
+
+    def ancestors(self, node, depth=0):
+        return self._reachable(node, depth, upstream=True)
+
+    def descendants(self, node, depth=0):
+        return self._reachable(node, depth, upstream=False)
+
+    def cone(self, node, depth=0):
+        return self.ancestors(node, depth) | self.descendants(node, depth)
+
+
+def focus_engine(engine, nodes):
+    """以 nodes 的导出子图建立独立的 GraphEngine，按相同的根节点数量和求解方式重新计算数量"""
+    focused = GraphEngine(engine.store.subgraph(nodes))
+    focused.root_quantity = engine.root_quantity
+    focused.root_quantities = dict(engine.root_quantities)
+    focused.solver = engine.solver
+    focused.calculate_quantities()
+    return focused
@@ -1,21 +1,32 @@
 import networkx as nx
 import matplotlib.pyplot as plt
-from networkx.drawing.nx_agraph import graphviz_layout
 import math
-import os
-import json
-from datetime import datetime
 import sys
+from contextlib import contextmanager
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTextEdit, QLineEdit, QPushButton, QLabel, QListWidget,
+                             QTextEdit, QPlainTextEdit, QLineEdit, QPushButton, QLabel, QListView, QAbstractItemView,
                              QFileDialog, QMessageBox, QSplitter, QComboBox, QSpinBox,
-                             QListWidgetItem, QMenu, QAction)
-from PyQt5.QtCore import Qt, QPoint
-from PyQt5.QtGui import QFont, QPalette, QColor
+                             QMenu, QAction, QInputDialog, QShortcut)
+from PyQt5.QtCore import Qt, QPoint, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QPalette, QColor, QKeySequence
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 import matplotlib
-import re
+
+from chain_parser import ChainSyntaxError
+from config_journal import ConfigJournal
+from config_saver import ConfigSaveWorker
+from focus import ConeCache, focus_engine
+from graph_engine import GraphEngine, BINARY_CONFIG_SUFFIX, DEFAULT_CONFIG_FILE, format_quantity
+from graph_export import export_format, export_graph
+from graph_renderer import GraphRenderer
+from incremental_layout import LayoutExtender
+from layout_cache import DEFAULT_LAYOUT_CACHE_FILE, LayoutCache
+from layout_worker import LayoutWorker, topology_snapshot
+from list_models import EdgeListModel, NodeListModel
+from parallel_import import expand_relation_paths
+from profile_panel import ProfilePanel
+from profiling import configure_from_env, profiler
 
 matplotlib.use('Qt5Agg')
 
@@ -30,22 +41,77 @@ class GraphCanvas(FigureCanvas):
         plt.rcParams['font.sans-serif'] = ['Microsoft YaHei']
         plt.rcParams['axes.unicode_minus'] = False
 
+    def draw(self):
+        with profiler.stage('draw'):
+            super().draw()
+
+
+# 连续触发重绘（如拖动节点大小）时，等待这么久没有新请求才开始计算布局
+DRAW_DEBOUNCE_MS = 150
+# 在节点搜索框中连续输入时，停止输入这么久之后才筛选节点列表
+SEARCH_DEBOUNCE_MS = 150
+# 状态栏中各环节耗时的刷新间隔
+PROFILE_REFRESH_MS = 1000
+# 连续编辑时，最后一次改动之后等待这么久才自动保存
+AUTO_SAVE_DEBOUNCE_MS = 1000
+# 开启磁盘布局缓存时，最后一次放入新布局之后等待这么久才在后台写缓存文件
+LAYOUT_CACHE_SAVE_DEBOUNCE_MS = 2000
+# 保存/加载配置对话框的文件类型，二进制快照适合几百万条边的大图
+CONFIG_FILE_FILTER = f'Text Files (*.txt);;Binary Snapshot (*{BINARY_CONFIG_SUFFIX})'
+
 
 class GeneGraphUI(QMainWindow):
+    layout_requested = pyqtSignal(int, object, str)  # 请求编号, 图的拓扑快照, 布局方式
+    save_requested = pyqtSignal(int, object, str)  # 请求编号, 配置快照, 文件名
+    layout_cache_save_requested = pyqtSignal(int, object, str)  # 请求编号, 各布局的快照, 缓存文件
+
     def __init__(self):
         super().__init__()
-        self.G = nx.DiGraph()
-        self.config_data = {
-            "edges": [],
-            "created_time": "",
-            "last_modified": "",
-            "node_count": 0,
-            "version": "1.0"
-        }
+        self.engine = GraphEngine()  # 无界面的图模型，负责解析、数量计算和配置读写
         self.auto_save_enabled = True  # 添加自动保存控制标志
-        self.root_quantity = 1  # 根节点数量，默认为1
+        self._save_request_id = 0
+        self._batch_depth = 0  # batch_edit() 的嵌套层数
+        self._batch_save = True  # 批量编辑结束时是否安排自动保存
+        self._batch_force_save = False
+        self._finished_save_id = 0  # 后台线程已处理完的最新保存请求
+        self._compaction = (0, None)  # 进行中的日志合并 (保存请求编号, 分代)
+        self.last_save_seconds = None  # 最近一次保存配置的耗时
+        self.pos = None  # 最近一次布局结果 {节点: (x, y)}
+        self.layout_in_progress = False
+        self._layout_request_id = 0
+        # 拓扑不变时复用布局，只改样式的重绘不再调用 dot；缓存文件经过防抖后在后台写入
+        self.layout_cache = LayoutCache(autosave=False)
+        self._layout_cache_request_id = 0
+        self._finished_layout_cache_id = 0
+        self._topology_key = None
+        self._topology_key_version = None
+        self.layout_extender = LayoutExtender()  # 增量布局在两次编辑之间保留间距和占用表
+        self._pending_layout_key = None
+        self._force_full_layout = False
+        self._rendered_pos = None  # 当前视野对应的布局，布局变化时才重置视野
+        self.focus_node = None  # 聚焦模式下选中的节点，为 None 时显示整张图
+        self.cone_cache = ConeCache(self.engine)
+        self._focus_view = (None, None)  # (聚焦参数, 锥体的 engine)
+        self.profile_panel = None
+        self._profile_version = None
         self.initUI()
 
+    @property
+    def G(self):
+        return self.engine.G
+
+    @property
+    def config_data(self):
+        return self.engine.config_data
+
+    @property
+    def root_quantity(self):
+        return self.engine.root_quantity
+
+    @root_quantity.setter
+    def root_quantity(self, value):
+        self.engine.root_quantity = value
+
     def initUI(self):
         self.setWindowTitle('基因关系图生成器 - 带数量计算')
         self.setGeometry(100, 100, 1600, 900)
@@ -65,11 +131,19 @@ class GeneGraphUI(QMainWindow):
         # 图形显示区域
         self.canvas = GraphCanvas(self, width=12, height=10)
         self.toolbar = NavigationToolbar(self.canvas, self)
+        self.renderer = GraphRenderer(self.canvas.ax)
+
+        # 工具栏放在画布上方，用于缩放和平移（视野变化时只绘制看得见的部分）
+        canvas_panel = QWidget()
+        canvas_layout = QVBoxLayout(canvas_panel)
+        canvas_layout.setContentsMargins(0, 0, 0, 0)
+        canvas_layout.addWidget(self.toolbar)
+        canvas_layout.addWidget(self.canvas)
 
         # 分割器
         splitter = QSplitter(Qt.Horizontal)
         splitter.addWidget(control_panel)
-        splitter.addWidget(self.canvas)
+        splitter.addWidget(canvas_panel)
         splitter.setSizes([400, 1200])
 
         main_layout.addWidget(splitter)
@@ -77,9 +151,68 @@ class GeneGraphUI(QMainWindow):
         # 控制面板部件
         self.create_control_panel(control_layout)
 
+        # 布局在后台线程中计算，重绘请求经过防抖后才提交
+        self.layout_thread = QThread(self)
+        self.layout_worker = LayoutWorker()
+        self.layout_worker.moveToThread(self.layout_thread)
+        self.layout_requested.connect(self.layout_worker.compute)
+        self.layout_worker.finished.connect(self.on_layout_finished)
+        self.layout_worker.failed.connect(self.on_layout_failed)
+        self.layout_thread.start()
+
+        self.draw_timer = QTimer(self)
+        self.draw_timer.setSingleShot(True)
+        self.draw_timer.setInterval(DRAW_DEBOUNCE_MS)
+        self.draw_timer.timeout.connect(self.request_layout)
+
+        # 自动保存同样经过防抖，并在后台线程中序列化和写盘
+        self.save_thread = QThread(self)
+        self.save_worker = ConfigSaveWorker()
+        self.save_worker.moveToThread(self.save_thread)
+        self.save_requested.connect(self.save_worker.save)
+        self.save_worker.saved.connect(self.on_config_saved)
+        self.save_worker.failed.connect(self.on_config_save_failed)
+        self.layout_cache_save_requested.connect(self.save_worker.save_layout_cache)
+        self.save_worker.layout_cache_saved.connect(self.on_layout_cache_saved)
+        self.save_thread.start()
+
+        self.auto_save_timer = QTimer(self)
+        self.auto_save_timer.setSingleShot(True)
+        self.auto_save_timer.setInterval(AUTO_SAVE_DEBOUNCE_MS)
+        self.auto_save_timer.timeout.connect(self.flush_auto_save)
+
+        self.layout_cache_timer = QTimer(self)
+        self.layout_cache_timer.setSingleShot(True)
+        self.layout_cache_timer.setInterval(LAYOUT_CACHE_SAVE_DEBOUNCE_MS)
+        self.layout_cache_timer.timeout.connect(self.flush_layout_cache)
+
+        self.profile_timer = QTimer(self)
+        self.profile_timer.setInterval(PROFILE_REFRESH_MS)
+        self.profile_timer.timeout.connect(self.update_profile_label)
+        self.profile_timer.start()
+
         # 初始绘制
         self.draw_graph()
 
+    def closeEvent(self, event):
+        self.draw_timer.stop()
+        self.layout_thread.quit()
+        self.layout_thread.wait()
+
+        # 还没写盘的自动保存在退出前同步完成
+        save_pending = self.auto_save_timer.isActive()
+        self.auto_save_timer.stop()
+        self.save_thread.quit()
+        self.save_thread.wait()
+        if save_pending or self._finished_save_id != self._save_request_id:
+            self.save_config(DEFAULT_CONFIG_FILE)
+        self.layout_cache_timer.stop()
+        if self._finished_layout_cache_id != self._layout_cache_request_id:
+            self.layout_cache.dirty = True  # 排队中的写入没有完成
+        self.layout_cache.save()
+        self.detach_journal()
+        super().closeEvent(event)
+
     def create_control_panel(self, layout):
         # 标题
         title_label = QLabel('基因关系图生成器 - 带数量计算')
@@ -101,6 +234,11 @@ class GeneGraphUI(QMainWindow):
         self.root_quantity_spin.valueChanged.connect(self.on_root_quantity_changed)
         root_quantity_layout.addWidget(self.root_quantity_spin)
 
+        scenarios_btn = QPushButton('场景表...')
+        scenarios_btn.setToolTip('从 CSV 读取多组根节点数量，一次求出所有节点的数量并导出为 CSV')
+        scenarios_btn.clicked.connect(self.run_scenarios)
+        root_quantity_layout.addWidget(scenarios_btn)
+
         layout.addWidget(root_quantity_group)
 
         # 输入区域
@@ -116,12 +254,16 @@ class GeneGraphUI(QMainWindow):
         help_text.setStyleSheet('color: gray; font-size: 10px;')
         input_layout.addWidget(help_text)
 
-        self.input_field = QLineEdit()
-        self.input_field.setPlaceholderText('输入节点关系，如: 2a。3b 或 a.b.c 或 a.2b，3c')
-        self.input_field.returnPressed.connect(self.add_edges_from_input)
+        # 多行输入框：回车换行，Ctrl+Enter 添加
+        self.input_field = QPlainTextEdit()
+        self.input_field.setPlaceholderText('输入节点关系，如: 2a。3b 或 a.b.c 或 a.2b，3c（可粘贴多行，Ctrl+Enter 添加）')
+        self.input_field.setMaximumHeight(self.input_field.fontMetrics().lineSpacing() * 5 + 12)
+        for key in ('Ctrl+Return', 'Ctrl+Enter'):  # 主键盘和小键盘上的回车
+            QShortcut(QKeySequence(key), self.input_field, self.add_edges_from_input,
+                      context=Qt.WidgetShortcut)
         input_layout.addWidget(self.input_field)
 
-        add_btn = QPushButton('添加关系')
+        add_btn = QPushButton('添加关系 (Ctrl+Enter)')
         add_btn.clicked.connect(self.add_edges_from_input)
         input_layout.addWidget(add_btn)
 
@@ -131,20 +273,61 @@ class GeneGraphUI(QMainWindow):
         lists_group = QWidget()
         lists_layout = QVBoxLayout(lists_group)
 
-        nodes_label = QLabel('节点列表:')
+        nodes_label = QLabel('节点列表 (单击聚焦，右键设置根节点数量):')
         nodes_label.setFont(QFont('Arial', 12))
         lists_layout.addWidget(nodes_label)
 
-        self.nodes_list = QListWidget()
+        self.node_search_field = QLineEdit()
+        self.node_search_field.setPlaceholderText('搜索节点：前缀、包含或按顺序出现的字符，回车聚焦第一个')
+        self.node_search_field.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_node_search)
+        self.node_search_field.textChanged.connect(lambda: self.search_timer.start())
+        self.node_search_field.returnPressed.connect(self.focus_first_search_result)
+        lists_layout.addWidget(self.node_search_field)
+
+        # 列表视图只为可见行取数据，几十万个节点和边也不会逐行创建控件
+        self.nodes_list = QListView()
+        self.nodes_list.setUniformItemSizes(True)
+        self.nodes_list.setModel(NodeListModel(self.engine, self))
+        self.nodes_list.clicked.connect(self.on_node_clicked)
+        self.nodes_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.nodes_list.customContextMenuRequested.connect(self.show_node_context_menu)
         lists_layout.addWidget(self.nodes_list)
 
-        edges_label = QLabel('边列表 (右键删除):')
+        # 聚焦模式：只显示选中节点上下游若干层以内的节点
+        focus_layout = QHBoxLayout()
+        focus_label = QLabel('聚焦层数:')
+        focus_layout.addWidget(focus_label)
+
+        self.focus_depth_spin = QSpinBox()
+        self.focus_depth_spin.setRange(0, 50)
+        self.focus_depth_spin.setValue(3)
+        self.focus_depth_spin.setSpecialValueText('不限')
+        self.focus_depth_spin.valueChanged.connect(self.on_focus_depth_changed)
+        focus_layout.addWidget(self.focus_depth_spin)
+
+        self.show_all_btn = QPushButton('显示全图')
+        self.show_all_btn.setEnabled(False)
+        self.show_all_btn.clicked.connect(self.clear_focus)
+        focus_layout.addWidget(self.show_all_btn)
+
+        lists_layout.addLayout(focus_layout)
+
+        edges_label = QLabel('边列表 (右键或 Delete 删除，可多选):')
         edges_label.setFont(QFont('Arial', 12))
         lists_layout.addWidget(edges_label)
 
-        self.edges_list = QListWidget()
+        self.edges_list = QListView()
+        self.edges_list.setUniformItemSizes(True)
+        self.edges_list.setModel(EdgeListModel(self.engine, self))
+        self.edges_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.edges_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.edges_list.customContextMenuRequested.connect(self.show_edge_context_menu)
+        QShortcut(QKeySequence.Delete, self.edges_list, self.delete_selected_edges,
+                  context=Qt.WidgetShortcut)
         lists_layout.addWidget(self.edges_list)
 
         layout.addWidget(lists_group)
@@ -175,6 +358,10 @@ class GeneGraphUI(QMainWindow):
         import_btn.clicked.connect(self.import_from_file)
         file_buttons_layout.addWidget(import_btn)
 
+        import_dir_btn = QPushButton('导入目录')
+        import_dir_btn.clicked.connect(self.import_from_directory)
+        file_buttons_layout.addWidget(import_dir_btn)
+
         export_btn = QPushButton('导出图像')
         export_btn.clicked.connect(self.export_image)
         file_buttons_layout.addWidget(export_btn)
@@ -217,6 +404,68 @@ class GeneGraphUI(QMainWindow):
 
         settings_layout.addLayout(node_size_layout)
 
+        # 标签显示设置：节点很多时只在放大后显示标签
+        label_zoom_layout = QHBoxLayout()
+        label_zoom_label = QLabel('标签显示倍数:')
+        label_zoom_layout.addWidget(label_zoom_label)
+
+        self.label_zoom_spin = QSpinBox()
+        self.label_zoom_spin.setRange(1, 100)
+        self.label_zoom_spin.setValue(1)
+        self.label_zoom_spin.setSuffix('x')
+        self.label_zoom_spin.valueChanged.connect(self.on_label_zoom_changed)
+        label_zoom_layout.addWidget(self.label_zoom_spin)
+
+        settings_layout.addLayout(label_zoom_layout)
+
+        # 数量计算方式设置
+        solver_layout = QHBoxLayout()
+        solver_label = QLabel('计算方式:')
+        solver_layout.addWidget(solver_label)
+
+        self.solver_combo = QComboBox()
+        self.solver_combo.addItem('逐节点计算', 'python')
+        self.solver_combo.addItem('稀疏矩阵(支持环)', 'sparse')
+        self.solver_combo.addItem('精确分数', 'exact')
+        self.solver_combo.currentIndexChanged.connect(self.on_solver_changed)
+        solver_layout.addWidget(self.solver_combo)
+
+        settings_layout.addLayout(solver_layout)
+
+        # 布局缓存设置
+        layout_cache_layout = QHBoxLayout()
+        layout_cache_label = QLabel('布局缓存:')
+        layout_cache_layout.addWidget(layout_cache_label)
+
+        self.layout_cache_combo = QComboBox()
+        self.layout_cache_combo.addItems(['仅内存', '内存+磁盘'])
+        self.layout_cache_combo.currentTextChanged.connect(self.toggle_layout_disk_cache)
+        layout_cache_layout.addWidget(self.layout_cache_combo)
+
+        settings_layout.addLayout(layout_cache_layout)
+
+        # 布局方式：增量布局只为新节点找位置，已有节点保持不动
+        layout_mode_layout = QHBoxLayout()
+        layout_mode_label = QLabel('布局方式:')
+        layout_mode_layout.addWidget(layout_mode_label)
+
+        self.layout_mode_combo = QComboBox()
+        self.layout_mode_combo.addItem('增量布局', 'incremental')
+        self.layout_mode_combo.addItem('完整布局(dot)', 'dot')
+        self.layout_mode_combo.addItem('内置分层布局', 'layered')
+        self.layout_mode_combo.currentIndexChanged.connect(self.on_layout_mode_changed)
+        layout_mode_layout.addWidget(self.layout_mode_combo)
+
+        self.relayout_btn = QPushButton('重新布局')
+        self.relayout_btn.clicked.connect(self.relayout)
+        layout_mode_layout.addWidget(self.relayout_btn)
+
+        settings_layout.addLayout(layout_mode_layout)
+
+        self.layout_state_label = QLabel('布局: 就绪')
+        self.layout_state_label.setStyleSheet('color: gray;')
+        settings_layout.addWidget(self.layout_state_label)
+
         layout.addWidget(settings_group)
 
         # 状态信息
@@ -224,388 +473,510 @@ class GeneGraphUI(QMainWindow):
         self.status_label.setStyleSheet('color: green; background-color: #f0f0f0; padding: 5px;')
         layout.addWidget(self.status_label)
 
+        # 各环节最近一次的耗时，详细数据和 cProfile 在性能面板中
+        profile_layout = QHBoxLayout()
+        self.profile_label = QLabel('')
+        self.profile_label.setStyleSheet('color: gray; font-size: 11px;')
+        self.profile_label.setWordWrap(True)
+        profile_layout.addWidget(self.profile_label, 1)
+
+        profile_btn = QPushButton('性能...')
+        profile_btn.clicked.connect(self.show_profile_panel)
+        profile_layout.addWidget(profile_btn)
+        layout.addLayout(profile_layout)
+
     def show_edge_context_menu(self, position):
         """显示边列表的右键菜单"""
-        item = self.edges_list.itemAt(position)
-        if not item:
+        index = self.edges_list.indexAt(position)
+        if not index.isValid():
             return
+        selected = self.edges_list.selectionModel().selectedIndexes()
+        indexes = selected if index in selected else [index]
 
         # 创建右键菜单
         menu = QMenu(self)
-        delete_action = QAction("删除此边", self)
-        delete_action.triggered.connect(lambda: self.delete_selected_edge(item))
+        delete_action = QAction("删除此边" if len(indexes) == 1 else f"删除选中的 {len(indexes)} 条边", self)
+        delete_action.triggered.connect(lambda: self.delete_edges(indexes))
         menu.addAction(delete_action)
 
         # 显示菜单
         menu.exec_(self.edges_list.mapToGlobal(position))
 
-    def delete_selected_edge(self, item):
-        """删除选中的边"""
-        # 从边列表项中解析边信息
-        edge_text = item.text()
-        # 解析格式: "源节点 [数量] → 目标节点 [数量]"
-        match = re.match(r'(\w+)\s*\[\d+\]\s*→\s*(\w+)\s*\[\d+\]', edge_text)
-        if not match:
-            # 尝试其他可能的格式
-            match = re.match(r'(\w+)\s*→\s*(\w+)', edge_text)
-            if not match:
-                QMessageBox.warning(self, '错误', '无法解析边信息')
-                return
+    def show_node_context_menu(self, position):
+        """节点列表的右键菜单：单独设置根节点的数量"""
+        index = self.nodes_list.indexAt(position)
+        if not index.isValid():
+            return
+        node = index.data(Qt.UserRole)
+        if node not in self.engine.store or self.engine.store.in_degree(node):
+            return  # 只有根节点可以单独设置数量
 
-        source = match.group(1)
-        target = match.group(2)
+        menu = QMenu(self)
+        set_action = QAction("设置此根节点的数量...", self)
+        set_action.triggered.connect(lambda: self.edit_node_root_quantity(node))
+        menu.addAction(set_action)
+        if node in self.engine.root_quantities:
+            reset_action = QAction(f"使用全局根节点数量 ({self.root_quantity})", self)
+            reset_action.triggered.connect(lambda: self.set_node_root_quantity(node, None))
+            menu.addAction(reset_action)
+        menu.exec_(self.nodes_list.mapToGlobal(position))
+
+    def edit_node_root_quantity(self, node):
+        value, ok = QInputDialog.getInt(self, '根节点数量', f'{node} 的数量:',
+                                        int(self.engine.root_quantity_of(node)), 0, 1000000000)
+        if ok:
+            self.set_node_root_quantity(node, value)
+
+    def set_node_root_quantity(self, node, value):
+        with self.batch_edit():
+            self.engine.set_node_root_quantity(node, value)
+        self.status_label.setText(f'{node} 的数量: {self.engine.root_quantity_of(node)}')
+
+    def run_scenarios(self):
+        """读取场景 CSV，一次求出所有场景下的节点数量并导出为 CSV"""
+        from scenarios import read_scenarios, solve_scenarios, write_scenario_csv
+
+        scenario_file, _ = QFileDialog.getOpenFileName(
+            self, '选择场景表', '', 'CSV 文件 (*.csv);;所有文件 (*)')
+        if not scenario_file:
+            return
+        try:
+            table = solve_scenarios(self.engine, read_scenarios(scenario_file))
+        except ImportError:
+            QMessageBox.warning(self, '错误', '场景表需要安装 scipy')
+            return
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            QMessageBox.warning(self, '错误', f'{scenario_file}: {e}')
+            return
 
-        # 确认删除
-        reply = QMessageBox.question(self, '确认删除',
-                                     f'确定要删除边 "{source} → {target}" 吗？',
-                                     QMessageBox.Yes | QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            # 从图中删除边
-            if self.G.has_edge(source, target):
-                self.G.remove_edge(source, target)
+        output_file, _ = QFileDialog.getSaveFileName(
+            self, '保存场景结果', 'scenario_results.csv', 'CSV 文件 (*.csv)')
+        if not output_file:
+            return
+        try:
+            write_scenario_csv(table, output_file)
+        except OSError as e:
+            QMessageBox.warning(self, '错误', f'保存失败: {e}')
+            return
+        self.status_label.setText(f'已计算 {len(table.names)} 个场景，结果保存到 {output_file}')
 
-                # 重新计算数量
-                self.calculate_quantities()
+    def delete_selected_edges(self):
+        self.delete_edges(self.edges_list.selectionModel().selectedIndexes())
 
-                # 更新显示
-                self.draw_graph()
-                self.update_lists()
+    def delete_edges(self, indexes):
+        """删除列表中的一条或多条边，只在最后重算、重绘和保存一次"""
+        edges = [index.data(Qt.UserRole) for index in indexes]
+        if not edges:
+            return
 
-                # 自动保存
-                if self.auto_save_enabled:
-                    self.save_config("gene_graph_config.txt")
+        # 确认删除
+        description = f'边 "{edges[0][0]} → {edges[0][1]}"' if len(edges) == 1 else f'选中的 {len(edges)} 条边'
+        reply = QMessageBox.question(self, '确认删除', f'确定要删除{description}吗？',
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
 
-                self.status_label.setText(f'已删除边: {source} → {target}')
+        with self.batch_edit():
+            removed = sum(self.engine.remove_edge(source, target) for source, target in edges)
+        if len(edges) == 1:
+            if removed:
+                self.status_label.setText(f'已删除边: {edges[0][0]} → {edges[0][1]}')
             else:
                 QMessageBox.warning(self, '错误', '边不存在')
+        else:
+            self.status_label.setText(f'已删除 {removed} 条边')
 
     def on_root_quantity_changed(self, value):
         """根节点数量改变时的处理"""
-        self.root_quantity = value
+        with self.batch_edit():
+            self.engine.set_root_quantity(value)
+
+    def on_solver_changed(self, index):
+        """切换数量计算方式后完整重算"""
+        self.engine.solver = self.solver_combo.itemData(index)
         self.calculate_quantities()
         self.draw_graph()
         self.update_lists()
+        if self.engine.divergent_nodes:
+            self.status_label.setText(f'警告: {len(self.engine.divergent_nodes)} 个节点的数量在环上发散')
+
+    def schedule_auto_save(self, force=False):
+        """改动之后调用
+
+        日志已打开时改动已经由 engine 追加到日志里，只在日志过长时安排一次合并；
+        否则自动保存开启（或 force）时，在最后一次改动 AUTO_SAVE_DEBOUNCE_MS 后保存完整配置。
+        """
+        if self._batch_depth:
+            self._batch_force_save |= force
+            return
+        if self.engine.journal is not None:
+            if self.engine.journal.needs_compaction():
+                self.auto_save_timer.start()
+            return
+        if force or self.auto_save_enabled:
+            self.auto_save_timer.start()
+
+    def flush_auto_save(self):
+        """在界面线程生成配置快照，交给后台线程写入
+
+        自动保存开启时顺便打开日志，这份完整配置就是之后日志记录的基础。
+        """
+        self.auto_save_timer.stop()
+        if self.auto_save_enabled and self.engine.journal is None:
+            self.engine.journal = ConfigJournal(DEFAULT_CONFIG_FILE)
+        self._save_request_id += 1
+        self.save_worker.latest_request = self._save_request_id
+        if self.engine.journal is not None:
+            generation, snapshot = self.engine.journal_snapshot()
+            self._compaction = (self._save_request_id, generation)
+        else:
+            snapshot = self.engine.config_snapshot()
+        self.save_requested.emit(self._save_request_id, snapshot, DEFAULT_CONFIG_FILE)
+
+    def detach_journal(self):
+        """关闭日志；之后的改动在下一次完整保存时重新打开日志"""
+        if self.engine.journal is not None:
+            self.engine.journal.close()
+            self.engine.journal = None
+
+    def on_config_saved(self, request_id, filename, seconds):
+        self._finished_save_id = max(self._finished_save_id, request_id)
+        self.last_save_seconds = seconds
+        compaction_request, generation = self._compaction
+        if request_id == compaction_request and self.engine.journal is not None:
+            try:
+                self.engine.journal.compact(generation)
+            except OSError as e:
+                print(f'合并配置日志失败: {e}')
+        self.status_label.setText(f'配置已自动保存到 {filename} ({seconds:.2f}s)')
+
+    def on_config_save_failed(self, request_id, filename, message):
+        self._finished_save_id = max(self._finished_save_id, request_id)
+        print(f'自动保存配置失败: {message}')
+        self.status_label.setText(f'自动保存到 {filename} 失败: {message}')
 
     def toggle_auto_save(self, state):
         self.auto_save_enabled = (state == '开启')
+        if not self.auto_save_enabled:
+            self.detach_journal()
         self.status_label.setText(f'自动保存: {"开启" if self.auto_save_enabled else "关闭"}')
 
     def add_edges_from_input(self):
-        input_text = self.input_field.text().strip()
+        """添加输入框中的关系；粘贴的多行关系逐行解析，整体只重算、重绘和保存一次"""
+        input_text = self.input_field.toPlainText().strip()
         if not input_text:
             return
 
-        try:
-            self.parse_and_add_edges(input_text, auto_save=True)
-            self.input_field.clear()
-            self.calculate_quantities()  # 重新计算数量
-            self.draw_graph()
-            self.update_lists()
-            self.status_label.setText(f'成功添加关系: {input_text}')
-        except Exception as e:
+        lines = [line.strip() for line in input_text.splitlines() if line.strip()]
+        errors = []
+        cycle = None
+        with self.batch_edit():
+            for line in lines:
+                try:
+                    self.parse_and_add_edges(line, auto_save=True)
+                except ValueError as e:
+                    errors.append((line, e))
+                    continue
+                cycle = self.engine.last_cycle or cycle
+
+        if len(errors) == len(lines):
+            line, e = errors[0]
             QMessageBox.warning(self, '输入错误', f'错误: {e}\n请使用正确格式，例如：a.b 或 2a。3b 或 a.b.c 或 a.2b，3c')
+            return
+        if errors:
+            # 保留出错的行，改正后可以再次添加
+            self.input_field.setPlainText('\n'.join(line for line, _ in errors))
+            message = f'添加了 {len(lines) - len(errors)} 行关系，{len(errors)} 行有错误: {errors[0][0]}: {errors[0][1]}'
+        else:
+            self.input_field.clear()
+            message = f'成功添加关系: {input_text}' if len(lines) == 1 else f'成功添加 {len(lines)} 行关系'
+        if cycle:
+            message += f'，警告: 形成了环 {" → ".join(map(str, cycle))}'
+        self.status_label.setText(message)
 
     def parse_and_add_edges(self, input_string, auto_save=False):
         """解析输入字符串并添加边，支持中文句号、逗号、分号和直接数量表示"""
-        # 统一替换中文标点为英文标点
-        input_string = input_string.replace('。', '.').replace('，', ',').replace('；', ',')
-
-        # 使用正则表达式解析节点和数量关系
-        # 匹配模式：可选的数字+节点名称
-        pattern = r'(\d*)([a-zA-Z\u4e00-\u9fff_][a-zA-Z0-9\u4e00-\u9fff_]*)'
-
-        # 分割主节点链（使用句点）
-        main_parts = input_string.split('.')
-
-        if len(main_parts) < 2:
-            raise ValueError("输入至少需要两个节点，如 a.b 或 2a。3b")
-
-        # 处理第一个部分（起始节点）
-        first_part = main_parts[0].strip()
-        first_matches = re.findall(pattern, first_part)
-        if not first_matches:
-            raise ValueError("起始节点格式错误")
-
-        # 获取起始节点
-        start_node_name = first_matches[0][1]
-        start_node_qty = int(first_matches[0][0]) if first_matches[0][0] else 1
-
-        # 处理后续部分，支持并列关系
-        for i in range(1, len(main_parts)):
-            current_part = main_parts[i].strip()
-            # 使用逗号分割并列关系
-            parallel_parts = current_part.split(',')
-            print(parallel_parts)
-            if len(parallel_parts) ==1:
-                # 解析当前部分的节点
-                current_matches = re.findall(pattern, parallel_parts[0])
-                if not current_matches:
-                    continue
-
-                # 获取当前节点
-                current_node_name = current_matches[0][1]
-                current_node_qty = int(current_matches[0][0]) if current_matches[0][0] else 1
-                # 添加边
-                self.G.add_edge(start_node_name, current_node_name)
-
-                # 设置边的数量关系属性
-                self.G[start_node_name][current_node_name]['source_quantity'] = start_node_qty
-                self.G[start_node_name][current_node_name]['target_quantity'] = current_node_qty
-                # 更新起始节点为当前节点，用于链式关系
-                start_node_name = current_node_name
-                start_node_qty = current_node_qty
-
-            else :
-                for parallel_part in parallel_parts:
-                    parallel_part = parallel_part.strip()
-                    if not parallel_part:
-                        continue
-
-                    # 解析当前部分的节点
-                    current_matches = re.findall(pattern, parallel_part)
-                    if not current_matches:
-                        continue
-
-                    # 获取当前节点
-                    current_node_name = current_matches[0][1]
-                    current_node_qty = int(current_matches[0][0]) if current_matches[0][0] else 1
-
-                    # 添加边
-                    self.G.add_edge(start_node_name, current_node_name)
-
-                    # 设置边的数量关系属性
-                    self.G[start_node_name][current_node_name]['source_quantity'] = start_node_qty
-                    self.G[start_node_name][current_node_name]['target_quantity'] = current_node_qty
-                start_node_name = current_node_name
-                start_node_qty = current_node_qty
-        # 只有在明确要求或自动保存开启时才保存
-        if auto_save and self.auto_save_enabled:
-            self.save_config("gene_graph_config.txt")
+        self.engine.parse_and_add_edges(input_string)
+        # 只有在明确要求且自动保存开启时才保存
+        if auto_save:
+            self.schedule_auto_save()
+
+    @contextmanager
+    def batch_edit(self, save=True):
+        """批量编辑：期间的改动只在结束时重算数量、重绘、刷新列表和安排自动保存一次
+
+        期间调用的 calculate_quantities / update_quantities / draw_graph / update_lists /
+        schedule_auto_save 都推迟到结束时；save 为 False 时结束时不保存（如加载配置）。
+        """
+        if not self._batch_depth:
+            self._batch_save = save
+            self._batch_force_save = False
+        self._batch_depth += 1
+        try:
+            with self.engine.batch():
+                yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.update_quantities()
+                self.draw_graph()
+                self.update_lists()
+                if self._batch_save:
+                    self.schedule_auto_save(force=self._batch_force_save)
 
     def calculate_quantities(self):
         """计算所有节点的数量"""
-        # 清除所有节点的数量属性
-        for node in self.G.nodes():
-            if 'quantity' in self.G.nodes[node]:
-                del self.G.nodes[node]['quantity']
-
-        # 找到根节点（没有入边的节点）
-        root_nodes = [node for node in self.G.nodes() if self.G.in_degree(node) == 0]
-
-        # 设置根节点数量
-        for root in root_nodes:
-            self.G.nodes[root]['quantity'] = self.root_quantity
-
-        # 使用拓扑排序确保按层次计算
-        try:
-            topological_order = list(nx.topological_sort(self.G))
-
-            for node in topological_order:
-                if node not in root_nodes:  # 跳过根节点，已经设置过数量
-                    # 计算该节点的数量（所有入边的贡献之和）
-                    total_quantity = 0
+        if self._batch_depth:
+            self.engine.invalidate_quantities()  # 批量编辑结束时完整重算
+            return
+        self.engine.calculate_quantities()
 
-                    for predecessor in self.G.predecessors(node):
-                        if 'quantity' in self.G.nodes[predecessor]:
-                            edge_data = self.G[predecessor][node]
-                            source_qty = edge_data.get('source_quantity', 1)
-                            target_qty = edge_data.get('target_quantity', 1)
+    def update_quantities(self):
+        """只重新计算受最近改动影响的节点"""
+        if not self._batch_depth:
+            self.engine.update_quantities()
 
-                            # 计算该前驱节点贡献的数量
-                            predecessor_quantity = self.G.nodes[predecessor]['quantity']
-                            contribution = predecessor_quantity * target_qty / source_qty
-                            total_quantity += contribution
+    def draw_graph(self):
+        """请求重绘；短时间内的多次请求合并为一次后台布局计算"""
+        if not self._batch_depth:
+            self.draw_timer.start()
+
+    def request_layout(self):
+        """把当前图的拓扑快照交给后台线程计算布局，之前未完成的请求随之作废"""
+        self._layout_request_id += 1
+        self.layout_worker.latest_request = self._layout_request_id
+
+        G = self.view_graph()
+        if len(G) == 0:
+            self.set_layout_in_progress(False)
+            self.pos = {}
+            self.render_graph()
+            return
 
-                    if total_quantity > 0:
-                        self.G.nodes[node]['quantity'] = total_quantity
+        key = self.current_topology_key()
+        force_full = self._force_full_layout
+        self._force_full_layout = False
+        cached = None if force_full else self.layout_cache.get(key)
+        if cached is not None:
+            # 拓扑没有变化，只需要按新的样式重绘
+            self.set_layout_in_progress(False)
+            self.layout_state_label.setText('布局: 就绪 (缓存)')
+            self.pos = cached
+            self.render_graph()
+            return
 
-        except nx.NetworkXError:
-            # 如果有环，使用简单的方法计算
-            self.calculate_quantities_with_cycles()
+        if not force_full and self.pos and self.layout_mode_combo.currentData() == 'incremental':
+            with profiler.stage('layout_incremental'):
+                pos = self.layout_extender.extend(G, self.pos, (self.engine.reset_version, self.focus_params()))
+            if pos is not None:
+                # 只放置新节点，开销与改动量相关，直接在界面线程完成
+                self.set_layout_in_progress(False)
+                self.layout_state_label.setText('布局: 就绪 (增量)')
+                self.layout_cache.put(key, pos)
+                self.schedule_layout_cache_save()
+                self.pos = pos
+                self.render_graph()
+                return
 
-    def calculate_quantities_with_cycles(self):
-        """处理有环图的数量计算（简化版本）"""
-        # 找到根节点
-        root_nodes = [node for node in self.G.nodes() if self.G.in_degree(node) == 0]
+        self._pending_layout_key = key
+        self.set_layout_in_progress(True)
+        self.layout_requested.emit(self._layout_request_id, topology_snapshot(G),
+                                   self.full_layout_engine())
 
-        # 设置根节点数量
-        for root in root_nodes:
-            self.G.nodes[root]['quantity'] = self.root_quantity
+    def relayout(self):
+        """忽略缓存和已有坐标，用 dot 重新计算整张图的布局"""
+        self.draw_timer.stop()
+        self._force_full_layout = True
+        self.request_layout()
 
-        # 使用BFS遍历图
-        visited = set(root_nodes)
-        queue = list(root_nodes)
+    def full_layout_engine(self):
+        """完整布局使用的方式；增量布局没有旧坐标可用时也用 dot"""
+        return 'layered' if self.layout_mode_combo.currentData() == 'layered' else 'dot'
 
-        while queue:
-            current = queue.pop(0)
+    def on_layout_mode_changed(self):
+        self.draw_graph()
 
-            for successor in self.G.successors(current):
-                if 'quantity' not in self.G.nodes[successor]:
-                    edge_data = self.G[current][successor]
-                    source_qty = edge_data.get('source_quantity', 1)
-                    target_qty = edge_data.get('target_quantity', 1)
+    def current_topology_key(self):
+        """当前显示的图和布局方式的结构哈希，图没有改动时直接复用上次的结果"""
+        version = (self.engine.topology_version, self.full_layout_engine(), self.focus_params())
+        if self._topology_key_version != version:
+            self._topology_key = self.view_engine().topology_key(version[1])
+            self._topology_key_version = version
+        return self._topology_key
+
+    def focus_params(self):
+        if self.focus_node is None:
+            return None
+        return self.focus_node, self.focus_depth_spin.value()
+
+    def view_engine(self):
+        """当前显示的图所在的 engine：聚焦模式下为选中节点的锥体（数量单独计算），否则为整张图"""
+        if self.focus_node is not None and self.focus_node not in self.G:
+            self.clear_focus()  # 聚焦的节点已被删除
+        params = self.focus_params()
+        if params is None:
+            return self.engine
+        key = (params, self.engine.topology_version, self.root_quantity,
+               tuple(sorted(self.engine.root_quantities.items())), self.engine.solver)
+        if self._focus_view[0] != key:
+            nodes = self.cone_cache.cone(*params)
+            self._focus_view = (key, focus_engine(self.engine, nodes))
+        return self._focus_view[1]
+
+    def view_graph(self):
+        """当前要绘制的图"""
+        return self.view_engine().G
+
+    def on_node_clicked(self, index):
+        node = index.data(Qt.UserRole)
+        if node is None or node == self.focus_node:
+            return
+        self.set_focus(node)
+
+    def apply_node_search(self):
+        self.search_timer.stop()
+        self.nodes_list.model().set_filter(self.node_search_field.text().strip())
+
+    def focus_first_search_result(self):
+        self.apply_node_search()
+        model = self.nodes_list.model()
+        if self.node_search_field.text().strip() and model.rowCount():
+            index = model.index(0)
+            self.nodes_list.setCurrentIndex(index)
+            self.on_node_clicked(index)
+
+    def on_focus_depth_changed(self, value):
+        if self.focus_node is not None:
+            self.set_focus(self.focus_node)
+
+    def set_focus(self, node):
+        self.focus_node = node
+        self.show_all_btn.setEnabled(node is not None)
+        self.pos = None  # 之前的坐标属于另一张图，不做增量布局
+        self.draw_graph()
 
-                    current_quantity = self.G.nodes[current]['quantity']
-                    successor_quantity = current_quantity * target_qty / source_qty
+    def clear_focus(self):
+        if self.focus_node is not None:
+            self.set_focus(None)
 
-                    self.G.nodes[successor]['quantity'] = successor_quantity
+    def set_layout_in_progress(self, in_progress):
+        self.layout_in_progress = in_progress
+        self.layout_state_label.setText('布局: 计算中...' if in_progress else '布局: 就绪')
 
-                if successor not in visited:
-                    visited.add(successor)
-                    queue.append(successor)
+    def toggle_layout_disk_cache(self, state):
+        self.layout_cache.set_cache_file(DEFAULT_LAYOUT_CACHE_FILE if state == '内存+磁盘' else None)
+        self.schedule_layout_cache_save()
 
-    def draw_graph(self):
-        self.canvas.ax.clear()
+    def schedule_layout_cache_save(self):
+        if self.layout_cache.cache_file:
+            self.layout_cache_timer.start()
 
-        if len(self.G.nodes()) == 0:
-            self.canvas.ax.text(0.5, 0.5, '暂无数据\n请输入节点关系',
-                                ha='center', va='center', fontsize=16,
-                                transform=self.canvas.ax.transAxes)
-            self.canvas.draw()
+    def flush_layout_cache(self):
+        """把布局缓存的快照交给后台线程写入缓存文件"""
+        snapshot = self.layout_cache.snapshot()
+        if snapshot is None:
+            return
+        self._layout_cache_request_id += 1
+        self.save_worker.latest_layout_cache_request = self._layout_cache_request_id
+        filename, entries = snapshot
+        self.layout_cache_save_requested.emit(self._layout_cache_request_id, entries, filename)
+
+    def on_layout_cache_saved(self, request_id):
+        self._finished_layout_cache_id = max(self._finished_layout_cache_id, request_id)
+
+    def on_layout_finished(self, request_id, pos, engine):
+        if request_id != self._layout_request_id:
+            return  # 过期的布局结果
+        self.set_layout_in_progress(False)
+        if engine != self.full_layout_engine():
+            self.layout_state_label.setText('布局: 就绪 (dot 不可用，已改用内置分层布局)')
+        self.layout_cache.put(self._pending_layout_key, pos)
+        self.schedule_layout_cache_save()
+        self.pos = pos
+        self.render_graph()
+
+    def on_layout_failed(self, request_id, message):
+        if request_id != self._layout_request_id:
+            return
+        self.set_layout_in_progress(False)
+        self.render_graph(error=message)
+
+    def render_graph(self, error=None):
+        """用最近一次的布局结果更新图形；只有布局变化时才把视野重置为整张图"""
+        with profiler.stage('render'):
+            self._render_graph(error)
+
+    def _render_graph(self, error):
+        G = self.view_graph()
+        if len(G) == 0:
+            self.renderer.show_message('暂无数据\n请输入节点关系')
             return
 
         try:
-            pos = graphviz_layout(self.G, prog='dot')
-
-            node_size = self.node_size_spin.value()
-
-            # 绘制节点和边
-            nx.draw_networkx_edges(
-                self.G, pos,
-                edge_color='gray',
-                arrows=True,
-                arrowsize=20,
-                alpha=0.9,
-                ax=self.canvas.ax
-            )
-
-            # 绘制节点，根据是否有数量信息使用不同颜色
-            node_colors = []
-            for node in self.G.nodes():
-                if 'quantity' in self.G.nodes[node]:
-                    node_colors.append('lightgreen')  # 有数量信息的节点
-                else:
-                    node_colors.append('lightblue')  # 无数量信息的节点
-
-            nx.draw_networkx_nodes(
-                self.G, pos,
-                node_size=node_size,
-                node_color=node_colors,
-                alpha=0.9,
-                linewidths=1.5,
-                ax=self.canvas.ax
-            )
-
-            # 绘制节点标签，包含数量信息
-            labels = {}
-            for node in self.G.nodes():
-                if 'quantity' in self.G.nodes[node]:
-                    quantity = self.G.nodes[node]['quantity']
-                    # 格式化数量显示
-                    if quantity.is_integer():
-                        labels[node] = f"{node}\n({int(quantity)})"
-                    else:
-                        labels[node] = f"{node}\n({quantity:.2f})"
-                else:
-                    labels[node] = node
-
-            nx.draw_networkx_labels(
-                self.G, pos,
-                labels=labels,
-                font_size=10,
-                font_weight='bold',
-                ax=self.canvas.ax
-            )
-
-            # 绘制边标签，显示数量关系
-            edge_labels = {}
-            for u, v in self.G.edges():
-                edge_data = self.G[u][v]
-                source_qty = edge_data.get('source_quantity', 1)
-                target_qty = edge_data.get('target_quantity', 1)
-                edge_labels[(u, v)] = f"{source_qty}:{target_qty}"
-
-            nx.draw_networkx_edge_labels(
-                self.G, pos,
-                edge_labels=edge_labels,
-                font_size=8,
-                ax=self.canvas.ax
-            )
-
-            self.canvas.ax.set_title(
-                f'基因关系图 (节点数: {len(self.G.nodes())}, 边数: {len(self.G.edges())}, 根节点数量: {self.root_quantity})',
-                fontsize=14
+            if error is not None:
+                raise RuntimeError(error)
+
+            # 边列表每次绘制只取一次；标签只为裁剪后看得见的节点和边生成
+            edges = G.store.edges()  # [(源节点, 目标节点, 源数量, 目标数量), ...]
+
+            def node_label(node):
+                data = G.nodes[node]
+                return f"{node}\n({format_quantity(data['quantity'])})" if 'quantity' in data else node
+
+            def edge_label(edge):
+                return f"{edge[2]}:{edge[3]}"  # 边标签，显示数量关系
+
+            title = f'基因关系图 (节点数: {len(G)}, 边数: {G.number_of_edges()}, 根节点数量: {self.root_quantity})'
+            if self.focus_node is not None:
+                title = f'聚焦 {self.focus_node} (整图节点数: {len(self.G.nodes())}) - ' + title
+
+            reset_view = self.pos is not self._rendered_pos
+            self.renderer.render(
+                G, self.pos, edges,
+                node_size=self.node_size_spin.value(),
+                node_label=node_label,
+                edge_label=edge_label,
+                title=title,
+                reset_view=reset_view
             )
-
-            self.canvas.ax.axis('off')
+            if reset_view:
+                self._rendered_pos = self.pos
+                self.toolbar.update()  # 新布局作为工具栏“主页”视图
 
         except Exception as e:
-            self.canvas.ax.text(0.5, 0.5, f'绘制错误: {e}',
-                                ha='center', va='center', fontsize=12,
-                                transform=self.canvas.ax.transAxes)
+            self._rendered_pos = None
+            self.renderer.show_message(f'绘制错误: {e}', fontsize=12)
 
-        self.canvas.draw()
+    def on_label_zoom_changed(self, value):
+        self.renderer.label_zoom = value
+        self.renderer.update_view()
 
     def update_lists(self):
-        self.nodes_list.clear()
-        self.edges_list.clear()
-
-        for node in sorted(self.G.nodes()):
-            if 'quantity' in self.G.nodes[node]:
-                quantity = self.G.nodes[node]['quantity']
-                if quantity.is_integer():
-                    self.nodes_list.addItem(f'● {node} (数量: {int(quantity)})')
-                else:
-                    self.nodes_list.addItem(f'● {node} (数量: {quantity:.2f})')
-            else:
-                self.nodes_list.addItem(f'● {node} (数量: 未计算)')
-
-        for edge in sorted(self.G.edges()):
-            edge_data = self.G[edge[0]][edge[1]]
-            source_qty = edge_data.get('source_quantity', 1)
-            target_qty = edge_data.get('target_quantity', 1)
-            self.edges_list.addItem(f'{edge[0]} [{source_qty}] → {edge[1]} [{target_qty}]')
+        """把图的改动同步到节点列表和边列表（逐行增删，整体替换后重建）"""
+        if self._batch_depth:
+            return
+        with profiler.stage('lists'):
+            self.nodes_list.model().refresh()
+            self.edges_list.model().refresh()
 
     def clear_graph(self):
         reply = QMessageBox.question(self, '确认清空', '确定要清空所有数据吗？',
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.G.clear()
-            self.root_quantity = 1
-            self.root_quantity_spin.setValue(1)
-            self.draw_graph()
-            self.update_lists()
-            self.save_config("gene_graph_config.txt")
+            with self.batch_edit():
+                self.engine.clear()
+                self.root_quantity_spin.setValue(1)
+                self.schedule_auto_save(force=True)
             self.status_label.setText('图形已清空')
 
     def save_config(self, filename=None):
         """内部保存方法，不弹出对话框"""
         if filename is None:
-            filename = "gene_graph_config.txt"
-
-        # 保存边信息，包括数量关系
-        edges_data = []
-        for u, v in self.G.edges():
-            edge_data = {
-                'source': u,
-                'target': v,
-                'source_quantity': self.G[u][v].get('source_quantity', 1),
-                'target_quantity': self.G[u][v].get('target_quantity', 1)
-            }
-            edges_data.append(edge_data)
-
-        self.config_data["edges"] = edges_data
-        self.config_data["node_count"] = len(self.G.nodes())
-        self.config_data["root_quantity"] = self.root_quantity
-        self.config_data["last_modified"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        if not self.config_data["created_time"]:
-            self.config_data["created_time"] = self.config_data["last_modified"]
+            filename = DEFAULT_CONFIG_FILE
 
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.config_data, f, indent=2, ensure_ascii=False)
-            self.status_label.setText(f'配置已保存到 {filename}')
+            self.last_save_seconds = self.engine.save_config(filename)
+            self.status_label.setText(f'配置已保存到 {filename} ({self.last_save_seconds:.2f}s)')
             return True
         except Exception as e:
             print(f'保存配置失败: {e}')
@@ -614,42 +985,23 @@ class GeneGraphUI(QMainWindow):
     def save_config_with_dialog(self):
         """带对话框的保存方法"""
         filename, _ = QFileDialog.getSaveFileName(
-            self, '保存配置', 'gene_graph_config.txt', 'Text Files (*.txt)')
+            self, '保存配置', 'gene_graph_config.txt', CONFIG_FILE_FILTER)
         if filename:
             self.save_config(filename)
 
     def load_config(self, filename=None):
         """内部加载方法"""
         if filename is None:
-            filename = "gene_graph_config.txt"
-
-        if not os.path.exists(filename):
-            return False
+            filename = DEFAULT_CONFIG_FILE
 
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                loaded_data = json.load(f)
-
-            self.G.clear()
-
-            edges_data = loaded_data.get("edges", [])
-            for edge_data in edges_data:
-                u = edge_data['source']
-                v = edge_data['target']
-                self.G.add_edge(u, v)
-                self.G[u][v]['source_quantity'] = edge_data.get('source_quantity', 1)
-                self.G[u][v]['target_quantity'] = edge_data.get('target_quantity', 1)
-
-            self.root_quantity = loaded_data.get("root_quantity", 1)
-            self.root_quantity_spin.setValue(self.root_quantity)
-
-            self.config_data.update(loaded_data)
-            self.config_data["last_modified"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # 重新计算数量
-            self.calculate_quantities()
-            self.draw_graph()
-            self.update_lists()
+            # 刚加载的配置不需要保存；设置根节点数量等触发的重算都合并到最后一次
+            with self.batch_edit(save=False):
+                if not self.engine.load_config(filename):
+                    return False
+                # 图已整体替换，下一次改动时重新写一份完整配置再继续记日志
+                self.detach_journal()
+                self.root_quantity_spin.setValue(self.root_quantity)
             self.status_label.setText(f'配置已从 {filename} 加载')
             return True
 
@@ -660,7 +1012,7 @@ class GeneGraphUI(QMainWindow):
     def load_config_with_dialog(self):
         """带对话框的加载方法"""
         filename, _ = QFileDialog.getOpenFileName(
-            self, '加载配置', '', 'Text Files (*.txt)')
+            self, '加载配置', '', CONFIG_FILE_FILTER)
         if filename:
             self.load_config(filename)
 
@@ -670,53 +1022,113 @@ class GeneGraphUI(QMainWindow):
         if not filename:
             return
 
+        # 大批量导入不逐条记日志，导入后直接写完整配置
+        self.detach_journal()
         try:
-            # 临时关闭自动保存，避免多次弹出对话框
-            original_auto_save = self.auto_save_enabled
-            self.auto_save_enabled = False
-
-            with open(filename, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-                success_count = 0
-                for line_num, line in enumerate(lines, 1):
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        try:
-                            self.parse_and_add_edges(line, auto_save=False)
-                            success_count += 1
-                        except Exception as e:
-                            print(f'错误处理第 {line_num} 行: {e}')
-
-            # 导入完成后重新计算数量并保存
-            self.calculate_quantities()
-            if original_auto_save:
-                self.save_config("gene_graph_config.txt")
-
-            # 恢复自动保存设置
-            self.auto_save_enabled = original_auto_save
-
-            self.draw_graph()
-            self.update_lists()
-            self.status_label.setText(f'从 {filename} 导入了 {success_count} 条关系')
-
+            # 导入完成后才重新计算数量、重绘和保存
+            with self.batch_edit():
+                success_count, errors = self.engine.import_file(filename, self.on_import_progress)
         except Exception as e:
             QMessageBox.critical(self, '导入失败', f'导入文件失败: {e}')
-            self.auto_save_enabled = original_auto_save
+            return
+
+        for error in errors:
+            print(f'错误处理第 {error.line} 行第 {error.column} 列: {error}')
+        self.status_label.setText(f'从 {filename} 导入了 {success_count} 条关系')
+
+    def import_from_directory(self):
+        """并行导入目录中的所有 *.txt 关系文件"""
+        directory = QFileDialog.getExistingDirectory(self, '导入目录')
+        if not directory:
+            return
+
+        paths = expand_relation_paths([directory])
+        if not paths:
+            self.status_label.setText(f'{directory} 中没有 .txt 文件')
+            return
+
+        self.detach_journal()  # 同 import_from_file，导入后写完整配置
+        try:
+            with self.batch_edit():
+                results = self.engine.import_files(paths, progress=self.on_import_files_progress)
+        except Exception as e:
+            QMessageBox.critical(self, '导入失败', f'导入目录失败: {e}')
+            return
+
+        failed_files = 0
+        success_count = 0
+        for filename, file_success, errors in results:
+            success_count += file_success
+            if errors:
+                failed_files += 1
+            for error in errors:
+                if isinstance(error, ChainSyntaxError):
+                    print(f'{filename} 第 {error.line} 行第 {error.column} 列: {error}')
+                else:
+                    print(f'{filename}: {error}')
+
+        message = f'从 {len(paths)} 个文件导入了 {success_count} 条关系'
+        if failed_files:
+            message += f'，{failed_files} 个文件有错误（详见控制台）'
+        self.status_label.setText(message)
+
+    def on_import_files_progress(self, done, total):
+        self.status_label.setText(f'正在导入: {done}/{total} 个文件')
+        QApplication.processEvents()
+
+    def on_import_progress(self, read_bytes, total_bytes, edge_count):
+        """导入进度回调，大文件导入时刷新状态栏"""
+        percent = read_bytes * 100 // total_bytes if total_bytes else 100
+        self.status_label.setText(f'正在导入: {percent}% (已读取 {edge_count} 条边)')
+        QApplication.processEvents()
+
+    def update_profile_label(self):
+        if self._profile_version == profiler.version:
+            return
+        self._profile_version = profiler.version
+        text = profiler.summary()
+        if profiler.capturing:
+            text = '[cProfile 记录中] ' + text
+        self.profile_label.setText(text)
+
+    def show_profile_panel(self):
+        if self.profile_panel is None:
+            self.profile_panel = ProfilePanel(self, context=self.profile_context)
+        self.profile_panel.show()
+        self.profile_panel.raise_()
+
+    def profile_context(self):
+        """导出性能数据时附带的图规模和布局缓存状态"""
+        return {
+            'graph': {'nodes': len(self.engine.store), 'edges': self.engine.store.number_of_edges(),
+                      'solver': self.engine.solver, 'focus': self.focus_node},
+            'layout_cache': {'hits': self.layout_cache.hits, 'misses': self.layout_cache.misses},
+        }
 
     def export_image(self):
+        """PNG 为当前视野的截图；SVG / DOT / GraphML 不经过画布，直接按布局坐标写出整张图"""
         filename, _ = QFileDialog.getSaveFileName(
-            self, '导出图像', 'gene_graph.png', 'PNG Files (*.png);;All Files (*)')
+            self, '导出图像', 'gene_graph.png',
+            'PNG Files (*.png);;SVG Files (*.svg);;DOT Files (*.dot);;GraphML Files (*.graphml);;All Files (*)')
         if not filename:
             return
 
         try:
-            self.canvas.fig.savefig(filename, dpi=300, bbox_inches='tight')
+            fmt = export_format(filename)
+            if fmt is None or fmt == 'png':
+                self.canvas.fig.savefig(filename, dpi=300, bbox_inches='tight')
+            else:
+                if fmt == 'svg' and not self.pos:
+                    raise ValueError('布局尚未完成')
+                options = {'node_size': self.node_size_spin.value()} if fmt == 'svg' else {}
+                export_graph(self.view_engine(), filename, self.pos or None, fmt, **options)
             self.status_label.setText(f'图像已导出到 {filename}')
         except Exception as e:
             QMessageBox.critical(self, '导出失败', f'导出图像失败: {e}')
 
 
 def main():
+    configure_from_env()
     app = QApplication(sys.argv)
 
     # 设置应用程序样式
@@ -0,0 +1,864 @@
+"""基因关系图的无界面核心：图模型、链式关系解析、数量计算和配置读写
+
+本模块不依赖 PyQt5 / matplotlib / pygraphviz，可以直接在批处理脚本中使用，
+也可以作为命令行工具运行：
+
+    python graph_engine.py relations.txt --root-quantity 2 --json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from fractions import Fraction
+from typing import NamedTuple
+
+import numpy as np
+
+from chain_parser import ChainSyntaxError, parse_buffer
+from config_journal import read_journal
+from exact_quantity import normalize, ratio, rational, scale, to_float
+from graph_store import GraphStore, GraphView
+from name_index import SEARCH_LIMIT, NameIndex
+from profiling import configure_from_env, profiler, timed
+from topological_order import DynamicTopologicalOrder
+from topology_hash import TopologyHash
+
+DEFAULT_CONFIG_FILE = "gene_graph_config.txt"
+# 以这个后缀结尾的配置文件按二进制快照格式读写（需要 numpy），见 binary_config
+BINARY_CONFIG_SUFFIX = ".ggsnap"
+
+# 流式导入时每次读取的字节数，内存占用只与这个值有关，与文件大小无关
+IMPORT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# 数量计算方式：逐节点计算，基于稀疏矩阵的整体求解（需要 scipy），或用整数和分数逐节点精确计算
+SOLVERS = ('python', 'sparse', 'exact')
+# 改动影响的下游节点超过全部节点的 1/这个值 时，逐节点增量计算不如直接完整计算快
+INCREMENTAL_CONE_FRACTION = 8
+# 超过这么多二进制位的精确整数和分数按近似值显示（Python 默认也不允许把超过 4300 位的整数转成字符串）
+EXACT_DISPLAY_BITS = 100
+
+
+class ConfigSnapshot(NamedTuple):
+    """某一时刻配置的不可变副本，可以交给后台线程序列化"""
+    metadata: tuple  # ((键, 值), ...)，配置中除 edges 以外的字段，按原有顺序
+    edges: tuple  # ((源节点, 目标节点, 源数量, 目标数量), ...)
+
+
+def write_config(snapshot, filename):
+    """把快照写成 JSON 配置文件，返回耗时（秒）
+
+    先写入同目录下的临时文件并刷新到磁盘，再用 os.replace 替换原文件，
+    写到一半崩溃或断电时原配置保持完整。
+    """
+    start = time.perf_counter()
+    data = {"edges": [{
+        'source': source,
+        'target': target,
+        'source_quantity': source_quantity,
+        'target_quantity': target_quantity
+    } for source, target, source_quantity, target_quantity in snapshot.edges]}
+    data.update(snapshot.metadata)
+
+    # 临时文件名唯一，界面线程和后台线程同时保存同一个文件时不会互相覆盖临时文件
+    fd, temp_file = tempfile.mkstemp(prefix=os.path.basename(filename) + '.',
+                                     suffix='.tmp', dir=os.path.dirname(filename) or '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, filename)
+    except BaseException:
+        os.unlink(temp_file)
+        raise
+    return time.perf_counter() - start
+
+
+def parse_chain(input_string):
+    """解析一条链式关系，返回边列表 [(源节点, 源数量, 目标节点, 目标数量), ...]
+
+    支持中文句号、逗号、分号和直接数量表示，如 a.b、2a。3b、a.b.c、a.2b，3c；
+    格式错误时抛出 ChainSyntaxError（ValueError 的子类）
+    """
+    edges, success_count, errors = parse_buffer(input_string, comments=False)
+    if errors:
+        raise errors[0]
+    if not success_count:
+        raise ChainSyntaxError("输入至少需要两个节点，如 a.b 或 2a。3b", 1, len(input_string) + 1)
+    return edges
+
+
+def read_relation_blocks(filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """按块读取并解析关系文件
+
+    每块在最后一个换行处截断后整体解析，逐块产出
+    (边列表, 成功行数, [ChainSyntaxError, ...], 已读字节数, 文件总字节数)。
+    """
+    total_bytes = os.path.getsize(filename)
+    read_bytes = 0
+    line = 1
+    pending = b''
+
+    with open(filename, 'rb') as file:
+        while True:
+            block = file.read(chunk_size)
+            read_bytes += len(block)
+            if block:
+                block = pending + block
+                cut = block.rfind(b'\n') + 1
+                if not cut:
+                    pending = block
+                    continue
+                block, pending = block[:cut], block[cut:]
+            else:
+                # 文件末尾没有换行的最后一行
+                block, pending = pending, b''
+                if not block:
+                    break
+
+            text = block.decode('utf-8')
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            with profiler.stage('parse'):
+                edges, success_count, errors = parse_buffer(text, first_line=line)
+            line += text.count('\n')
+            yield edges, success_count, errors, read_bytes, total_bytes
+
+
+def _format_large_integer(quantity):
+    """很大的整数显示成 1.234e+5678 的形式"""
+    sign = '-' if quantity < 0 else ''
+    quantity = abs(quantity)
+    exponent = int(math.log10(quantity))
+    leading = str(quantity // 10 ** (exponent - 10))  # 10 位左右的有效数字，log10 可能差 1
+    exponent += len(leading) - 11
+    return f"{sign}{leading[0]}.{leading[1:4]}e+{exponent}"
+
+
+def format_quantity(quantity):
+    """格式化数量显示：整数不带小数，精确模式下的分数显示为 分子/分母，其他保留两位小数"""
+    if isinstance(quantity, Fraction):
+        if max(quantity.numerator.bit_length(), quantity.denominator.bit_length()) <= EXACT_DISPLAY_BITS:
+            return f"{quantity.numerator}/{quantity.denominator}"
+        if abs(quantity) < 2 ** EXACT_DISPLAY_BITS:
+            return f"{float(quantity):.2f}"
+        quantity = quantity.numerator // quantity.denominator
+    if isinstance(quantity, int):
+        if quantity.bit_length() <= EXACT_DISPLAY_BITS:
+            return str(quantity)
+        return _format_large_integer(quantity)
+    if float(quantity).is_integer():
+        return str(int(quantity))
+    return f"{quantity:.2f}"
+
+
+class GraphEngine:
+    """不依赖界面的图模型，负责边的增删、数量计算和配置读写"""
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else GraphStore()  # 图结构、数量关系和节点数量
+        self.topological_order = DynamicTopologicalOrder(self.store)  # 随增删边增量维护
+        self.topology_hash = TopologyHash(self.store)  # 布局缓存的键，随增删边增量维护
+        self.last_cycle = None  # 最近一次加边时形成的环 [u, v, ..., u]，没有形成环时为 None
+        self._view = GraphView(self.store, self._quantity_by_id)
+        self._quantity_version = 0  # 每次节点数量变化后加 1
+        self.config_data = {
+            "edges": [],
+            "created_time": "",
+            "last_modified": "",
+            "node_count": 0,
+            "version": "1.0"
+        }
+        self.root_quantity = 1  # 根节点数量，默认为1
+        self.root_quantities = {}  # {节点: 数量}，单独设置了数量的根节点，其余根节点用 root_quantity
+        self.solver = 'python'
+        self.divergent_nodes = set()  # 稀疏求解时数量发散（环上比例乘积 >= 1）的节点
+        self.exact_quantity = None  # 精确模式下按节点编号排列的 int / Fraction，没有数量时为 None
+        self._ratio_system = None  # 稀疏求解用的比例矩阵，图改动后重建
+        self.topology_version = 0  # 每次增删边后加 1，界面据此判断布局是否需要重新计算
+        self.reset_version = 0  # 图被清空、整体替换或批量修改后加 1，列表等视图据此整体重建
+        self.edge_observers = []  # 逐条增删边后调用 observer(操作, 源节点, 目标节点)，操作为 'add' / 'remove'
+        self.name_index = NameIndex()  # 按名称排序的节点编号，查找节点时才与 store 同步
+        self.journal = None  # ConfigJournal，设置后每次改动都追加一条日志记录
+        self._batch_depth = 0  # batch() 的嵌套层数
+
+        # 增量计算状态：数量是否与图一致、待重新计算的节点、上次计算时图中是否有环
+        self._quantities_valid = False
+        self._dirty_nodes = set()
+        self._has_cycle = False
+
+    @property
+    def G(self):
+        """图的只读 networkx 风格视图（节点带 quantity，边带数量关系），供绘图、布局和导出使用
+
+        视图直接读取 store，不复制图，改动后也不需要重建；改动请通过 engine 的方法。
+        """
+        return self._view
+
+    def topology_key(self, prog='dot'):
+        """当前拓扑的布局缓存键，与 layout_cache.topology_key(self.G, prog) 相同，但随增删边增量维护"""
+        return self.topology_hash.key(prog)
+
+    @contextmanager
+    def batch(self):
+        """批量编辑：期间的日志记录攒到结束时一次写入，结束时只做一次增量重算
+
+            with engine.batch():
+                for line in lines:
+                    engine.parse_and_add_edges(line)
+
+        可以嵌套，最外层结束时才写日志和重算；中途抛出异常时已做的改动保留，数量留到下次重算。
+        """
+        journal = self.journal
+        self._batch_depth += 1
+        try:
+            with journal.deferred() if journal is not None else nullcontext():
+                yield self
+        finally:
+            self._batch_depth -= 1
+        if not self._batch_depth:
+            self.update_quantities()
+
+    def add_edge(self, source, target, source_quantity=1, target_quantity=1):
+        """添加一条边（已存在时覆盖数量关系）；新边形成环时返回环上的节点 [源, 目标, ..., 源]"""
+        store = self.store
+        added = store.add_edge(source, target, source_quantity, target_quantity)
+        u, v = store.index[source], store.index[target]
+        if added:
+            self.topology_hash.add_edge(u, v)
+        cycle = self.topological_order.add_edge(u, v)
+        self.last_cycle = None if cycle is None else [store.names[node] for node in cycle]
+        self._dirty_nodes.add(source)
+        self._dirty_nodes.add(target)
+        self._ratio_system = None
+        self.topology_version += 1
+        if self.journal is not None:
+            self.journal.append([['add', source, target, source_quantity, target_quantity]])
+        for observer in self.edge_observers:
+            observer('add', source, target)
+        return self.last_cycle
+
+    def remove_edge(self, source, target):
+        """删除一条边，边不存在时返回 False"""
+        if not self.store.remove_edge(source, target):
+            return False
+        self.topological_order.remove_edge()
+        self.topology_hash.remove_edge(self.store.index[source], self.store.index[target])
+        self._dirty_nodes.add(source)
+        self._dirty_nodes.add(target)
+        self._ratio_system = None
+        self.topology_version += 1
+        if self.journal is not None:
+            self.journal.append([['remove', source, target]])
+        for observer in self.edge_observers:
+            observer('remove', source, target)
+        return True
+
+    def clear(self):
+        self.store.clear()
+        self.topological_order.invalidate()
+        self.topology_hash.invalidate()
+        self.root_quantity = 1
+        self.root_quantities = {}
+        self.invalidate_quantities()
+        self.topology_version += 1
+        self.reset_version += 1
+        if self.journal is not None:
+            self.journal.append([['clear']])
+
+    def invalidate_quantities(self):
+        """标记需要完整重算（整体替换图之后调用）"""
+        self._quantities_valid = False
+        self._dirty_nodes.clear()
+        self._ratio_system = None
+        self.exact_quantity = None
+
+    def set_root_quantity(self, value):
+        """修改根节点数量；数量是线性传播的，已计算过时直接按比例缩放"""
+        old_value = self.root_quantity
+        self.root_quantity = value
+        if self.journal is not None and value != old_value:
+            self.journal.append([['root', value]])
+        if not self._quantities_valid or old_value == 0 or value == 0 or self.root_quantities:
+            # 0 和其他数量之间无法按比例缩放；单独设置了数量的根节点不随之缩放
+            if self._batch_depth:
+                self.invalidate_quantities()  # 批量编辑结束时完整重算
+            else:
+                self.calculate_quantities()
+            return
+
+        if value != old_value and self.exact_quantity is not None:
+            numerator, denominator = ratio(old_value, value)
+            root_value = rational(value)
+            values = [None if quantity is None else scale(quantity, numerator, denominator)
+                      for quantity in self.exact_quantity]
+            for root in self.store.root_ids().tolist():
+                if root < len(values) and values[root] is not None:
+                    values[root] = root_value
+            self._set_exact_quantity(values)
+        elif value != old_value:
+            n = len(self.store)
+            quantity = self.store.quantity[:n]
+            roots = self.store.root_ids()
+            quantity *= value
+            quantity /= old_value
+            quantity[roots[~np.isnan(quantity[roots])]] = value
+            self._quantity_version += 1
+
+        # 缩放之后再补算尚未处理的改动，批量编辑时留到结束
+        if not self._batch_depth:
+            self.update_quantities()
+
+    def set_node_root_quantity(self, node, value):
+        """单独设置某个根节点的数量，value 为 None 时改回使用全局的根节点数量
+
+        只对没有入边的节点生效；节点之后有了入边，设置保留但不起作用。
+        """
+        if value is None:
+            if self.root_quantities.pop(node, None) is None:
+                return
+        elif self.root_quantities.get(node) == value:
+            return
+        else:
+            self.root_quantities[node] = value
+        if self.journal is not None:
+            self.journal.append([['node_root', node, value]])
+        if node in self.store:
+            self._dirty_nodes.add(node)
+
+    def root_quantity_of(self, node):
+        """节点作为根节点时的数量"""
+        return self.root_quantities.get(node, self.root_quantity)
+
+    def root_values(self, root_ids):
+        """按节点编号列表 root_ids 排列的根节点数量；都用全局数量时直接返回标量"""
+        if not self.root_quantities:
+            return self.root_quantity
+        names = self.store.names
+        return [self.root_quantity_of(names[root]) for root in root_ids]
+
+    def update_quantities(self):
+        """只重新计算受改动影响的下游节点，必要时退回完整计算"""
+        if self._quantities_valid and not self._dirty_nodes:
+            return
+        exact = self.solver == 'exact'
+        if not self._quantities_valid or self._has_cycle or self.solver == 'sparse' or \
+                exact != (self.exact_quantity is not None) or not self.topological_order.is_acyclic():
+            self.calculate_quantities()
+            return
+
+        # 改动节点及其所有后继构成需要重算的范围（节点编号）
+        start = time.perf_counter()
+        store = self.store
+        successor_ids = store.successor_ids
+        cone = set(store.index[node] for node in self._dirty_nodes if node in store)
+        limit = max(1, len(store) // INCREMENTAL_CONE_FRACTION)
+        stack = list(cone)
+        while stack:
+            for successor in successor_ids(stack.pop()):
+                if successor not in cone:
+                    cone.add(successor)
+                    stack.append(successor)
+            if len(cone) > limit:
+                self.calculate_quantities()
+                return
+
+        # 范围内的节点按增量维护的拓扑序排列
+        order = sorted(cone, key=self.topological_order.position.__getitem__)
+        if exact:
+            self._update_exact(order)
+        else:
+            self._update_float(order)
+        profiler.record('quantities_incremental', time.perf_counter() - start)
+        profiler.count('nodes_recomputed', len(order))
+
+    def _update_float(self, order):
+        """浮点模式下按拓扑序重算 order 中的节点"""
+        store = self.store
+        quantity = store.quantity
+        for node in order:
+            in_edges = store.in_edge_ids(node)
+            if not in_edges:
+                quantity[node] = self.root_quantity_of(store.names[node])
+                continue
+
+            total_quantity = 0
+            for predecessor, source_qty, target_qty in in_edges:
+                predecessor_quantity = quantity[predecessor]
+                if predecessor_quantity == predecessor_quantity:  # 不是 NaN
+                    total_quantity += predecessor_quantity * target_qty / source_qty
+            quantity[node] = total_quantity if total_quantity > 0 else np.nan
+
+        self._dirty_nodes.clear()
+        self._quantity_version += 1
+
+    def _update_exact(self, order):
+        """精确模式下按拓扑序重算 order 中的节点"""
+        store = self.store
+        values = self.exact_quantity
+        values.extend([None] * (len(store) - len(values)))
+        for node in order:
+            in_edges = store.in_edge_ids(node, exact=True)
+            if not in_edges:
+                values[node] = rational(self.root_quantity_of(store.names[node]))
+                store.quantity[node] = to_float(values[node])
+                continue
+
+            total_quantity = 0
+            for predecessor, source_qty, target_qty in in_edges:
+                predecessor_quantity = values[predecessor]
+                if predecessor_quantity is not None:
+                    total_quantity += scale(predecessor_quantity, *ratio(source_qty, target_qty))
+            values[node] = normalize(total_quantity) if total_quantity > 0 else None
+            store.quantity[node] = to_float(values[node])
+
+        self._dirty_nodes.clear()
+        self._quantity_version += 1
+
+    def _set_exact_quantity(self, values):
+        """替换全部精确数量，并同步浮点数量列"""
+        self.exact_quantity = values
+        self.store.quantity[:len(values)] = [to_float(value) for value in values]
+        self._quantity_version += 1
+
+    def parse_and_add_edges(self, input_string):
+        """解析一条链式关系并加入图中，返回添加的边数"""
+        with profiler.stage('parse'):
+            edges = parse_chain(input_string)
+        cycle = None
+        with self.journal.deferred() if self.journal is not None else nullcontext():
+            for source, source_qty, target, target_qty in edges:
+                cycle = self.add_edge(source, target, source_qty, target_qty) or cycle
+        self.last_cycle = cycle
+        profiler.count('edges_added', len(edges))
+        return len(edges)
+
+    def add_edges(self, edges):
+        """批量添加 [(源节点, 源数量, 目标节点, 目标数量), ...]，之后需要完整重算数量"""
+        edges = list(edges)  # 可以是生成器，下面要遍历两次
+        self.store.add_edges((source, target, source_qty, target_qty)
+                             for source, source_qty, target, target_qty in edges)
+        self.topological_order.invalidate()
+        self.topology_hash.invalidate_edges()
+        self.invalidate_quantities()
+        self.topology_version += 1
+        self.reset_version += 1
+        if self.journal is not None:
+            self.journal.append(['add', source, target, source_qty, target_qty]
+                                for source, source_qty, target, target_qty in edges)
+        profiler.count('edges_added', len(edges))
+
+    @timed('import')
+    def import_file(self, filename, progress=None, chunk_size=IMPORT_CHUNK_SIZE):
+        """流式导入关系文件，返回 (成功行数, [ChainSyntaxError, ...])
+
+        progress(已读字节数, 文件总字节数, 已导入边数) 在每块处理完后调用。
+        """
+        edge_count = 0
+        success_count = 0
+        errors = []
+        for edges, chunk_success, chunk_errors, read_bytes, total_bytes in \
+                read_relation_blocks(filename, chunk_size):
+            self.add_edges(edges)
+            edge_count += len(edges)
+            success_count += chunk_success
+            errors.extend(chunk_errors)
+
+            if progress is not None:
+                progress(read_bytes, total_bytes, edge_count)
+
+        return success_count, errors
+
+    @timed('import')
+    def import_files(self, paths, max_workers=None, on_conflict='last', progress=None):
+        """用进程池并行解析多个关系文件后合并，见 parallel_import.import_files"""
+        from parallel_import import import_files
+
+        return import_files(self, paths, max_workers, on_conflict, progress)
+
+    @timed('quantities')
+    def calculate_quantities(self):
+        """计算所有节点的数量"""
+        if self.solver == 'sparse':
+            self.calculate_quantities_sparse()
+            return
+
+        self.divergent_nodes = set()
+        self.exact_quantity = None
+        store = self.store
+        n = len(store)
+        # 清除所有节点的数量，根节点（没有入边的节点）设为根节点数量
+        quantity = store.quantity
+        quantity[:] = np.nan
+        root_nodes = store.root_ids()
+        root_values = self.root_values(root_nodes.tolist())
+        quantity[root_nodes] = root_values
+        if self.solver == 'exact':
+            self.exact_quantity = [None] * n
+            if not isinstance(root_values, list):
+                root_values = [root_values] * len(root_nodes)
+            for root, value in zip(root_nodes.tolist(), root_values):
+                self.exact_quantity[root] = rational(value)
+
+        self._quantities_valid = True
+        self._dirty_nodes.clear()
+        self._quantity_version += 1
+
+        # 使用拓扑排序确保按层次计算
+        topological_order = self.topological_order.order_ids()
+        if topological_order is None:
+            # 如果有环，使用简单的方法计算
+            self._has_cycle = True
+            self.calculate_quantities_with_cycles()
+            return
+        self._has_cycle = False
+
+        ptr, in_sources, in_source_qty, in_target_qty = (
+            array.tolist() for array in store.in_csr(exact=self.solver == 'exact'))
+        if self.solver == 'exact':
+            values = self.exact_quantity
+            for node in topological_order:
+                if ptr[node] == ptr[node + 1]:
+                    continue
+                total_quantity = 0
+                for i in range(ptr[node], ptr[node + 1]):
+                    predecessor_quantity = values[in_sources[i]]
+                    if predecessor_quantity is not None:
+                        total_quantity += scale(predecessor_quantity,
+                                                *ratio(in_source_qty[i], in_target_qty[i]))
+                if total_quantity > 0:
+                    values[node] = normalize(total_quantity)
+            self._set_exact_quantity(values)
+            return
+
+        values = quantity[:n].tolist()
+        for node in topological_order:
+            if ptr[node] == ptr[node + 1]:  # 跳过根节点，已经设置过数量
+                continue
+            # 计算该节点的数量（所有入边的贡献之和）
+            total_quantity = 0
+            for i in range(ptr[node], ptr[node + 1]):
+                predecessor_quantity = values[in_sources[i]]
+                if predecessor_quantity == predecessor_quantity:  # 不是 NaN
+                    total_quantity += predecessor_quantity * in_target_qty[i] / in_source_qty[i]
+            if total_quantity > 0:
+                values[node] = total_quantity
+        quantity[:n] = values
+
+    def calculate_quantities_with_cycles(self):
+        """处理有环图的数量计算（简化版本）"""
+        store = self.store
+        quantity = store.quantity
+        root_nodes = store.root_ids().tolist()
+
+        # 使用BFS遍历图
+        visited = set(root_nodes)
+        queue = deque(root_nodes)
+
+        values = self.exact_quantity  # 精确模式下同时按分数计算
+        while queue:
+            current = queue.popleft()
+
+            for successor in store.successor_ids(current):
+                if np.isnan(quantity[successor]):
+                    source_qty, target_qty = store.edge_quantities(store.names[current],
+                                                                   store.names[successor])
+                    quantity[successor] = quantity[current] * target_qty / source_qty
+                    if values is not None:
+                        values[successor] = scale(values[current], *ratio(source_qty, target_qty))
+
+                if successor not in visited:
+                    visited.add(successor)
+                    queue.append(successor)
+        if values is not None:
+            self._set_exact_quantity(values)
+        self._quantity_version += 1
+
+    def calculate_quantities_sparse(self):
+        """用稀疏比例矩阵一次性求解所有节点的数量，有环时正确累加所有前驱的贡献"""
+        system = self.ratio_system()
+        root_values = self.root_values(system.roots.tolist())
+        values, divergent = system.solve(root_values)
+
+        self._quantities_valid = True
+        self._dirty_nodes.clear()
+        self._has_cycle = not system.is_acyclic
+        self.exact_quantity = None
+
+        quantity = self.store.quantity
+        n = len(system.nodes)
+        quantity[:n] = np.where(divergent, np.inf, np.where(values > 0, values, np.nan))
+        quantity[system.roots] = root_values
+        self.divergent_nodes = {system.nodes[i] for i in np.flatnonzero(divergent).tolist()}
+        self._quantity_version += 1
+
+    def ratio_system(self):
+        """当前图的稀疏比例矩阵（quantity_solver.RatioSystem，需要 scipy），图改动后重建"""
+        from quantity_solver import RatioSystem
+
+        if self._ratio_system is None:
+            self._ratio_system = RatioSystem(self.store)
+        return self._ratio_system
+
+    def node_quantities(self):
+        """按节点编号排列的数量，未计算出数量的为 None；精确模式下是 int / Fraction"""
+        n = len(self.store)
+        if self.exact_quantity is not None:
+            return self.exact_quantity[:n] + [None] * (n - len(self.exact_quantity))
+        return [None if value != value else value for value in self.store.quantity[:n].tolist()]
+
+    def quantity_of(self, node):
+        """单个节点的数量，未计算出数量时为 None；精确模式下是 int / Fraction"""
+        return self._quantity_by_id(self.store.index[node])
+
+    def _quantity_by_id(self, i):
+        if self.exact_quantity is not None:
+            return self.exact_quantity[i] if i < len(self.exact_quantity) else None
+        value = float(self.store.quantity[i])
+        return None if value != value else value
+
+    def sorted_nodes(self):
+        """按名称排序的节点列表"""
+        self.name_index.refresh(self.store.names, self.reset_version)
+        return list(self.name_index.sorted_names)
+
+    def search_nodes(self, text, limit=SEARCH_LIMIT):
+        """按名称查找节点：以 text 开头的在前，其次是包含 text 的，最后是按顺序含有 text 各字符的"""
+        self.name_index.refresh(self.store.names, self.reset_version)
+        names = self.store.names
+        return [names[node] for node in self.name_index.search(text, limit)]
+
+    def quantities(self):
+        """返回 {节点: 数量}，未计算出数量的节点为 None"""
+        return dict(zip(self.store.names, self.node_quantities()))
+
+    def edges_data(self):
+        """以配置文件中的格式返回所有边"""
+        return [{
+            'source': u,
+            'target': v,
+            'source_quantity': source_qty,
+            'target_quantity': target_qty
+        } for u, v, source_qty, target_qty in self.store.edges()]
+
+    def config_snapshot(self, generation=None):
+        """更新配置中的元数据并返回当前配置的不可变快照
+
+        generation 为刚写入日志的分代标记时一并写入，只有这样的配置才会在加载时重放日志。
+        """
+        self.config_data["node_count"] = len(self.store)
+        self.config_data["root_quantity"] = self.root_quantity
+        self.config_data["root_quantities"] = dict(self.root_quantities)
+        self.config_data["last_modified"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        if not self.config_data["created_time"]:
+            self.config_data["created_time"] = self.config_data["last_modified"]
+
+        metadata = tuple((key, value) for key, value in self.config_data.items()
+                         if key not in ("edges", "journal_generation"))
+        if generation is not None:
+            metadata += (("journal_generation", generation),)
+        return ConfigSnapshot(metadata, tuple(self.store.edges()))
+
+    def journal_snapshot(self):
+        """开始一次日志合并：写入新的分代标记，返回 (分代, 该分代的配置快照)"""
+        generation = self.journal.mark()
+        return generation, self.config_snapshot(generation)
+
+    @timed('save')
+    def save_config(self, filename=None):
+        """把边和根节点数量保存为配置文件（JSON 或二进制快照），返回耗时（秒）
+
+        保存到日志所属的配置文件时同时完成一次合并，之后日志中只剩新的分代标记。
+        """
+        if filename is None:
+            filename = DEFAULT_CONFIG_FILE
+        write = write_config
+        if filename.endswith(BINARY_CONFIG_SUFFIX):
+            from binary_config import write_binary_config as write
+
+        if self.journal is not None and \
+                os.path.abspath(filename) == os.path.abspath(self.journal.config_file):
+            generation, snapshot = self.journal_snapshot()
+            seconds = write(snapshot, filename)
+            self.journal.compact(generation)
+            return seconds
+        return write(self.config_snapshot(), filename)
+
+    def apply_journal_records(self, records):
+        """按顺序重放日志记录，见 config_journal"""
+        for record in records:
+            op = record[0]
+            if op == 'add':
+                self.add_edge(*record[1:])
+            elif op == 'remove':
+                self.remove_edge(*record[1:])
+            elif op == 'root':
+                self.root_quantity = record[1]
+            elif op == 'node_root':
+                self.set_node_root_quantity(*record[1:])
+            elif op == 'clear':
+                self.clear()
+
+    @timed('load')
+    def load_config(self, filename=None):
+        """从配置文件（JSON 或二进制快照）加载图并重放旁边日志中的后续改动，文件不存在时返回 False"""
+        if filename is None:
+            filename = DEFAULT_CONFIG_FILE
+
+        if not os.path.exists(filename):
+            return False
+
+        config = None
+        if filename.endswith(BINARY_CONFIG_SUFFIX):
+            from binary_config import read_binary_config
+
+            config = read_binary_config(filename)
+            loaded_data = dict(config.metadata)
+        else:
+            with open(filename, 'r', encoding='utf-8') as f:
+                loaded_data = json.load(f)
+
+        # 重放的改动本来就在日志里，加载期间不再追加
+        journal, self.journal = self.journal, None
+        try:
+            self.store.clear()
+            self.topological_order.invalidate()
+            self.topology_hash.invalidate()
+            self.invalidate_quantities()
+            self.topology_version += 1
+            self.reset_version += 1
+            if config is not None:
+                self.store.add_edge_arrays(config.names, config.sources, config.targets,
+                                           config.source_quantity, config.target_quantity)
+                if config.name_order is not None:
+                    self.name_index.set_order(self.store.names, config.name_order, self.reset_version)
+            else:
+                self.store.add_edges((edge_data['source'], edge_data['target'],
+                                      edge_data.get('source_quantity', 1),
+                                      edge_data.get('target_quantity', 1))
+                                     for edge_data in loaded_data.get("edges", []))
+
+            self.root_quantity = loaded_data.get("root_quantity", 1)
+            self.root_quantities = dict(loaded_data.get("root_quantities", {}))
+            # 分代只属于读到的这个文件，不留在 config_data 里，以免不带日志保存的配置再次重放它
+            self.apply_journal_records(read_journal(filename, loaded_data.pop("journal_generation", None)))
+        finally:
+            self.journal = journal
+
+        loaded_data.pop("edges", None)  # 边已经在图中，不再在配置里保留一份
+        self.config_data.update(loaded_data)
+        self.config_data["last_modified"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return True
+
+
+def main(argv=None):
+    from parallel_import import CONFLICT_RULES, expand_relation_paths
+
+    parser = argparse.ArgumentParser(description='从关系文件计算基因关系图中各节点的数量')
+    parser.add_argument('relations', nargs='+',
+                        help='关系文件、目录或通配符，每行一条链式关系，如 2a.3b.c')
+    parser.add_argument('--root-quantity', type=int, default=1, help='根节点数量，默认为1')
+    parser.add_argument('--solver', choices=SOLVERS, default='python',
+                        help='数量计算方式：python 逐节点计算，sparse 稀疏矩阵求解（可处理有环图），'
+                             'exact 用整数和分数精确计算')
+    parser.add_argument('--json', action='store_true', help='以 JSON 格式输出节点数量和边')
+    parser.add_argument('--progress', action='store_true', help='在标准错误输出中显示导入进度')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='并行解析文件的进程数，0 表示使用全部 CPU；大于 1 时按文件名顺序合并')
+    parser.add_argument('--on-conflict', choices=CONFLICT_RULES, default='last',
+                        help='多个文件中重复边数量关系不一致时的处理方式，默认后导入的覆盖先导入的')
+    parser.add_argument('--save-config', metavar='FILE', help='同时保存为界面可加载的配置文件')
+    parser.add_argument('--scenarios', nargs=2, metavar=('CSV', 'OUTPUT'),
+                        help='按场景表中的多组根节点数量一次求解，结果写入 OUTPUT，见 scenarios')
+    parser.add_argument('--search', metavar='TEXT',
+                        help='只输出名称匹配 TEXT 的节点（前缀、包含或按顺序出现的字符），按匹配程度排序')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='把导入、解析、数量计算和保存各环节的耗时写成 JSON（设置 GENE_GRAPH_PROFILE 时含 cProfile）')
+    args = parser.parse_args(argv)
+    configure_from_env()
+
+    engine = GraphEngine()
+    engine.root_quantity = args.root_quantity
+    engine.solver = args.solver
+    paths = expand_relation_paths(args.relations)
+    if args.jobs != 1 or args.on_conflict != 'last':
+        progress = None
+        if args.progress:
+            def progress(done, total):
+                print(f'\r已导入 {done}/{total} 个文件', end='', file=sys.stderr)
+        results = engine.import_files(paths, args.jobs or None, args.on_conflict, progress)
+        if args.progress:
+            print(file=sys.stderr)
+    else:
+        results = []
+        for filename in paths:
+            progress = None
+            if args.progress:
+                def progress(read_bytes, total_bytes, edge_count, filename=filename):
+                    percent = read_bytes * 100 // total_bytes if total_bytes else 100
+                    print(f'\r{filename}: {percent}% ({edge_count} 条边)', end='', file=sys.stderr)
+            try:
+                success_count, errors = engine.import_file(filename, progress)
+            except (OSError, UnicodeDecodeError) as e:
+                success_count, errors = 0, [e]
+            if args.progress:
+                print(file=sys.stderr)
+            results.append((filename, success_count, errors))
+
+    for filename, _, errors in results:
+        for error in errors:
+            if isinstance(error, ChainSyntaxError):
+                print(f'{filename}:{error.line}:{error.column}: {error}', file=sys.stderr)
+            else:
+                print(f'{filename}: {error}', file=sys.stderr)
+
+    engine.calculate_quantities()
+    if engine.divergent_nodes:
+        print(f'警告: {len(engine.divergent_nodes)} 个节点处在比例乘积不小于 1 的环上或其下游，数量发散',
+              file=sys.stderr)
+
+    if args.save_config:
+        engine.save_config(args.save_config)
+
+    if args.scenarios:
+        from scenarios import read_scenarios, solve_scenarios, write_scenario_csv
+
+        scenario_file, output_file = args.scenarios
+        try:
+            table = solve_scenarios(engine, read_scenarios(scenario_file))
+        except ValueError as e:
+            print(f'{scenario_file}: {e}', file=sys.stderr)
+            return 1
+        write_scenario_csv(table, output_file)
+
+    quantities = engine.quantities()
+    if args.json:
+        if args.search:
+            quantities = {node: quantities[node] for node in engine.search_nodes(args.search)}
+        json.dump({
+            "root_quantity": engine.root_quantity,
+            "nodes": quantities,
+            "edges": engine.edges_data()
+        }, sys.stdout, indent=2, ensure_ascii=False, default=str)  # 精确模式下的分数输出为 "分子/分母"
+        print()
+    else:
+        for node in engine.search_nodes(args.search) if args.search else engine.sorted_nodes():
+            quantity = quantities[node]
+            print(f'{node}\t{format_quantity(quantity) if quantity is not None else "未计算"}')
+
+    if args.profile:
+        profiler.stop_capture()
+        profiler.dump(args.profile, graph={'nodes': len(engine.store), 'edges': engine.store.number_of_edges(),
+                                           'solver': engine.solver})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
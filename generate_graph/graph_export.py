@@ -0,0 +1,389 @@
+"""不经过界面画布的图导出：SVG、DOT、GraphML 和分块 PNG
+
+界面中的导出是把整张 matplotlib 画布按 300 dpi 另存，几千个节点时要为每条边、每个标签
+创建图元再栅格化，批量导出时这是最慢的一步。这里直接从 engine 的图结构、节点数量和布局坐标
+逐个元素写出文本格式，不创建任何图元：
+
+- SVG：与界面相同的配色，节点、边和数量标签逐行写入文件；
+- DOT / GraphML：数量写成节点和边的属性，有布局时附带坐标，可以交给 Graphviz、Gephi 等继续处理；
+- PNG：超过一块大小的图按网格分块，每块只绘制落在其中的节点和边，内存占用与整图大小无关。
+
+布局优先取布局缓存中的结果（与界面共用缓存文件时直接复用界面算好的布局），否则计算一次：
+
+    python graph_export.py gene_graph_config.txt graph.svg graph.graphml
+    python graph_export.py gene_graph_config.txt tiles/graph.png --tile-size 4096
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from graph_engine import SOLVERS, format_quantity
+from graph_renderer import (ARROW_SIZE, EDGE_COLOR, PLAIN_NODE_COLOR, QUANTITY_NODE_COLOR,
+                            compound_path)
+from layered_layout import layered_layout
+from layout_cache import LayoutCache, topology_key
+from profiling import configure_from_env, profiler
+
+EXPORT_FORMATS = ('svg', 'dot', 'graphml', 'png')
+DEFAULT_NODE_SIZE = 300  # 与界面的节点大小相同，为圆面积（点²）
+DEFAULT_TILE_SIZE = 4096  # PNG 每块的最大边长（像素）
+PAGE_MARGIN = 20  # 图四周留白（像素），放得下边缘节点的标签
+FONT_SIZE = 10  # 节点标签字号（像素），边标签小一号
+MIN_LABEL_PX = 6  # PNG 中缩放后的字号小于这个值时不画标签（看不清，且逐个绘制文字很慢）
+LABEL_FONTS = ['Microsoft YaHei', 'sans-serif']
+
+
+def export_format(filename):
+    """按扩展名判断导出格式，不支持时返回 None"""
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    extension = {'gv': 'dot', 'xml': 'graphml'}.get(extension, extension)
+    return extension if extension in EXPORT_FORMATS else None
+
+
+def compute_layout(G, prog='layered', cache=None):
+    """G 的布局坐标：缓存中有同样拓扑的布局时直接使用，否则计算后放入缓存
+
+    prog 为 'dot' 时需要 pygraphviz，失败时改用内置的分层布局。
+    """
+    key = topology_key(G, prog=prog) if cache is not None else None
+    if key is not None:
+        pos = cache.get(key)
+        if pos is not None:
+            return pos
+    pos = None
+    with profiler.stage('layout'):
+        if prog == 'dot':
+            try:
+                from networkx.drawing.nx_agraph import graphviz_layout
+
+                pos = graphviz_layout(G.to_networkx(), prog='dot')
+            except Exception as e:
+                print(f'dot 布局失败，改用内置分层布局: {e}', file=sys.stderr)
+        if pos is None:
+            pos = layered_layout(G)
+    if key is not None:
+        cache.put(key, pos)
+    return pos
+
+
+def quantity_text(value):
+    """属性中的数量：保留全部精度（浮点数用 repr，精确模式下为整数或 分子/分母）"""
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    try:
+        return str(value)
+    except ValueError:
+        return format_quantity(value)  # 超过 int 转字符串的位数上限
+
+
+def node_label(node, quantity):
+    return node if quantity is None else f'{node}\n({format_quantity(quantity)})'
+
+
+class _Scene:
+    """导出用的几何数据：节点按编号排列，坐标换算成 y 轴向下的像素，1 个布局单位为 scale 像素"""
+
+    def __init__(self, engine, pos, node_size=DEFAULT_NODE_SIZE, scale=1.0):
+        store = engine.store
+        self.names = list(store.names)
+        missing = next((node for node in self.names if node not in pos), None)
+        if missing is not None:
+            raise ValueError(f'节点 {missing} 没有布局坐标')
+        self.quantities = engine.node_quantities()
+        self.edges = store.edges()
+        index = store.index
+        self.sources = np.array([index[s] for s, _, _, _ in self.edges], dtype=np.int64)
+        self.targets = np.array([index[t] for _, t, _, _ in self.edges], dtype=np.int64)
+
+        layout = np.array([pos[node] for node in self.names], dtype=float).reshape(-1, 2)
+        low = layout.min(axis=0) if len(layout) else np.zeros(2)
+        high = layout.max(axis=0) if len(layout) else np.zeros(2)
+        self.radius = math.sqrt(node_size) / 2 * scale
+        margin = self.radius + PAGE_MARGIN
+        self.xy = np.stack([(layout[:, 0] - low[0]) * scale + margin,
+                            (high[1] - layout[:, 1]) * scale + margin], axis=1)
+        self.width = (high[0] - low[0]) * scale + 2 * margin
+        self.height = (high[1] - low[1]) * scale + 2 * margin
+
+    def edge_geometry(self):
+        """每条边去掉两端节点半径后的 (起点, 终点, 单位方向)"""
+        start = self.xy[self.sources]
+        end = self.xy[self.targets]
+        direction = end - start
+        length = np.hypot(direction[:, 0], direction[:, 1])
+        unit = direction / np.maximum(length, 1e-9)[:, None]
+        shrink = np.minimum(self.radius, length / 2)[:, None]
+        return start + unit * shrink, end - unit * shrink, unit
+
+
+def write_svg(engine, pos, filename, node_size=DEFAULT_NODE_SIZE, labels=True, title=None):
+    """把 engine 的图按 pos 写成 SVG，配色与界面相同"""
+    scene = _Scene(engine, pos, node_size)
+    tail, tip, _ = scene.edge_geometry()
+    top = FONT_SIZE * 2 if title else 0
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{scene.width:.0f}" '
+                f'height="{scene.height + top:.0f}" font-family={quoteattr(", ".join(LABEL_FONTS))}>\n')
+        f.write(f'<defs><marker id="arrow" viewBox="0 0 10 8" refX="10" refY="4" '
+                f'markerUnits="userSpaceOnUse" markerWidth="{ARROW_SIZE}" markerHeight="{ARROW_SIZE * 0.8}" '
+                f'orient="auto"><path d="M0,0L10,4L0,8z" fill="{EDGE_COLOR}"/></marker></defs>\n')
+        if title:
+            f.write(f'<text x="{scene.width / 2:.1f}" y="{FONT_SIZE * 1.5:.1f}" text-anchor="middle" '
+                    f'font-size="{FONT_SIZE * 1.4:.0f}">{escape(title)}</text>\n')
+        f.write(f'<g transform="translate(0,{top})">\n')
+
+        f.write(f'<g stroke="{EDGE_COLOR}" stroke-opacity="0.9" marker-end="url(#arrow)">\n')
+        f.writelines(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}"/>\n'
+                     for (x1, y1), (x2, y2) in zip(tail.tolist(), tip.tolist()))
+        f.write('</g>\n')
+
+        has_quantity = np.array([value is not None for value in scene.quantities], dtype=bool)
+        for color, mask in ((QUANTITY_NODE_COLOR, has_quantity), (PLAIN_NODE_COLOR, ~has_quantity)):
+            f.write(f'<g fill="{color}" fill-opacity="0.9">\n')
+            f.writelines(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{scene.radius:.1f}"/>\n'
+                         for x, y in scene.xy[mask].tolist())
+            f.write('</g>\n')
+
+        if labels:
+            f.write(f'<g font-size="{FONT_SIZE - 2}" fill="{EDGE_COLOR}" text-anchor="middle">\n')
+            middle = (scene.xy[scene.sources] + scene.xy[scene.targets]) / 2
+            f.writelines(f'<text x="{x:.1f}" y="{y:.1f}">{escape(f"{sq}:{tq}")}</text>\n'
+                         for (x, y), (_, _, sq, tq) in zip(middle.tolist(), scene.edges))
+            f.write('</g>\n')
+            f.write(f'<g font-size="{FONT_SIZE}" text-anchor="middle">\n')
+            for node, (x, y), quantity in zip(scene.names, scene.xy.tolist(), scene.quantities):
+                if quantity is None:
+                    f.write(f'<text x="{x:.1f}" y="{y + FONT_SIZE / 3:.1f}">{escape(node)}</text>\n')
+                else:
+                    f.write(f'<text x="{x:.1f}" y="{y - FONT_SIZE / 3:.1f}">{escape(node)}'
+                            f'<tspan x="{x:.1f}" dy="{FONT_SIZE * 1.2:.1f}">'
+                            f'({escape(format_quantity(quantity))})</tspan></text>\n')
+            f.write('</g>\n')
+        f.write('</g>\n</svg>\n')
+
+
+def _dot_id(text):
+    return '"' + str(text).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def write_dot(engine, filename, pos=None):
+    """把 engine 的图写成 Graphviz DOT：节点带 quantity，边带 source_quantity / target_quantity，
+    给出 pos 时节点带固定坐标（neato -n 可以按原样渲染），pos 中没有的节点不带坐标"""
+    names = engine.store.names
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('digraph gene_graph {\n')
+        for node, quantity in zip(names, engine.node_quantities()):
+            attributes = [f'label={_dot_id(node_label(node, quantity))}']
+            if quantity is not None:
+                attributes.append(f'quantity={_dot_id(quantity_text(quantity))}')
+            if pos is not None and node in pos:
+                x, y = pos[node]
+                attributes.append(f'pos="{x:.6g},{y:.6g}!"')
+            f.write(f'  {_dot_id(node)} [{", ".join(attributes)}];\n')
+        f.writelines(f'  {_dot_id(source)} -> {_dot_id(target)} [source_quantity={source_qty}, '
+                     f'target_quantity={target_qty}, label="{source_qty}:{target_qty}"];\n'
+                     for source, target, source_qty, target_qty in engine.store.edges())
+        f.write('}\n')
+
+
+def write_graphml(engine, filename, pos=None):
+    """把 engine 的图写成 GraphML：数量为 double 属性（精确模式下另有字符串形式的 exact_quantity），
+    给出 pos 时节点带 x / y"""
+    exact = engine.exact_quantity is not None
+    keys = [('quantity', 'node', 'double')]
+    if exact:
+        keys.append(('exact_quantity', 'node', 'string'))
+    if pos is not None:
+        keys += [('x', 'node', 'double'), ('y', 'node', 'double')]
+    keys += [('source_quantity', 'edge', 'double'), ('target_quantity', 'edge', 'double')]
+
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        for name, domain, kind in keys:
+            f.write(f'<key id="{name}" for="{domain}" attr.name="{name}" attr.type="{kind}"/>\n')
+        f.write('<graph edgedefault="directed">\n')
+        for node, quantity in zip(engine.store.names, engine.node_quantities()):
+            data = []
+            if quantity is not None:
+                value = quantity if isinstance(quantity, float) else _float(quantity)
+                data.append(f'<data key="quantity">{value!r}</data>')
+                if exact:
+                    data.append(f'<data key="exact_quantity">{quantity_text(quantity)}</data>')
+            if pos is not None and node in pos:
+                x, y = pos[node]
+                data.append(f'<data key="x">{float(x)!r}</data><data key="y">{float(y)!r}</data>')
+            f.write(f'<node id={quoteattr(node)}>{"".join(data)}</node>\n')
+        f.writelines(f'<edge source={quoteattr(source)} target={quoteattr(target)}>'
+                     f'<data key="source_quantity">{source_qty}</data>'
+                     f'<data key="target_quantity">{target_qty}</data></edge>\n'
+                     for source, target, source_qty, target_qty in engine.store.edges())
+        f.write('</graph>\n</graphml>\n')
+
+
+def _float(value):
+    try:
+        return float(value)
+    except OverflowError:
+        return math.inf
+
+
+def write_png_tiles(engine, pos, filename, tile_size=DEFAULT_TILE_SIZE, node_size=DEFAULT_NODE_SIZE,
+                    labels=True, scale=1.0, dpi=100):
+    """把图按 1 个布局单位 scale 像素画成 PNG（节点、箭头和文字随之缩放），返回写出的文件名列表
+
+    整张图不超过 tile_size 时只写 filename；否则按网格分块写成 名称_行_列.png，
+    每块单独建一个 Agg 画布，只绘制与该块相交的节点、边和标签。
+    """
+    from matplotlib import rc_context, rcParams
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import PathCollection
+    from matplotlib.figure import Figure
+
+    from spatial_index import GridIndex
+
+    scene = _Scene(engine, pos, node_size, scale)
+    tail, tip, unit = scene.edge_geometry()
+    arrow = ARROW_SIZE * scale
+    normal = np.stack([-unit[:, 1], unit[:, 0]], axis=1)
+    base = tip - unit * arrow
+    triangles = np.stack([tip, base + normal * arrow * 0.4, base - normal * arrow * 0.4, tip], axis=1)
+    edge_low = np.minimum(scene.xy[scene.sources], scene.xy[scene.targets])
+    edge_high = np.maximum(scene.xy[scene.sources], scene.xy[scene.targets])
+    middle = (scene.xy[scene.sources] + scene.xy[scene.targets]) / 2
+    has_quantity = np.array([value is not None for value in scene.quantities], dtype=bool)
+    index = GridIndex(scene.xy)
+
+    width, height = math.ceil(scene.width), math.ceil(scene.height)
+    columns, rows = math.ceil(width / tile_size), math.ceil(height / tile_size)
+    stem, extension = os.path.splitext(filename)
+    font_points = FONT_SIZE * scale * 72 / dpi
+    point_size = (2 * scene.radius * 72 / dpi) ** 2  # scatter 的 s 为点²
+    reach = scene.radius + FONT_SIZE * scale * 3  # 块外的节点和标签可能伸进块内的距离
+    written = []
+    fonts = {'font.sans-serif': LABEL_FONTS[:-1] + rcParams['font.sans-serif']}
+    with rc_context(fonts):
+        for row in range(rows):
+            for column in range(columns):
+                x0, y0 = column * tile_size, row * tile_size
+                x1, y1 = min(x0 + tile_size, width), min(y0 + tile_size, height)
+                fig = Figure(figsize=((x1 - x0) / dpi, (y1 - y0) / dpi), dpi=dpi)
+                FigureCanvasAgg(fig)
+                ax = fig.add_axes([0, 0, 1, 1])
+                ax.axis('off')
+                ax.set_xlim(x0, x1)
+                ax.set_ylim(y1, y0)
+
+                nodes = index.query(x0 - reach, x1 + reach, y0 - reach, y1 + reach)
+                edges = np.flatnonzero((edge_low[:, 0] <= x1) & (edge_high[:, 0] >= x0) &
+                                       (edge_low[:, 1] <= y1) & (edge_high[:, 1] >= y0))
+                if len(edges):
+                    ax.add_collection(PathCollection([compound_path(np.stack([tail[edges], tip[edges]], axis=1))],
+                                                     facecolors='none', edgecolors=EDGE_COLOR, alpha=0.9))
+                    ax.add_collection(PathCollection([compound_path(triangles[edges], closed=True)],
+                                                     facecolors=EDGE_COLOR, edgecolors='none', alpha=0.9))
+                ax.scatter(scene.xy[nodes, 0], scene.xy[nodes, 1], s=point_size,
+                           c=np.where(has_quantity[nodes], QUANTITY_NODE_COLOR, PLAIN_NODE_COLOR),
+                           alpha=0.9, linewidths=0, zorder=2)
+                if labels and FONT_SIZE * scale >= MIN_LABEL_PX:
+                    inside = ((middle[edges, 0] >= x0 - reach) & (middle[edges, 0] <= x1 + reach) &
+                              (middle[edges, 1] >= y0 - reach) & (middle[edges, 1] <= y1 + reach))
+                    for i in edges[inside].tolist():
+                        _, _, source_qty, target_qty = scene.edges[i]
+                        ax.text(*middle[i], f'{source_qty}:{target_qty}', fontsize=font_points * 0.8,
+                                color=EDGE_COLOR, ha='center', va='center', zorder=3)
+                    for i in nodes.tolist():
+                        x, y = scene.xy[i]
+                        ax.text(x, y, node_label(scene.names[i], scene.quantities[i]),
+                                fontsize=font_points, ha='center', va='center', zorder=3)
+
+                output = filename if rows == columns == 1 else f'{stem}_{row}_{column}{extension}'
+                fig.savefig(output, dpi=dpi, pil_kwargs={'compress_level': 1})  # 默认压缩级别下编码比绘制还慢
+                written.append(output)
+    return written
+
+
+def export_graph(engine, filename, pos=None, fmt=None, **options):
+    """按格式（默认由扩展名判断）导出 engine 的图，返回写出的文件名列表；SVG 和 PNG 需要 pos"""
+    fmt = fmt or export_format(filename)
+    if fmt is None:
+        raise ValueError(f'{filename}: 不支持的导出格式，可用 {", ".join(EXPORT_FORMATS)}')
+    if fmt in ('svg', 'png') and pos is None:
+        raise ValueError(f'{fmt.upper()} 导出需要布局坐标')
+    if fmt == 'svg':
+        write_svg(engine, pos, filename, **options)
+    elif fmt == 'dot':
+        write_dot(engine, filename, pos)
+    elif fmt == 'graphml':
+        write_graphml(engine, filename, pos)
+    else:
+        return write_png_tiles(engine, pos, filename, **options)
+    return [filename]
+
+
+def main(argv=None):
+    from graph_engine import GraphEngine
+
+    parser = argparse.ArgumentParser(description='不经过界面直接把配置中的图导出为 SVG / DOT / GraphML / PNG')
+    parser.add_argument('config', help='配置文件（JSON 或二进制快照）')
+    parser.add_argument('outputs', nargs='+', help='输出文件，格式由扩展名决定 (.svg .dot .graphml .png)')
+    parser.add_argument('--solver', choices=SOLVERS, default='python', help='数量计算方式，默认为 python')
+    # 布局缓存按布局方式区分，默认与界面的增量布局、完整布局相同用 dot，才能命中界面缓存的布局
+    parser.add_argument('--layout', choices=('layered', 'dot'), default='dot',
+                        help='布局方式，默认与界面相同为 dot（没有 pygraphviz 时改用内置分层布局）；'
+                             '界面中选了内置分层布局时用 layered 才能复用其缓存')
+    parser.add_argument('--layout-cache', metavar='FILE',
+                        help='布局缓存文件（可以与界面共用 gene_graph_layout_cache.json）')
+    parser.add_argument('--positions', action='store_true', help='DOT / GraphML 中也写入布局坐标')
+    parser.add_argument('--node-size', type=float, default=DEFAULT_NODE_SIZE, help='节点大小，与界面相同')
+    parser.add_argument('--no-labels', action='store_true', help='SVG / PNG 中不画标签')
+    parser.add_argument('--title', help='SVG 顶部的标题')
+    parser.add_argument('--tile-size', type=int, default=DEFAULT_TILE_SIZE, help='PNG 每块的最大边长（像素）')
+    parser.add_argument('--scale', type=float, default=1.0, help='PNG 中每个布局单位（点）对应的像素数，默认为1')
+    args = parser.parse_args(argv)
+    configure_from_env()
+
+    formats = [export_format(output) for output in args.outputs]
+    for output, fmt in zip(args.outputs, formats):
+        if fmt is None:
+            parser.error(f'{output}: 不支持的导出格式，可用 {", ".join(EXPORT_FORMATS)}')
+
+    engine = GraphEngine()
+    engine.solver = args.solver
+    if not engine.load_config(args.config):
+        print(f'{args.config} 不存在', file=sys.stderr)
+        return 1
+    engine.calculate_quantities()
+
+    pos = None
+    start = time.perf_counter()
+    if args.positions or any(fmt in ('svg', 'png') for fmt in formats):
+        cache = LayoutCache(cache_file=args.layout_cache) if args.layout_cache else None
+        pos = compute_layout(engine.G, args.layout, cache)
+    layout_seconds = time.perf_counter() - start
+
+    for output, fmt in zip(args.outputs, formats):
+        start = time.perf_counter()
+        options = {}
+        if fmt in ('svg', 'png'):
+            options = {'node_size': args.node_size, 'labels': not args.no_labels}
+        if fmt == 'svg':
+            options['title'] = args.title
+        if fmt == 'png':
+            options.update(tile_size=args.tile_size, scale=args.scale)
+        written = export_graph(engine, output, pos if fmt in ('svg', 'png') or args.positions else None,
+                               fmt, **options)
+        print(f'{output}: {len(written)} 个文件, {time.perf_counter() - start:.2f}s')
+    if pos is not None:
+        print(f'布局 {layout_seconds:.2f}s')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
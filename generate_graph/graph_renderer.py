@@ -0,0 +1,340 @@
+"""用少量集合对象绘制关系图
+
+nx.draw_networkx_* 为每条边创建一个 FancyArrowPatch、为每个标签创建一个 Text，
+几千条边时单是绘制就要好几秒。这里所有边合成一条复合路径、所有箭头合成另一条，
+各放在一个 PathCollection 中，节点是一个 scatter，重绘时只更新它们的数据。
+
+缩放和平移时按视野裁剪（节点用网格索引，边用包围盒），只绘制看得见的部分；
+视野内节点太多时按屏幕网格聚合成一个个圆点，聚合点之间的边去重后只画一条。
+标签只在放大到设定倍数以上、且在屏幕上放得下（不与已放置的标签重叠）时绘制，
+标签文字在裁剪之后才按需生成，Text 对象循环使用。
+"""
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.colors import to_rgba
+from matplotlib.path import Path
+
+from spatial_index import GridIndex
+
+# 同一时间最多考虑的标签数，超过时提示继续放大
+MAX_VISIBLE_LABELS = 400
+# 视野四周留白占数据范围的比例
+VIEW_MARGIN = 0.05
+# 视野内节点超过这个数时按屏幕网格聚合显示
+AGGREGATE_NODE_LIMIT = 2000
+AGGREGATE_CELL_PX = 12  # 聚合网格的边长（像素）
+LABEL_CELL_PX = 4  # 判断标签重叠时使用的屏幕网格边长（像素）
+
+EDGE_COLOR = 'gray'
+QUANTITY_NODE_COLOR = 'lightgreen'  # 有数量信息的节点
+PLAIN_NODE_COLOR = 'lightblue'  # 无数量信息的节点
+ARROW_SIZE = 10  # 箭头长度（像素）
+
+
+def compound_path(pieces, closed=False):
+    """把形状为 (数量, 顶点数, 2) 的折线合成一条 Path，避免为每条边创建一个 Path 对象"""
+    count, vertex_count, _ = pieces.shape
+    codes = np.full((count, vertex_count), Path.LINETO, dtype=Path.code_type)
+    codes[:, 0] = Path.MOVETO
+    if closed:
+        codes[:, -1] = Path.CLOSEPOLY
+    return Path(pieces.reshape(-1, 2), codes.reshape(-1))
+
+
+def _text_extent(label, font_px):
+    """估计标签在屏幕上的宽和高（像素），中日韩字符按全角计算"""
+    lines = str(label).split('\n')
+    width = max(sum(1.0 if ord(ch) >= 0x2e80 else 0.6 for ch in line) for line in lines)
+    return width * font_px, len(lines) * font_px * 1.2
+
+
+class GraphRenderer:
+    def __init__(self, ax):
+        self.ax = ax
+        self.label_zoom = 1.0  # 放大倍数不小于这个值时才显示标签
+        self.nodes = []
+        self.xy = np.empty((0, 2))
+        self.edge_index = np.empty((0, 2), dtype=np.int64)
+        self.edges = []
+        self._node_label = str
+        self._edge_label = lambda edge: ''
+        self._label_cache = ({}, {})  # 本次 render 中已生成的 (节点标签, 边标签)，按下标
+        self.node_size = 300
+        self.full_limits = None
+        self.aggregated = False  # 当前视野是否以聚合方式显示
+        self.has_quantity = np.zeros(0, dtype=bool)
+        self.node_colors = np.empty((0, 4))
+        self.spatial_index = GridIndex(self.xy)
+        self.edge_low = self.edge_high = np.empty((0, 2))
+
+        ax.axis('off')
+        self.edge_lines = PathCollection([], facecolors='none', edgecolors=EDGE_COLOR,
+                                         alpha=0.9, zorder=1)
+        self.arrow_heads = PathCollection([], facecolors=EDGE_COLOR, edgecolors='none',
+                                          alpha=0.9, zorder=1)
+        # 节点不画描边：带描边的 scatter 在 Agg 中的绘制时间接近翻倍
+        self.node_points = ax.scatter([], [], s=[], alpha=0.9, linewidths=0, zorder=2)
+        ax.add_collection(self.edge_lines)
+        ax.add_collection(self.arrow_heads)
+        self.message = ax.text(0.5, 0.5, '', ha='center', va='center', fontsize=16,
+                               transform=ax.transAxes, visible=False)
+        self.label_hint = ax.text(0.01, 0.01, '', fontsize=9, color='gray',
+                                  transform=ax.transAxes, visible=False)
+        self._node_texts = []
+        self._edge_texts = []
+
+        ax.callbacks.connect('xlim_changed', self._on_view_changed)
+        ax.callbacks.connect('ylim_changed', self._on_view_changed)
+        ax.figure.canvas.mpl_connect('resize_event', lambda event: self.update_view())
+        self._updating_view = False
+
+    def show_message(self, text, fontsize=16):
+        """清空图形，只显示一行提示（无数据、绘制错误等）"""
+        self.set_graph_visible(False)
+        self.message.set_text(text)
+        self.message.set_fontsize(fontsize)
+        self.message.set_visible(True)
+        self.ax.set_title('')
+        self.ax.figure.canvas.draw_idle()
+
+    def set_graph_visible(self, visible):
+        for artist in (self.edge_lines, self.arrow_heads, self.node_points):
+            artist.set_visible(visible)
+        if not visible:
+            self.label_hint.set_visible(False)
+            for text in self._node_texts + self._edge_texts:
+                text.set_visible(False)
+
+    def render(self, G, pos, edges, node_size, node_label, edge_label, title, reset_view=False):
+        """按 pos 更新节点、边和空间索引；reset_view 为真时把视野设为整张图
+
+        edges 是调用方取一次的边列表，每项以 (源节点, 目标节点) 开头；
+        node_label(节点) 和 edge_label(edges 中的一项) 只对裁剪后要显示标签的节点和边调用。
+        """
+        self.nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(self.nodes)}
+        self.xy = np.array([pos[node] for node in self.nodes], dtype=float).reshape(-1, 2)
+        self.edges = edges
+        self.edge_index = np.array([(index[edge[0]], index[edge[1]]) for edge in edges],
+                                   dtype=np.int64).reshape(-1, 2)
+        self.node_size = node_size
+        self._node_label = node_label
+        self._edge_label = edge_label
+        self._label_cache = ({}, {})
+
+        self.has_quantity = np.array(['quantity' in G.nodes[node] for node in self.nodes],
+                                     dtype=bool)
+        self.node_colors = np.where(self.has_quantity[:, None],
+                                    to_rgba(QUANTITY_NODE_COLOR), to_rgba(PLAIN_NODE_COLOR))
+        self.spatial_index = GridIndex(self.xy)
+        start = self.xy[self.edge_index[:, 0]]
+        end = self.xy[self.edge_index[:, 1]]
+        self.edge_low = np.minimum(start, end)
+        self.edge_high = np.maximum(start, end)
+
+        self.message.set_visible(False)
+        self.set_graph_visible(True)
+        self.ax.set_title(title, fontsize=14)
+
+        self.full_limits = self._data_limits()
+        if reset_view:
+            self._updating_view = True
+            self.ax.set_xlim(*self.full_limits[0])
+            self.ax.set_ylim(*self.full_limits[1])
+            self._updating_view = False
+        self.update_view()
+
+    def _data_limits(self):
+        if not len(self.xy):
+            return (-1.0, 1.0), (-1.0, 1.0)
+        low = self.xy.min(axis=0)
+        high = self.xy.max(axis=0)
+        span = np.maximum(high - low, 1.0)
+        low = low - span * VIEW_MARGIN
+        high = high + span * VIEW_MARGIN
+        return (low[0], high[0]), (low[1], high[1])
+
+    def zoom(self):
+        """当前视野相对整张图放大的倍数"""
+        if self.full_limits is None:
+            return 1.0
+        full_width = self.full_limits[0][1] - self.full_limits[0][0]
+        x0, x1 = self.ax.get_xlim()
+        return full_width / max(abs(x1 - x0), 1e-9)
+
+    def _on_view_changed(self, ax):
+        if not self._updating_view:
+            self.update_view()
+
+    def _pixel_scale(self):
+        """每个像素对应的数据长度 (x, y)"""
+        bbox = self.ax.get_window_extent()
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        return (abs(x1 - x0) / max(bbox.width, 1.0), abs(y1 - y0) / max(bbox.height, 1.0))
+
+    def _view_rect(self, margin_px=0.0):
+        """当前视野 (x0, x1, y0, y1)，四周各放宽 margin_px 像素"""
+        sx, sy = self._pixel_scale()
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        return x0 - margin_px * sx, x1 + margin_px * sx, y0 - margin_px * sy, y1 + margin_px * sy
+
+    def _node_radius_px(self):
+        return np.sqrt(self.node_size) / 2 * self.ax.figure.dpi / 72
+
+    def update_view(self):
+        """视野或数据变化后重新裁剪节点和边，并决定聚合显示还是逐个显示"""
+        if not self.node_points.get_visible():
+            return
+        x0, x1, y0, y1 = self._view_rect(margin_px=self._node_radius_px())
+        visible_nodes = self.spatial_index.query(x0, x1, y0, y1)
+        visible_edges = np.flatnonzero(
+            (self.edge_low[:, 0] <= x1) & (self.edge_high[:, 0] >= x0) &
+            (self.edge_low[:, 1] <= y1) & (self.edge_high[:, 1] >= y0))
+
+        self.aggregated = len(visible_nodes) > AGGREGATE_NODE_LIMIT
+        if self.aggregated:
+            self._draw_aggregated(visible_nodes, visible_edges)
+            self._fill_texts(self._node_texts, [])
+            self._fill_texts(self._edge_texts, [])
+            self._set_hint(f'视野内 {len(visible_nodes)} 个节点，已聚合显示，放大后显示细节')
+        else:
+            self.node_points.set_offsets(self.xy[visible_nodes])
+            self.node_points.set_sizes([float(self.node_size)])
+            self.node_points.set_facecolors(self.node_colors[visible_nodes])
+            self._update_edges(visible_edges)
+            self._update_labels(visible_nodes, visible_edges)
+        self.ax.figure.canvas.draw_idle()
+
+    def _draw_aggregated(self, visible_nodes, visible_edges):
+        """把视野内的节点按屏幕网格合并，网格之间的边去重后画成直线"""
+        sx, sy = self._pixel_scale()
+        x0, _, y0, _ = self._view_rect()
+        cell = np.array([AGGREGATE_CELL_PX * sx, AGGREGATE_CELL_PX * sy])
+
+        endpoints = self.edge_index[visible_edges]
+        involved = np.unique(np.concatenate([visible_nodes, endpoints.ravel()]))
+        cells = np.floor((self.xy[involved] - (x0, y0)) / cell).astype(np.int64)
+        keys = (cells[:, 0] + (1 << 31)) << 32 | (cells[:, 1] + (1 << 31))
+        _, group, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        group = group.ravel()
+        centroids = np.stack([np.bincount(group, weights=self.xy[involved, axis]) / counts
+                              for axis in (0, 1)], axis=1)
+        quantity_share = np.bincount(group, weights=self.has_quantity[involved]) / counts
+
+        # 圆点面积随合并的节点数对数增长，最大为一个网格
+        cell_points = AGGREGATE_CELL_PX * 72 / self.ax.figure.dpi
+        self.node_points.set_offsets(centroids)
+        self.node_points.set_sizes(cell_points ** 2 * np.clip(np.log2(counts + 1) / 4, 0.25, 1.0))
+        self.node_points.set_facecolors(np.where((quantity_share >= 0.5)[:, None],
+                                                 to_rgba(QUANTITY_NODE_COLOR),
+                                                 to_rgba(PLAIN_NODE_COLOR)))
+
+        group_of = np.full(len(self.xy), -1, dtype=np.int64)
+        group_of[involved] = group
+        pairs = group_of[endpoints]
+        pairs = np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+        self.edge_lines.set_paths([compound_path(centroids[pairs])] if len(pairs) else [])
+        self.arrow_heads.set_paths([])
+
+    def _update_edges(self, edges):
+        if not len(edges):
+            self.edge_lines.set_paths([])
+            self.arrow_heads.set_paths([])
+            return
+        sx, sy = self._pixel_scale()
+        start = self.xy[self.edge_index[edges, 0]]
+        end = self.xy[self.edge_index[edges, 1]]
+        # 在像素空间里计算方向，使节点半径和箭头大小不随坐标轴比例变形
+        direction = (end - start) / (sx, sy)
+        length = np.hypot(direction[:, 0], direction[:, 1])
+        unit = direction / np.maximum(length, 1e-9)[:, None]
+        shrink = np.minimum(self._node_radius_px(), length / 2)[:, None]
+        tail = start + unit * shrink * (sx, sy)
+        tip = end - unit * shrink * (sx, sy)
+        self.edge_lines.set_paths([compound_path(np.stack([tail, tip], axis=1))])
+
+        normal = np.stack([-unit[:, 1], unit[:, 0]], axis=1)
+        base = tip - unit * ARROW_SIZE * (sx, sy)
+        half_width = normal * (ARROW_SIZE * 0.4) * (sx, sy)
+        triangles = np.stack([tip, base + half_width, base - half_width, tip], axis=1)
+        self.arrow_heads.set_paths([compound_path(triangles, closed=True)])
+
+    def _update_labels(self, visible_nodes, visible_edges):
+        node_items = []
+        edge_items = []
+        hint = ''
+        if self.zoom() + 1e-9 >= self.label_zoom:
+            x0, x1, y0, y1 = self._view_rect()
+            midpoints = (self.xy[self.edge_index[visible_edges, 0]] +
+                         self.xy[self.edge_index[visible_edges, 1]]) / 2
+            inside = ((midpoints[:, 0] >= x0) & (midpoints[:, 0] <= x1) &
+                      (midpoints[:, 1] >= y0) & (midpoints[:, 1] <= y1))
+            candidates = len(visible_nodes) + int(inside.sum())
+            if candidates <= MAX_VISIBLE_LABELS:
+                node_items, edge_items, skipped = self._fit_labels(
+                    [(self.xy[i], self.node_label(i)) for i in visible_nodes],
+                    [(midpoints[k], self.edge_label(i))
+                     for k, i in enumerate(visible_edges) if inside[k]])
+                if skipped:
+                    hint = f'{skipped} 个标签因重叠未显示，放大后显示'
+            else:
+                hint = f'视野内标签过多（{candidates} 个），放大后显示'
+        else:
+            hint = f'放大到 {self.label_zoom:g} 倍以上显示标签'
+        self._fill_texts(self._node_texts, node_items, fontsize=10, fontweight='bold')
+        self._fill_texts(self._edge_texts, edge_items, fontsize=8, fontweight='normal')
+        self._set_hint(hint)
+
+    def node_label(self, i):
+        labels = self._label_cache[0]
+        if i not in labels:
+            labels[i] = self._node_label(self.nodes[i])
+        return labels[i]
+
+    def edge_label(self, i):
+        labels = self._label_cache[1]
+        if i not in labels:
+            labels[i] = self._edge_label(self.edges[i])
+        return labels[i]
+
+    def _fit_labels(self, node_items, edge_items):
+        """节点标签优先，依次放置标签并跳过与已放置标签重叠的，返回 (节点标签, 边标签, 跳过数)"""
+        sx, sy = self._pixel_scale()
+        x0, _, y0, _ = self._view_rect()
+        occupied = set()
+        skipped = 0
+        placed = ([], [])
+        for kind, (items, font_pt) in enumerate(((node_items, 10), (edge_items, 8))):
+            font_px = font_pt * self.ax.figure.dpi / 72
+            for (x, y), label in items:
+                width, height = _text_extent(label, font_px)
+                px, py = (x - x0) / sx, (y - y0) / sy
+                cells = [(column, row)
+                         for column in range(int((px - width / 2) // LABEL_CELL_PX),
+                                             int((px + width / 2) // LABEL_CELL_PX) + 1)
+                         for row in range(int((py - height / 2) // LABEL_CELL_PX),
+                                          int((py + height / 2) // LABEL_CELL_PX) + 1)]
+                if any(cell in occupied for cell in cells):
+                    skipped += 1
+                    continue
+                occupied.update(cells)
+                placed[kind].append(((x, y), label))
+        return placed[0], placed[1], skipped
+
+    def _set_hint(self, hint):
+        self.label_hint.set_text(hint)
+        self.label_hint.set_visible(bool(hint) and len(self.nodes) > 0)
+
+    def _fill_texts(self, pool, items, **style):
+        """复用已有的 Text 对象显示 items，多余的隐藏"""
+        while len(pool) < len(items):
+            pool.append(self.ax.text(0, 0, '', ha='center', va='center', zorder=3,
+                                     clip_on=True, **style))
+        for text, ((x, y), label) in zip(pool, items):
+            text.set_position((x, y))
+            text.set_text(label)
+            text.set_visible(True)
+        for text in pool[len(items):]:
+            text.set_visible(False)
@@ -0,0 +1,547 @@
+"""紧凑的有向图存储：节点名称编号为整数，边和数量关系存放在 NumPy 列中
+
+nx.DiGraph 每条边要占前驱、后继两个邻接字典项和一个属性字典，每个节点还有三个字典，
+几百万条边时光图结构就要好几 GB。这里：
+
+- 节点名称按加入顺序编号，names[编号] 为名称，index[名称] 为编号；
+- 边以 (源编号 << 32 | 目标编号) 为键排序存放，数量关系编号和加入序号是与键对齐的两列；
+  数量关系 (源数量, 目标数量) 去重后放在 _RatioTable 中，表中保存原值（超过 2^53 的整数、
+  分数都不经过 float64），每条边只占一个 int32 编号，绝大多数图只有几十种数量关系；
+  出边、入边分别通过按 (源, 序号)、(目标, 序号) 排序的下标数组访问（CSR），
+  邻接的先后顺序与 nx.DiGraph 相同（按边第一次加入的顺序），有环时的简化计算结果不变；
+- 两次合并之间新加的边先放在增量字典中，删除的边只做标记，
+  增量超过主体的 1/8 时用 NumPy 一次性重建，单次编辑的均摊代价与图的规模无关。
+
+节点的数量保存在 quantity 列中，NaN 表示未计算出数量。绘图、布局和导出通过 GraphView
+（只读的 networkx 风格视图）直接读取这些数组，不再复制出一份 nx.DiGraph；
+需要真正的 nx.DiGraph 时（如交给 graphviz）可以用 to_networkx() 导出。
+"""
+import math
+
+import networkx as nx
+import numpy as np
+
+NODE_BITS = 32
+NODE_MASK = (1 << NODE_BITS) - 1
+# 增量中的边数超过 max(这个值, 主体边数 / 8) 时合并
+MIN_COMPACT_EDGES = 1024
+
+
+def _number(value):
+    """整数值的 float 还原成 int，保存的配置和显示的标签保持原样"""
+    return int(value) if type(value) is float and value.is_integer() else value
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except OverflowError:
+        return math.inf if value > 0 else -math.inf
+
+
+class _RatioTable:
+    """去重后的数量关系：编号 -> (源数量, 目标数量) 原值，以及求解用的 float64 列"""
+    __slots__ = ('source', 'target', '_ids', '_columns')
+
+    def __init__(self):
+        self.source = []  # 编号 -> 源数量（int / float / Fraction 原值）
+        self.target = []
+        self._ids = {}  # (源数量, 目标数量) -> 编号；相等的值（如 2 和 2.0）共用一个编号
+        self._columns = None
+
+    def copy(self):
+        table = _RatioTable()
+        table.source = list(self.source)
+        table.target = list(self.target)
+        table._ids = dict(self._ids)
+        return table
+
+    def id(self, source_quantity, target_quantity):
+        key = (source_quantity, target_quantity)
+        ratio = self._ids.get(key)
+        if ratio is None:
+            ratio = self._ids[key] = len(self.source)
+            self.source.append(_number(source_quantity))
+            self.target.append(_number(target_quantity))
+            self._columns = None
+        return ratio
+
+    def columns(self):
+        """(源数量, 目标数量) 两个 float64 数组，按编号下标"""
+        return self._float_values()[:2]
+
+    def float_lists(self):
+        """与 columns() 相同的值，Python float 列表"""
+        return self._float_values()[2:]
+
+    def _float_values(self):
+        if self._columns is None:
+            source = [_to_float(value) for value in self.source]
+            target = [_to_float(value) for value in self.target]
+            self._columns = (np.array(source, dtype=np.float64), np.array(target, dtype=np.float64),
+                             source, target)
+        return self._columns
+
+    def exact_columns(self):
+        """(源数量, 目标数量) 两个保存原值的 object 数组"""
+        source = np.empty(len(self.source), dtype=object)
+        target = np.empty(len(self.target), dtype=object)
+        source[:] = self.source
+        target[:] = self.target
+        return source, target
+
+
+class GraphStore:
+    __slots__ = ('names', 'index', 'quantity', '_in_degree', '_out_degree', '_next_seq', '_ratios',
+                 '_keys', '_ratio', '_seq', '_dead', '_dead_count',
+                 '_out_order', '_out_ptr', '_in_order', '_in_ptr', '_added', '_added_out', '_added_in')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.names = []
+        self.index = {}
+        self.quantity = np.empty(0)
+        self._in_degree = np.empty(0, dtype=np.int32)
+        self._out_degree = np.empty(0, dtype=np.int32)
+        self._next_seq = 0
+        self._ratios = _RatioTable()
+        self._rebuild(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64))
+
+    # ---- 节点 ----
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def nodes(self):
+        return list(self.names)
+
+    def _intern(self, name):
+        node = self.index.get(name)
+        if node is None:
+            node = len(self.names)
+            self.names.append(name)
+            self.index[name] = node
+            if node >= len(self.quantity):
+                self._grow(max(16, 2 * node))
+        return node
+
+    def _grow(self, capacity):
+        count = len(self.quantity)
+        self.quantity = np.concatenate([self.quantity, np.full(capacity - count, np.nan)])
+        self._in_degree = np.concatenate([self._in_degree, np.zeros(capacity - count, dtype=np.int32)])
+        self._out_degree = np.concatenate([self._out_degree, np.zeros(capacity - count, dtype=np.int32)])
+
+    def in_degree(self, name):
+        return int(self._in_degree[self.index[name]])
+
+    def out_degree(self, name):
+        return int(self._out_degree[self.index[name]])
+
+    def root_ids(self):
+        """没有入边的节点编号（升序）"""
+        return np.flatnonzero(self._in_degree[:len(self.names)] == 0)
+
+    def roots(self):
+        return [self.names[node] for node in self.root_ids().tolist()]
+
+    def quantity_of(self, name):
+        value = self.quantity[self.index[name]]
+        return None if np.isnan(value) else float(value)
+
+    # ---- 边 ----
+
+    def number_of_edges(self):
+        return len(self._keys) - self._dead_count + len(self._added)
+
+    def _base_slot(self, key):
+        i = int(np.searchsorted(self._keys, key))
+        if i < len(self._keys) and self._keys[i] == key:
+            return i
+        return None
+
+    def has_edge(self, source, target):
+        return self.edge_quantities(source, target) is not None
+
+    def edge_quantities(self, source, target):
+        """返回 (源数量, 目标数量)，边不存在时返回 None"""
+        u = self.index.get(source)
+        v = self.index.get(target)
+        if u is None or v is None:
+            return None
+        key = u << NODE_BITS | v
+        added = self._added.get(key)
+        if added is not None:
+            return added[:2]
+        i = self._base_slot(key)
+        if i is None or self._dead[i]:
+            return None
+        ratio = int(self._ratio[i])
+        return self._ratios.source[ratio], self._ratios.target[ratio]
+
+    def add_edge(self, source, target, source_quantity=1, target_quantity=1):
+        """添加一条边，已存在时覆盖数量关系；返回是否新加了边（覆盖时拓扑不变）"""
+        u = self._intern(source)
+        v = self._intern(target)
+        key = u << NODE_BITS | v
+        added = self._added.get(key)
+        if added is not None:
+            self._added[key] = (source_quantity, target_quantity, added[2])
+            return False
+        i = self._base_slot(key)
+        if i is not None and not self._dead[i]:
+            self._ratio[i] = self._ratios.id(source_quantity, target_quantity)
+            return False
+
+        # 新边（包括删除后重新加入的边）排在已有的边之后
+        self._added[key] = (source_quantity, target_quantity, self._next_seq)
+        self._next_seq += 1
+        self._added_out.setdefault(u, {})[v] = None
+        self._added_in.setdefault(v, {})[u] = None
+        self._link(u, v, 1)
+        if len(self._added) > max(MIN_COMPACT_EDGES, len(self._keys) // 8):
+            self.compact()
+        return True
+
+    def remove_edge(self, source, target):
+        """删除一条边（两端节点保留），边不存在时返回 False"""
+        u = self.index.get(source)
+        v = self.index.get(target)
+        if u is None or v is None:
+            return False
+        key = u << NODE_BITS | v
+        if self._added.pop(key, None) is not None:
+            del self._added_out[u][v]
+            del self._added_in[v][u]
+        else:
+            i = self._base_slot(key)
+            if i is None or self._dead[i]:
+                return False
+            self._dead[i] = True
+            self._dead_count += 1
+        self._link(u, v, -1)
+        return True
+
+    def _link(self, u, v, delta):
+        self._out_degree[u] += delta
+        self._in_degree[v] += delta
+
+    def add_edges(self, edges):
+        """批量添加 [(源节点, 目标节点, 源数量, 目标数量), ...]，重复的边以后出现的为准"""
+        keys = []
+        ratios = []
+        intern = self._intern
+        ratio_id = self._ratios.id
+        for source, target, source_qty, target_qty in edges:
+            keys.append(intern(source) << NODE_BITS | intern(target))
+            ratios.append(ratio_id(source_qty, target_qty))
+        self._merge(np.asarray(keys, dtype=np.int64), np.asarray(ratios, dtype=np.int32))
+
+    def add_edge_arrays(self, names, sources, targets, source_quantity, target_quantity):
+        """批量添加以编号数组表示的边，sources / targets 是 names 中的下标（如二进制配置）"""
+        ids = np.fromiter(map(self._intern, names), dtype=np.int64, count=len(names))
+        sources = ids[np.asarray(sources, dtype=np.int64)]
+        targets = ids[np.asarray(targets, dtype=np.int64)]
+        self._merge(sources << NODE_BITS | targets, self._ratio_ids(source_quantity, target_quantity))
+
+    def _ratio_ids(self, source_quantity, target_quantity):
+        """数量列 -> 数量关系编号列，只对不同的 (源数量, 目标数量) 逐个查表"""
+        source_values, source_codes = np.unique(np.asarray(source_quantity), return_inverse=True)
+        target_values, target_codes = np.unique(np.asarray(target_quantity), return_inverse=True)
+        pairs, pair_codes = np.unique(source_codes.astype(np.int64) * len(target_values) + target_codes,
+                                      return_inverse=True)
+        source_values, target_values = source_values.tolist(), target_values.tolist()
+        ratio_id = self._ratios.id
+        ratios = np.array([ratio_id(source_values[pair // len(target_values)],
+                                    target_values[pair % len(target_values)])
+                           for pair in pairs.tolist()], dtype=np.int32)
+        return ratios[pair_codes.reshape(-1)]
+
+    def _merge(self, keys, ratio):
+        if not len(keys):
+            return
+        self.compact()
+        seq = np.arange(self._next_seq, self._next_seq + len(keys))
+        self._next_seq += len(keys)
+        keys = np.concatenate([self._keys, keys])
+        ratio = np.concatenate([self._ratio, ratio])
+        seq = np.concatenate([self._seq, seq])
+        # 稳定排序后同一个键的数量关系取最后一次出现，序号取第一次出现（与 add_edges_from 相同）
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        changes = keys[1:] != keys[:-1]
+        first = order[np.insert(changes, 0, True)]
+        last = order[np.append(changes, True)]
+        self._rebuild(keys[np.append(changes, True)], ratio[last], seq[first])
+
+    def compact(self):
+        """把增量和删除标记合并进主体，重建 CSR 索引"""
+        if not self._added and not self._dead_count:
+            # 增量里加过又删掉的边可能留下了还没有出现在 CSR 指针中的节点
+            missing = len(self.names) + 1 - len(self._out_ptr)
+            if missing > 0:
+                self._out_ptr = np.append(self._out_ptr, np.full(missing, self._out_ptr[-1]))
+                self._in_ptr = np.append(self._in_ptr, np.full(missing, self._in_ptr[-1]))
+            return
+        alive = ~self._dead
+        added = self._added
+        keys = np.concatenate([self._keys[alive], np.fromiter(added, dtype=np.int64, count=len(added))])
+        ratio_id = self._ratios.id
+        ratio = np.concatenate([self._ratio[alive], np.fromiter(
+            (ratio_id(source_qty, target_qty) for source_qty, target_qty, _ in added.values()),
+            dtype=np.int32, count=len(added))])
+        seq = np.concatenate([self._seq[alive], np.fromiter(
+            (seq for _, _, seq in added.values()), dtype=np.int64, count=len(added))])
+        order = np.argsort(keys)
+        self._rebuild(keys[order], ratio[order], seq[order])
+
+    def _rebuild(self, keys, ratio, seq):
+        self._keys = keys
+        self._ratio = ratio
+        # 加入序号只用于确定邻接顺序，不超过 int32 范围时用 int32
+        self._seq = seq.astype(np.int32 if self._next_seq < 2 ** 31 else np.int64, copy=False)
+        self._dead = np.zeros(len(keys), dtype=bool)
+        self._dead_count = 0
+        self._added = {}  # 键 -> (源数量, 目标数量, 序号)
+        self._added_out = {}  # 源编号 -> {目标编号: None}，按加入顺序
+        self._added_in = {}
+
+        n = len(self.names)
+        sources = keys >> NODE_BITS
+        targets = keys & NODE_MASK
+        nodes = np.arange(n + 1)
+        # 边数不超过 int32 范围时下标数组用 int32，每条边省 8 字节
+        index_type = np.int32 if len(keys) < 2 ** 31 else np.int64
+        self._out_order = np.lexsort((seq, sources)).astype(index_type)
+        self._out_ptr = np.searchsorted(sources, nodes).astype(index_type)
+        self._in_order = np.lexsort((seq, targets)).astype(index_type)
+        self._in_ptr = np.searchsorted(targets[self._in_order], nodes).astype(index_type)
+        self._out_degree[:n] = np.diff(self._out_ptr)
+        self._in_degree[:n] = np.diff(self._in_ptr)
+
+    def edge_arrays(self):
+        """合并增量后按 edges() 的顺序返回 (源编号, 目标编号, 源数量, 目标数量) 四个数组"""
+        self.compact()
+        slots = self._out_order
+        keys = self._keys[slots]
+        ratio = self._ratio[slots]
+        source_quantity, target_quantity = self._ratios.columns()
+        return keys >> NODE_BITS, keys & NODE_MASK, source_quantity[ratio], target_quantity[ratio]
+
+    def in_csr(self, exact=False):
+        """合并增量后按目标节点分组的入边 (指针, 源编号, 源数量, 目标数量)，
+        节点 v 的入边是下标 [指针[v], 指针[v + 1]) 的一段；数量默认是 float64，exact 时是原值（object 数组）"""
+        self.compact()
+        slots = self._in_order
+        ratio = self._ratio[slots]
+        source_quantity, target_quantity = self._ratios.exact_columns() if exact else self._ratios.columns()
+        return self._in_ptr, self._keys[slots] >> NODE_BITS, source_quantity[ratio], target_quantity[ratio]
+
+    # ---- 邻接 ----
+
+    def successor_ids(self, u):
+        ids = []
+        if u < len(self._out_ptr) - 1:
+            slots = self._out_order[self._out_ptr[u]:self._out_ptr[u + 1]]
+            if self._dead_count:
+                slots = slots[~self._dead[slots]]
+            ids = (self._keys[slots] & NODE_MASK).tolist()
+        added = self._added_out.get(u)
+        if added:
+            ids.extend(added)
+        return ids
+
+    def in_edge_ids(self, v, exact=False):
+        """v 的入边 [(源编号, 源数量, 目标数量), ...]；数量默认是 float，exact 时是原值"""
+        edges = []
+        if v < len(self._in_ptr) - 1:
+            slots = self._in_order[self._in_ptr[v]:self._in_ptr[v + 1]]
+            if self._dead_count:
+                slots = slots[~self._dead[slots]]
+            ratio = self._ratio[slots].tolist()
+            if exact:
+                source_quantity, target_quantity = self._ratios.source, self._ratios.target
+            else:
+                source_quantity, target_quantity = self._ratios.float_lists()
+            edges = list(zip((self._keys[slots] >> NODE_BITS).tolist(),
+                             map(source_quantity.__getitem__, ratio),
+                             map(target_quantity.__getitem__, ratio)))
+        added = self._added_in.get(v)
+        if added:
+            for u in added:
+                edges.append((u,) + self._added[u << NODE_BITS | v][:2])
+        return edges
+
+    def successors(self, name):
+        names = self.names
+        return [names[v] for v in self.successor_ids(self.index[name])]
+
+    def predecessors(self, name):
+        names = self.names
+        return [names[u] for u, _, _ in self.in_edge_ids(self.index[name])]
+
+    def edges(self):
+        """按源节点、再按加入顺序返回 [(源节点, 目标节点, 源数量, 目标数量), ...]"""
+        self.compact()
+        names = self.names
+        slots = self._out_order
+        keys = self._keys[slots]
+        ratio = self._ratio[slots].tolist()
+        return list(zip(map(names.__getitem__, (keys >> NODE_BITS).tolist()),
+                        map(names.__getitem__, (keys & NODE_MASK).tolist()),
+                        map(self._ratios.source.__getitem__, ratio),
+                        map(self._ratios.target.__getitem__, ratio)))
+
+    def topological_ids(self):
+        """Kahn 算法得到的拓扑序（节点编号列表），有环时返回 None"""
+        self.compact()
+        n = len(self.names)
+        targets = (self._keys[self._out_order] & NODE_MASK).tolist()
+        ptr = self._out_ptr.tolist()
+        remaining = self._in_degree[:n].tolist()
+        order = [node for node in range(n) if remaining[node] == 0]
+        for node in order:
+            for i in range(ptr[node], ptr[node + 1]):
+                successor = targets[i]
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    order.append(successor)
+        if len(order) != n:
+            return None
+        return order
+
+    def topological_order(self):
+        order = self.topological_ids()
+        return None if order is None else [self.names[node] for node in order]
+
+    # ---- 导出 ----
+
+    def subgraph(self, names):
+        """names 的导出子图（含数量关系，不含节点数量），节点编号保持原来的先后顺序"""
+        members = np.unique([self.index[name] for name in names]).astype(np.int64)
+        local = np.full(len(self.names), -1, dtype=np.int64)
+        local[members] = np.arange(len(members))
+        self.compact()
+        slots = self._out_order
+        keys = self._keys[slots]
+        sources, targets = local[keys >> NODE_BITS], local[keys & NODE_MASK]
+        inside = (sources >= 0) & (targets >= 0)
+
+        store = GraphStore()
+        store._ratios = self._ratios.copy()  # 数量关系编号保持不变
+        for node in members.tolist():
+            store._intern(self.names[node])
+        store._merge(sources[inside] << NODE_BITS | targets[inside], self._ratio[slots][inside])
+        return store
+
+    def to_networkx(self):
+        """导出为 nx.DiGraph：节点带 quantity 属性（已计算出时），边带 source_quantity / target_quantity"""
+        G = nx.DiGraph()
+        quantity = self.quantity[:len(self.names)].tolist()
+        G.add_nodes_from((name, {} if value != value else {'quantity': value})
+                         for name, value in zip(self.names, quantity))
+        G.add_edges_from((source, target, {'source_quantity': source_qty, 'target_quantity': target_qty})
+                         for source, target, source_qty, target_qty in self.edges())
+        return G
+
+
+class _NodeView:
+    """GraphView.nodes：G.nodes()、G.nodes(data=True)、G.nodes[节点]、len、in、迭代"""
+    __slots__ = ('_graph',)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, data=False):
+        graph = self._graph
+        if not data:
+            return list(graph.store.names)
+        return [(name, graph.node_data(node)) for node, name in enumerate(graph.store.names)]
+
+    def __getitem__(self, name):
+        return self._graph.node_data(self._graph.store.index[name])
+
+    def __iter__(self):
+        return iter(self._graph.store.names)
+
+    def __len__(self):
+        return len(self._graph.store)
+
+    def __contains__(self, name):
+        return name in self._graph.store
+
+
+class GraphView:
+    """GraphStore 的只读视图，提供绘图、布局和导出用到的 nx.DiGraph 接口子集
+
+    节点和边的顺序与 to_networkx() 导出的图相同；节点属性只有 quantity（已计算出时），
+    边属性为 source_quantity / target_quantity，每次访问时从 store 中读取。
+    视图本身不保存任何图数据，store 改动后立即反映出来，不需要重建。
+    """
+    __slots__ = ('store', 'nodes', '_quantity')
+
+    def __init__(self, store, quantity=None):
+        """quantity(节点编号) 返回节点数量，未计算出时为 None；默认读取 store.quantity"""
+        self.store = store
+        self.nodes = _NodeView(self)
+        self._quantity = quantity if quantity is not None else self._store_quantity
+
+    def _store_quantity(self, node):
+        value = float(self.store.quantity[node])
+        return None if value != value else value
+
+    def node_data(self, node):
+        value = self._quantity(node)
+        return {} if value is None else {'quantity': value}
+
+    def __len__(self):
+        return len(self.store)
+
+    def __iter__(self):
+        return iter(self.store.names)
+
+    def __contains__(self, name):
+        return name in self.store
+
+    def number_of_nodes(self):
+        return len(self.store)
+
+    def number_of_edges(self):
+        return self.store.number_of_edges()
+
+    def edges(self, data=False):
+        if not data:
+            return [(source, target) for source, target, _, _ in self.store.edges()]
+        return [(source, target, {'source_quantity': source_qty, 'target_quantity': target_qty})
+                for source, target, source_qty, target_qty in self.store.edges()]
+
+    def has_edge(self, source, target):
+        return self.store.has_edge(source, target)
+
+    def successors(self, name):
+        return iter(self.store.successors(name))
+
+    def predecessors(self, name):
+        return iter(self.store.predecessors(name))
+
+    def in_degree(self, name):
+        return self.store.in_degree(name)
+
+    def out_degree(self, name):
+        return self.store.out_degree(name)
+
+    def to_networkx(self):
+        """导出为真正的 nx.DiGraph（graphviz 等只接受 networkx 图时使用）"""
+        G = self.store.to_networkx()
+        for node, data in G.nodes(data=True):
+            data.pop('quantity', None)
+            data.update(self.node_data(self.store.index[node]))
+        return G
+
+    def topology_copy(self):
+        """只含节点和边的独立副本（数组复制，不经过 Python 对象），可以交给其他线程"""
+        return GraphView(self.store.subgraph(self.store.names))
@@ -0,0 +1,192 @@
+"""增量布局：保留已有节点的坐标，只为新加入的节点就近找位置
+
+添加一条边后重新运行 dot 既慢又会把整张图重新排一遍。这里沿用上一次的坐标，
+新节点放在其已放置的前驱下方（或后继上方）一层、横向取邻居的平均位置，
+再在同一层上找最近的空位。与已有节点都不相连的新部分放在已有布局的右侧。
+
+界面中每次编辑都要补一次坐标，用 LayoutExtender 在两次之间保留间距、占用表和边界，
+单次编辑的代价只与新节点及其邻居有关，不随图的规模增长。
+"""
+import bisect
+from collections import deque
+from statistics import median
+
+from graph_store import GraphView
+
+# 没有可参考的已有坐标时使用的间距（与 dot 默认输出的数量级相同）
+DEFAULT_RANK_SEP = 72.0
+DEFAULT_NODE_SEP = 72.0
+
+
+def _spacing(G, pos):
+    """从已有布局估计层间距、同层节点间距，以及边的方向（dot 中子节点在下方，为 -1）"""
+    ys = sorted(set(round(y, 3) for _, y in pos.values()))
+    rank_gaps = [b - a for a, b in zip(ys, ys[1:]) if b - a > 1e-6]
+    rank_sep = median(rank_gaps) if rank_gaps else DEFAULT_RANK_SEP
+
+    rows = {}
+    for x, y in pos.values():
+        rows.setdefault(round(y, 3), []).append(x)
+    node_gaps = []
+    for xs in rows.values():
+        xs.sort()
+        node_gaps.extend(b - a for a, b in zip(xs, xs[1:]) if b - a > 1e-6)
+    node_sep = median(node_gaps) if node_gaps else DEFAULT_NODE_SEP
+
+    slope = 0.0
+    for u, v in G.edges():
+        if u in pos and v in pos:
+            slope += pos[v][1] - pos[u][1]
+    direction = 1 if slope > 0 else -1
+    return rank_sep, node_sep, direction
+
+
+class _Occupancy:
+    """按层记录已占用的横坐标，用于为新节点找同一层上最近的空位"""
+
+    def __init__(self, pos, rank_sep, node_sep):
+        self.rank_sep = rank_sep
+        self.node_sep = node_sep
+        self.rows = {}
+        for x, y in pos.values():
+            self.add(x, y)
+
+    def _row_key(self, y):
+        return round(y / self.rank_sep * 4)
+
+    def add(self, x, y):
+        bisect.insort(self.rows.setdefault(self._row_key(y), []), x)
+
+    def _is_free(self, xs, x):
+        i = bisect.bisect_left(xs, x)
+        if i < len(xs) and xs[i] - x < self.node_sep:
+            return False
+        if i > 0 and x - xs[i - 1] < self.node_sep:
+            return False
+        return True
+
+    def free_x(self, x, y):
+        xs = self.rows.get(self._row_key(y), [])
+        step = 0
+        while True:
+            for candidate in ((x,) if step == 0 else (x + step * self.node_sep, x - step * self.node_sep)):
+                if self._is_free(xs, candidate):
+                    return candidate
+            step += 1
+
+
+def extend_layout(G, previous_pos):
+    """在 previous_pos 基础上为 G 中的新节点补充坐标
+
+    已删除的节点会被去掉；没有可参考的旧坐标时返回 None，由调用方改用完整布局。
+    """
+    return LayoutExtender().extend(G, previous_pos)
+
+
+class LayoutExtender:
+    """有状态的 extend_layout：在相邻两次调用之间保留间距估计、各层的占用情况和布局边界
+
+    传入的 previous_pos 就是上一次返回的布局、version 没变（图没有被整体替换）、
+    G 是同一个 store 上的 GraphView 时，store.names 只会在末尾追加，新节点就是上次之后追加的名称，
+    每次只处理新节点及其邻居，不再为整张图排序坐标、扫描所有边、重建占用表；
+    其他情况完整计算一次。返回的布局是新的字典，previous_pos 不会被修改。
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._pos = None  # 上一次返回的布局
+        self._store = None
+        self._version = None
+        self._count = 0  # 上一次时 store.names 的长度
+        self._spacing = None  # (层间距, 同层间距, 边的方向)，第一次需要放置新节点时才估计
+        self._occupancy = None
+        self._top_y = self._right_x = None
+
+    def extend(self, G, previous_pos, version=None):
+        store = G.store if isinstance(G, GraphView) else None
+        if (previous_pos is self._pos and previous_pos is not None and version is not None
+                and version == self._version and store is not None and store is self._store):
+            new_nodes = [node for node in store.names[self._count:] if node not in previous_pos]
+            self._count = len(store.names)
+            if not new_nodes:
+                return previous_pos
+            pos = dict(previous_pos)
+        else:
+            self.reset()
+            pos = {node: tuple(previous_pos[node]) for node in G.nodes() if node in previous_pos}
+            new_nodes = [node for node in G.nodes() if node not in pos]
+            if not pos:
+                return None if new_nodes else pos
+            self._store, self._version = store, version
+            self._count = len(store.names) if store is not None else 0
+            if not new_nodes:
+                self._pos = pos
+                return pos
+
+        if self._spacing is None:
+            self._spacing = _spacing(G, pos)
+            rank_sep, node_sep, direction = self._spacing
+            self._occupancy = _Occupancy(pos, rank_sep, node_sep)
+            ys = [y for _, y in pos.values()]
+            self._top_y = max(ys) if direction < 0 else min(ys)
+            self._right_x = max(x for x, _ in pos.values())
+        self._place(G, pos, new_nodes)
+        self._pos = pos
+        return pos
+
+    def _place(self, G, pos, new_nodes):
+        """把 new_nodes 放入 pos，并更新占用情况和布局边界"""
+        rank_sep, node_sep, direction = self._spacing
+        occupancy = self._occupancy
+        top_y = self._top_y  # 本次放置期间不变，与已有布局的最上一层对齐
+        right_x = self._right_x
+        extreme = top_y
+
+        def neighbors(node):
+            yield from G.predecessors(node)
+            yield from G.successors(node)
+
+        def place(node, x, y):
+            nonlocal right_x, extreme
+            x = occupancy.free_x(x, y)
+            pos[node] = (x, y)
+            occupancy.add(x, y)
+            right_x = max(right_x, x)
+            extreme = max(extreme, y) if direction < 0 else min(extreme, y)
+            pending.discard(node)
+            for neighbor in neighbors(node):
+                if neighbor in pending:
+                    queue.append(neighbor)
+
+        pending = set(new_nodes)
+        queue = deque(node for node in new_nodes if any(n in pos for n in neighbors(node)))
+        while pending:
+            if not queue:
+                # 与已有节点都不相连的新部分：从入度最小的节点开始，放在已有布局右侧
+                seed = min((node for node in new_nodes if node in pending), key=G.in_degree)
+                place(seed, right_x + 2 * node_sep, top_y)
+                continue
+
+            node = queue.popleft()
+            if node not in pending:
+                continue
+            placed_preds = [pos[p] for p in G.predecessors(node) if p in pos]
+            placed_succs = [pos[s] for s in G.successors(node) if s in pos]
+            if placed_preds:
+                anchors = placed_preds
+                if direction < 0:
+                    y = min(py for _, py in placed_preds) - rank_sep
+                else:
+                    y = max(py for _, py in placed_preds) + rank_sep
+            else:
+                anchors = placed_succs
+                if direction < 0:
+                    y = max(sy for _, sy in placed_succs) + rank_sep
+                else:
+                    y = min(sy for _, sy in placed_succs) - rank_sep
+            x = sum(ax for ax, _ in anchors) / len(anchors)
+            place(node, x, y)
+
+        self._top_y, self._right_x = extreme, right_x
@@ -0,0 +1,222 @@
+"""内置的分层（Sugiyama 风格）布局，不依赖 Graphviz
+
+步骤与 dot 相同，但全部用 NumPy 数组完成：
+1. 用深度优先搜索的后序编号找出回边并反向，得到无环图；
+2. 最长路径分层（向量化的 Kahn 算法），跨越多层的边拆成经过虚拟节点的短边；
+3. 上下交替按重心（相邻层邻居位置的平均值）排序，减少边的交叉；
+4. 每个节点向相邻层邻居的平均横坐标靠拢，同时保持层内顺序和最小间距。
+
+没有安装 pygraphviz 的环境，或者节点太多 dot 太慢时使用。
+"""
+import numpy as np
+
+# 与 dot 默认输出大致相同的层间距和节点间距（单位为点）
+DEFAULT_RANK_SEP = 72.0
+DEFAULT_NODE_SEP = 54.0
+# 重心排序和坐标调整各做几轮上下扫描
+CROSSING_SWEEPS = 4
+COORDINATE_SWEEPS = 4
+# 跨越层数超过这个值的边不再插入虚拟节点，也不参与排序（直接画成直线），
+# 否则深层的有环图会产生数百万个虚拟节点
+MAX_DUMMY_SPAN = 16
+
+
+def _csr(n, sources, targets):
+    """按源节点分组的邻接数组：节点 u 的后继为 adjacency[indptr[u]:indptr[u + 1]]"""
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order]
+
+
+def _break_cycles(n, sources, targets):
+    """把回边反向，返回无环的 (sources, targets)
+
+    深度优先搜索的后序编号中，无环图的每条边都满足 post[u] > post[v]，不满足的就是回边。
+    搜索优先从没有入边的节点出发，使原本的根节点留在最上层。
+    """
+    indptr, adjacency = _csr(n, sources, targets)
+    ptr = indptr.tolist()
+    adj = adjacency.tolist()
+    in_degree = np.bincount(targets, minlength=n)
+    starts = np.argsort(in_degree > 0, kind='stable').tolist()
+
+    post = np.empty(n, dtype=np.int64)
+    visited = bytearray(n)
+    counter = 0
+    for root in starts:
+        if visited[root]:
+            continue
+        visited[root] = 1
+        stack = [[root, ptr[root]]]
+        while stack:
+            frame = stack[-1]
+            node, i = frame
+            if i < ptr[node + 1]:
+                frame[1] = i + 1
+                child = adj[i]
+                if not visited[child]:
+                    visited[child] = 1
+                    stack.append([child, ptr[child]])
+            else:
+                stack.pop()
+                post[node] = counter
+                counter += 1
+
+    back = post[sources] < post[targets]
+    return np.where(back, targets, sources), np.where(back, sources, targets)
+
+
+def _longest_path_layers(n, sources, targets):
+    """每个节点的层号 = 从根节点出发的最长路径长度"""
+    indptr, adjacency = _csr(n, sources, targets)
+    remaining = np.bincount(targets, minlength=n)
+    layers = np.zeros(n, dtype=np.int64)
+    frontier = np.flatnonzero(remaining == 0)
+    depth = 0
+    while len(frontier):
+        layers[frontier] = depth
+        counts = indptr[frontier + 1] - indptr[frontier]
+        total = int(counts.sum())
+        if not total:
+            break
+        offsets = np.repeat(indptr[frontier] - np.cumsum(counts) + counts, counts)
+        touched, hits = np.unique(adjacency[offsets + np.arange(total)], return_counts=True)
+        remaining[touched] -= hits
+        frontier = touched[remaining[touched] == 0]
+        depth += 1
+    return layers
+
+
+def _split_long_edges(n, sources, targets, layers):
+    """把跨越多层的边拆成经过虚拟节点的相邻层短边，返回 (节点总数, 层号, sources, targets)"""
+    spans = layers[targets] - layers[sources]
+    kept = spans <= MAX_DUMMY_SPAN
+    sources, targets, spans = sources[kept], targets[kept], spans[kept]
+    long_edges = spans > 1
+    short_sources, short_targets = sources[~long_edges], targets[~long_edges]
+    long_sources, long_targets = sources[long_edges], targets[long_edges]
+    dummy_counts = spans[long_edges] - 1
+    total = int(dummy_counts.sum())
+    if not total:
+        return n, layers, short_sources, short_targets
+
+    edge_of_dummy = np.repeat(np.arange(len(long_sources)), dummy_counts)
+    first_dummy = np.cumsum(dummy_counts) - dummy_counts
+    step = np.arange(total) - first_dummy[edge_of_dummy]
+    dummy_ids = n + np.arange(total)
+    dummy_layers = layers[long_sources][edge_of_dummy] + step + 1
+
+    # 每条长边：源 → 第一个虚拟节点 → ... → 最后一个虚拟节点 → 目标
+    previous = np.where(step == 0, long_sources[edge_of_dummy], dummy_ids - 1)
+    last_dummy = n + first_dummy + dummy_counts - 1
+    return (n + total,
+            np.concatenate([layers, dummy_layers]),
+            np.concatenate([short_sources, previous, last_dummy]),
+            np.concatenate([short_targets, dummy_ids, long_targets]))
+
+
+class _Layering:
+    """按层连续编号的节点和相邻层之间的边，供排序和坐标计算使用"""
+
+    def __init__(self, layers, sources, targets):
+        # 重新编号，使同一层的节点编号连续
+        order = np.argsort(layers, kind='stable')
+        renumber = np.empty(len(layers), dtype=np.int64)
+        renumber[order] = np.arange(len(layers))
+        self.original = order
+        self.layers = layers[order]
+        self.layer_count = int(self.layers[-1]) + 1 if len(layers) else 0
+        self.bounds = np.searchsorted(self.layers, np.arange(self.layer_count + 1))
+
+        sources, targets = renumber[sources], renumber[targets]
+        # 向下扫描按目标节点所在层分块，向上扫描按源节点所在层分块
+        by_target = np.argsort(targets, kind='stable')
+        self.down = (sources[by_target], targets[by_target],
+                     np.searchsorted(targets[by_target], self.bounds))
+        by_source = np.argsort(sources, kind='stable')
+        self.up = (sources[by_source], targets[by_source],
+                   np.searchsorted(sources[by_source], self.bounds))
+
+    def neighbor_blocks(self, layer, downward):
+        """layer 层节点在上一层（downward）或下一层的邻居：(本层节点编号, 邻居编号)"""
+        if downward:
+            sources, targets, bounds = self.down
+            block = slice(bounds[layer], bounds[layer + 1])
+            return targets[block], sources[block]
+        sources, targets, bounds = self.up
+        block = slice(bounds[layer], bounds[layer + 1])
+        return sources[block], targets[block]
+
+    def sweeps(self, count):
+        """交替的向下、向上扫描：产出 (层号, 是否向下)"""
+        for sweep in range(count):
+            if sweep % 2 == 0:
+                for layer in range(1, self.layer_count):
+                    yield layer, True
+            else:
+                for layer in range(self.layer_count - 2, -1, -1):
+                    yield layer, False
+
+    def _barycenters(self, layer, downward, values, fallback):
+        start, end = self.bounds[layer], self.bounds[layer + 1]
+        members, neighbors = self.neighbor_blocks(layer, downward)
+        local = members - start
+        weights = np.bincount(local, minlength=end - start)
+        sums = np.bincount(local, weights=values[neighbors], minlength=end - start)
+        return np.where(weights > 0, sums / np.maximum(weights, 1), fallback[start:end])
+
+    def reduce_crossings(self, count):
+        """重心法排序，返回每个节点在本层中的位置"""
+        rank = np.empty(len(self.layers), dtype=np.float64)
+        for layer in range(self.layer_count):
+            start, end = self.bounds[layer], self.bounds[layer + 1]
+            rank[start:end] = np.arange(end - start)
+        for layer, downward in self.sweeps(count):
+            start = self.bounds[layer]
+            barycenters = self._barycenters(layer, downward, rank, rank)
+            rank[start + np.argsort(barycenters, kind='stable')] = np.arange(len(barycenters))
+        return rank
+
+    def assign_coordinates(self, rank, node_sep, count):
+        """节点向邻居的平均横坐标靠拢，同时保持层内顺序和最小间距"""
+        x = rank * node_sep
+        for layer in range(self.layer_count):
+            start, end = self.bounds[layer], self.bounds[layer + 1]
+            x[start:end] -= (end - start - 1) * node_sep / 2
+        # 层内顺序在这一步不再改变，先一次性排好
+        in_layer_order = np.lexsort((rank, self.layers))
+        for layer, downward in self.sweeps(count):
+            start, end = self.bounds[layer], self.bounds[layer + 1]
+            desired = self._barycenters(layer, downward, x, x)
+            in_order = in_layer_order[start:end] - start
+            offsets = np.arange(end - start) * node_sep
+            gaps = desired[in_order] - offsets
+            # 从左往右推和从右往左推得到两个满足间距的解，取平均仍然满足
+            pushed_right = np.maximum.accumulate(gaps)
+            pushed_left = np.minimum.accumulate(gaps[::-1])[::-1]
+            x[start + in_order] = (pushed_right + pushed_left) / 2 + offsets
+        return x
+
+
+def layered_layout(G, rank_sep=DEFAULT_RANK_SEP, node_sep=DEFAULT_NODE_SEP,
+                   crossing_sweeps=CROSSING_SWEEPS, coordinate_sweeps=COORDINATE_SWEEPS):
+    """返回 {节点: (x, y)}，根节点在最上层（y 最大），与 dot 的方向一致"""
+    nodes = list(G.nodes())
+    n = len(nodes)
+    if not n:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges() if u != v],
+                     dtype=np.int64).reshape(-1, 2)
+    sources, targets = _break_cycles(n, edges[:, 0], edges[:, 1])
+
+    layers = _longest_path_layers(n, sources, targets)
+    total, layers, sources, targets = _split_long_edges(n, sources, targets, layers)
+    layering = _Layering(layers, sources, targets)
+    rank = layering.reduce_crossings(crossing_sweeps)
+    x = layering.assign_coordinates(rank, node_sep, coordinate_sweeps)
+    y = (layering.layer_count - 1 - layering.layers) * rank_sep
+
+    real = np.flatnonzero(layering.original < n)
+    return {nodes[layering.original[i]]: (float(x[i]), float(y[i])) for i in real}
@@ -0,0 +1,131 @@
+"""按图的拓扑结构缓存布局结果
+
+只改变节点大小、根节点数量或标签时图的节点和边不变，可以直接复用之前的布局，
+不必再启动 dot 进程。缓存以节点和边的结构哈希（见 topology_hash）为键，内存中按 LRU 淘汰，
+也可以选择同时保存到配置文件旁边的 JSON 文件中，下次启动时继续使用。
+GraphEngine.topology_key 随增删边增量维护同一个键，界面中每次编辑后不必重新哈希整张图。
+
+每次 put 都重写整个缓存文件（最多 max_entries 个布局）在大图上要几百毫秒。界面中用
+autosave=False，put 只标记改动，由防抖定时器取 snapshot() 交给后台线程 write_layout_cache。
+"""
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from graph_store import GraphView
+from topology_hash import TopologyHash, graph_key
+
+DEFAULT_LAYOUT_CACHE_FILE = "gene_graph_layout_cache.json"
+
+
+def topology_key(G, prog='dot'):
+    """节点和边的结构哈希（与插入顺序无关），附带布局程序名；GraphView 和 nx.DiGraph 得到同样的键"""
+    if isinstance(G, GraphView):
+        return TopologyHash(G.store).key(prog)
+    names = [str(node) for node in G.nodes()]
+    index = {node: i for i, node in enumerate(G.nodes())}
+    edges = [(index[u], index[v]) for u, v in G.edges()]
+    return graph_key(names, [u for u, _ in edges], [v for _, v in edges], prog)
+
+
+def write_layout_cache(entries, filename):
+    """把 {键: 布局} 写入缓存文件；先写临时文件再替换，写到一半中断也不会留下损坏的缓存
+
+    临时文件名每次不同，界面线程和后台保存线程同时写同一个缓存文件也不会互相覆盖临时文件。
+    """
+    fd, temp_file = tempfile.mkstemp(prefix=os.path.basename(filename) + '.',
+                                     suffix='.tmp', dir=os.path.dirname(filename) or '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, default=float)  # 坐标可能是 NumPy 标量
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, filename)
+    except BaseException:
+        os.unlink(temp_file)
+        raise
+
+
+class LayoutCache:
+    def __init__(self, max_entries=16, cache_file=None, autosave=True):
+        self.max_entries = max_entries
+        self.cache_file = cache_file  # 为 None 时只缓存在内存中
+        self.autosave = autosave  # 为 False 时 put 之后由调用方择机 save() 或 snapshot()
+        self.dirty = False  # 内存中有还没写入缓存文件的改动
+        self._entries = OrderedDict()
+        self._loaded_file = None
+        self.hits = 0
+        self.misses = 0
+
+    def set_cache_file(self, cache_file):
+        self.cache_file = cache_file
+        self._load()
+        self.dirty = bool(cache_file)  # 之前只在内存中的布局也要写进新的缓存文件
+
+    def get(self, key):
+        self._load()
+        pos = self._entries.get(key)
+        if pos is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return pos
+
+    def put(self, key, pos):
+        """放入一个布局；不复制 pos（大图上复制一次就是 O(V)），放入之后调用方不能再修改它"""
+        self._entries[key] = pos
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._changed()
+
+    def clear(self):
+        self._entries.clear()
+        self._changed()
+
+    def _changed(self):
+        self.dirty = True
+        if self.autosave:
+            self.save()
+
+    def _load(self):
+        """第一次访问某个缓存文件时把其中的布局并入内存缓存"""
+        if not self.cache_file or self._loaded_file == self.cache_file:
+            return
+        self._loaded_file = self.cache_file
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f'读取布局缓存失败: {e}')
+            return
+        for key, pos in stored.items():
+            if key not in self._entries:
+                self._entries[key] = {node: tuple(xy) for node, xy in pos.items()}
+                self._entries.move_to_end(key, last=False)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def snapshot(self):
+        """有未保存的改动时返回 (缓存文件, 各布局的浅拷贝) 并清除改动标记，否则返回 None
+
+        put 每次都放入新的布局字典，之后不再修改，浅拷贝就可以交给其他线程写入。
+        """
+        if not self.cache_file or not self.dirty:
+            return None
+        self.dirty = False
+        return self.cache_file, OrderedDict(self._entries)
+
+    def save(self):
+        """同步写入缓存文件"""
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return
+        try:
+            write_layout_cache(snapshot[1], snapshot[0])
+        except OSError as e:
+            print(f'保存布局缓存失败: {e}')
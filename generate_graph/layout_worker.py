@@ -0,0 +1,69 @@
+"""在后台线程中计算图布局，避免 graphviz 的 dot 进程阻塞 Qt 界面
+
+界面线程每次请求布局都会分配一个递增的请求编号；工作线程只计算最新的请求，
+排队中的旧请求直接跳过，已经算完但过期的结果由界面线程丢弃。
+dot 不可用（没有安装 pygraphviz/Graphviz）或运行失败时改用内置的分层布局。
+"""
+import time
+
+import networkx as nx
+from networkx.drawing.nx_agraph import graphviz_layout
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from graph_store import GraphView
+from layered_layout import layered_layout
+from profiling import profiler
+
+
+def dot_layout(graph):
+    """graph 为 GraphView 时在这里（工作线程中）才转换成 graphviz 需要的 nx.DiGraph"""
+    if isinstance(graph, GraphView):
+        graph = graph.to_networkx()
+    return graphviz_layout(graph, prog='dot')
+
+
+# 布局方式 -> 计算函数
+LAYOUT_ENGINES = {
+    'dot': dot_layout,
+    'layered': layered_layout,
+}
+
+
+def topology_snapshot(G):
+    """只复制节点和边（不含属性），作为交给工作线程的不可变快照"""
+    if isinstance(G, GraphView):
+        return G.topology_copy()  # 复制 store 的数组，不在界面线程中建 nx.DiGraph
+    snapshot = nx.DiGraph()
+    snapshot.add_nodes_from(G.nodes())
+    snapshot.add_edges_from(G.edges())
+    return snapshot
+
+
+class LayoutWorker(QObject):
+    finished = pyqtSignal(int, object, str)  # 请求编号, {节点: (x, y)}, 实际使用的布局方式
+    failed = pyqtSignal(int, str)  # 请求编号, 错误信息
+
+    def __init__(self):
+        super().__init__()
+        self.latest_request = 0  # 由界面线程更新，用来跳过过期的请求
+
+    @pyqtSlot(int, object, str)
+    def compute(self, request_id, graph, engine):
+        if request_id != self.latest_request:
+            return
+        start = time.perf_counter()
+        try:
+            pos = LAYOUT_ENGINES[engine](graph)
+        except Exception as e:
+            if engine == 'layered':
+                self.failed.emit(request_id, str(e))
+                return
+            print(f'{engine} 布局失败，改用内置分层布局: {e}')
+            try:
+                pos = layered_layout(graph)
+            except Exception as e:
+                self.failed.emit(request_id, str(e))
+                return
+            engine = 'layered'
+        profiler.record('layout', time.perf_counter() - start)
+        self.finished.emit(request_id, pos, engine)
@@ -0,0 +1,145 @@
+"""节点列表和边列表的 Qt 模型：行的显示文字在视图需要时才生成
+
+模型只保存排好序的节点名称和 (源节点, 目标节点)，显示文字在 data() 中按需格式化，
+视图每次只请求可见的几十行。逐条增删边后按二分查找插入或删除单行并发出相应信号；
+图被清空、整体替换或批量修改（engine.reset_version 变化）后整体重建。
+节点列表可以按搜索框中的文字筛选，筛选结果按匹配程度排序（见 name_index）。
+"""
+from bisect import bisect_left
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from graph_engine import format_quantity
+
+# 自上次同步以来逐行改动超过这个数量时，整体重建比逐行发信号快
+RESET_ROWS = 1000
+
+
+class NodeListModel(QAbstractListModel):
+    """按名称排序的节点列表，Qt.UserRole 为节点名称"""
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self._nodes = []
+        self._count = 0  # 已经加入列表的节点数，store.names 在清空之前只会在末尾追加
+        self._reset_version = None
+        self._filter = ''  # 非空时只显示 engine.search_nodes(self._filter) 的结果
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._nodes)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = self._nodes[index.row()]
+        if role == Qt.UserRole:
+            return node
+        if role != Qt.DisplayRole:
+            return None
+
+        engine = self.engine
+        quantity = engine.quantity_of(node)
+        if quantity is None:
+            return f'● {node} (数量: 未计算)'
+        note = '，单独设置' if node in engine.root_quantities and not engine.store.in_degree(node) else ''
+        return f'● {node} (数量: {format_quantity(quantity)}{note})'
+
+    def set_filter(self, text):
+        """只显示名称匹配 text 的节点，空字符串时显示全部"""
+        self._filter = text
+        self._reset_version = None
+        self.refresh()
+
+    def refresh(self):
+        """加入新出现的节点，并通知视图节点数量可能已经变化"""
+        engine = self.engine
+        names = engine.store.names
+        if self._filter:
+            # 筛选结果不大，每次都重新查找，新节点也按匹配程度排在相应位置
+            self.beginResetModel()
+            self._nodes = engine.search_nodes(self._filter)
+            self.endResetModel()
+            return
+        if self._reset_version != engine.reset_version or len(names) < self._count or \
+                len(names) - self._count > RESET_ROWS:
+            self.beginResetModel()
+            self._nodes = engine.sorted_nodes()
+            self._count = len(names)
+            self._reset_version = engine.reset_version
+            self.endResetModel()
+            return
+
+        for node in names[self._count:]:
+            row = bisect_left(self._nodes, node)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._nodes.insert(row, node)
+            self.endInsertRows()
+        self._count = len(names)
+        if self._nodes:
+            self.dataChanged.emit(self.index(0), self.index(len(self._nodes) - 1), [Qt.DisplayRole])
+
+
+class EdgeListModel(QAbstractListModel):
+    """按 (源节点, 目标节点) 排序的边列表，Qt.UserRole 为 (源节点, 目标节点)"""
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self._edges = []
+        self._pending = []  # 上次同步以来逐条增删的边 [(操作, (源节点, 目标节点)), ...]
+        self._reset_version = None
+        engine.edge_observers.append(self._on_edge_changed)
+
+    def _on_edge_changed(self, op, source, target):
+        if len(self._pending) >= RESET_ROWS:
+            self._reset_version = None  # 改动太多，下次同步时整体重建
+            self._pending.clear()
+        if self._reset_version is not None:
+            self._pending.append((op, (source, target)))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._edges)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        edge = self._edges[index.row()]
+        if role == Qt.UserRole:
+            return edge
+        if role != Qt.DisplayRole:
+            return None
+
+        source, target = edge
+        quantities = self.engine.store.edge_quantities(source, target)
+        if quantities is None:
+            return f'{source} → {target}'  # 已删除，等待下次同步
+        return f'{source} [{quantities[0]}] → {target} [{quantities[1]}]'
+
+    def refresh(self):
+        """把逐条增删的边同步到列表；图被整体替换后重建"""
+        engine = self.engine
+        if self._reset_version != engine.reset_version:
+            self.beginResetModel()
+            self._edges = sorted((source, target) for source, target, _, _ in engine.store.edges())
+            self._pending.clear()
+            self._reset_version = engine.reset_version
+            self.endResetModel()
+            return
+
+        edges = self._edges
+        for op, edge in self._pending:
+            row = bisect_left(edges, edge)
+            present = row < len(edges) and edges[row] == edge
+            if op == 'add' and present:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole])  # 数量关系被覆盖
+            elif op == 'add':
+                self.beginInsertRows(QModelIndex(), row, row)
+                edges.insert(row, edge)
+                self.endInsertRows()
+            elif present:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del edges[row]
+                self.endRemoveRows()
+        self._pending.clear()
@@ -0,0 +1,101 @@
+"""节点名称的查找索引：按名称排序的节点编号，支持前缀、包含和模糊查找
+
+GraphStore 已经把节点名称编号为整数（names[编号] 为名称），这里再按名称排一次序：
+
+- 前缀：有序数组上二分，以前缀开头的名称是连续的一段，O(log n + 结果数)；
+- 包含：排好序的名称用换行连接成一个字符串，str.find 在 C 层逐段查找，
+  几十万个中文名称也只要几毫秒；
+- 模糊：名称中按顺序出现输入的每个字符（字母不区分大小写），如“红矿”匹配“红宝石矿”，
+  同样用一个正则在连接后的字符串上查找。
+
+结果按 前缀 > 包含 > 模糊 分档，同一档内按名称排序。store.names 在清空之前只会在末尾追加，
+新名称用二分插入；图被整体替换后（engine.reset_version 变化）重新排序。
+二进制快照中保存了排好的顺序，加载后直接使用，不必重新排序。
+"""
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+# 默认最多返回的结果数
+SEARCH_LIMIT = 1000
+# 一次新增的名称超过这个数时整体重新排序，比逐个插入快
+RESORT_NAMES = 1000
+# 比任何节点名称中的字符都大，用作前缀查找的上界
+_MAX_CHAR = '\U0010ffff'
+
+
+class NameIndex:
+    def __init__(self):
+        self.sorted_names = []  # 按名称排序
+        self.sorted_ids = []  # 与 sorted_names 对齐的节点编号
+        self._count = 0  # 已经加入索引的名称数
+        self._reset_version = None
+        self._joined = None  # (用换行连接的 sorted_names, 每个名称的起始位置)，查找包含和模糊匹配时生成
+
+    def set_order(self, names, order, reset_version):
+        """直接使用已经排好的编号顺序（二进制快照中保存的），长度不符时忽略"""
+        if len(order) != len(names):
+            return
+        self.sorted_ids = order.tolist() if hasattr(order, 'tolist') else list(order)
+        self.sorted_names = [names[i] for i in self.sorted_ids]
+        self._count = len(names)
+        self._reset_version = reset_version
+        self._joined = None
+
+    def refresh(self, names, reset_version):
+        """与 store.names 同步：加入新出现的名称，图被整体替换后重新排序"""
+        if self._reset_version == reset_version and self._count == len(names):
+            return
+        if self._reset_version != reset_version or len(names) < self._count or \
+                len(names) - self._count > RESORT_NAMES:
+            self.sorted_ids = sorted(range(len(names)), key=names.__getitem__)
+            self.sorted_names = [names[i] for i in self.sorted_ids]
+        else:
+            for node in range(self._count, len(names)):
+                row = bisect_left(self.sorted_names, names[node])
+                self.sorted_names.insert(row, names[node])
+                self.sorted_ids.insert(row, node)
+        self._count = len(names)
+        self._reset_version = reset_version
+        self._joined = None
+
+    def _text(self):
+        if self._joined is None:
+            starts = [0]
+            starts += accumulate(len(name) + 1 for name in self.sorted_names)
+            self._joined = ('\n'.join(self.sorted_names), starts[:-1])
+        return self._joined
+
+    def prefix_range(self, prefix):
+        """以 prefix 开头的名称在 sorted_names 中的范围 [low, high)"""
+        names = self.sorted_names
+        return bisect_left(names, prefix), bisect_left(names, prefix + _MAX_CHAR)
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """返回匹配 text 的节点编号：以 text 开头的在前，其次是包含 text 的，最后是按顺序含有 text 各字符的"""
+        if not text or '\n' in text:
+            return []
+        low, high = self.prefix_range(text)
+        rows = list(range(low, min(high, low + limit)))
+        if len(rows) < limit:
+            joined, starts = self._text()
+            count = len(starts)
+            position = joined.find(text)
+            while position >= 0 and len(rows) < limit:
+                row = bisect_right(starts, position) - 1
+                if not low <= row < high:
+                    rows.append(row)
+                position = joined.find(text, starts[row + 1]) if row + 1 < count else -1
+
+            if len(rows) < limit and len(text) > 1:
+                found = set(rows)
+                pattern = re.compile('^[^\n]*?' + '[^\n]*?'.join(map(re.escape, text)),
+                                     re.MULTILINE | re.IGNORECASE)
+                for match in pattern.finditer(joined):
+                    row = bisect_right(starts, match.start()) - 1
+                    if row not in found and not low <= row < high:
+                        rows.append(row)
+                        if len(rows) >= limit:
+                            break
+        ids = self.sorted_ids
+        return [ids[row] for row in rows]
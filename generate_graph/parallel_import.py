@@ -0,0 +1,125 @@
+"""用进程池并行导入多个关系文件
+
+每个子进程流式解析一个文件，把结果压缩成节点名称表 + 整数数组（array 模块）传回主进程，
+主进程按文件名排序后依次合并，因此结果与文件完成的先后顺序无关。
+
+子进程用 spawn 方式启动：界面进程里已经有布局、保存等后台线程，fork 只复制当前线程，
+其他线程持有的锁（Qt、matplotlib、日志等）在子进程中永远不会释放，可能卡死。
+"""
+import glob
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from graph_engine import read_relation_blocks
+
+# 重复边（同一对源/目标节点）数量关系不一致时的处理方式：
+# last 后导入的覆盖先导入的（与逐个导入一致），first 保留先导入的，error 保留先导入的并记录错误
+CONFLICT_RULES = ('last', 'first', 'error')
+
+
+def expand_relation_paths(patterns):
+    """把目录、通配符和文件名展开成排好序、去重的文件列表；目录取其中的 *.txt"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(glob.glob(os.path.join(pattern, '*.txt')))
+        elif glob.has_magic(pattern):
+            paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        else:
+            paths.add(pattern)
+    return sorted(paths)
+
+
+def parse_relation_file(filename):
+    """子进程中解析一个文件，返回 (文件名, 节点名称表, 边数组, 成功行数, 错误列表)
+
+    边数组为 array('q')，每 4 个数一条边：源节点编号、源数量、目标节点编号、目标数量。
+    读取或解析中途出错时整个文件都不导入：返回空的名称表和边数组，成功行数为 0。
+    """
+    names = []
+    index = {}
+    packed = array('q')
+    success_count = 0
+    errors = []
+    try:
+        for edges, chunk_success, chunk_errors, _, _ in read_relation_blocks(filename):
+            for source, source_qty, target, target_qty in edges:
+                source_id = index.get(source)
+                if source_id is None:
+                    source_id = index[source] = len(names)
+                    names.append(source)
+                target_id = index.get(target)
+                if target_id is None:
+                    target_id = index[target] = len(names)
+                    names.append(target)
+                packed.extend((source_id, source_qty, target_id, target_qty))
+            success_count += chunk_success
+            errors.extend(chunk_errors)
+    except (OSError, UnicodeDecodeError, OverflowError) as e:
+        return filename, [], array('q'), 0, errors + [e]
+    return filename, names, packed, success_count, errors
+
+
+def _unpack_edges(names, packed):
+    for i in range(0, len(packed), 4):
+        yield names[packed[i]], packed[i + 1], names[packed[i + 2]], packed[i + 3]
+
+
+def merge_parsed_file(engine, names, packed, on_conflict='last'):
+    """把一个文件的解析结果合并进图中，返回冲突错误列表"""
+    if on_conflict not in CONFLICT_RULES:
+        raise ValueError(f'未知的冲突处理方式: {on_conflict}')
+
+    store = engine.store
+    # 文件内部的重复边按逐行导入的规则处理：后出现的覆盖先出现的
+    file_edges = {}
+    for source, source_qty, target, target_qty in _unpack_edges(names, packed):
+        file_edges[(source, target)] = (source_qty, target_qty)
+
+    conflicts = []
+    edges = []
+    for (source, target), (source_qty, target_qty) in file_edges.items():
+        existing = store.edge_quantities(source, target) if on_conflict != 'last' else None
+        if existing is not None:
+            if existing != (source_qty, target_qty):
+                if on_conflict == 'error':
+                    conflicts.append(ValueError(
+                        f'边 {source} → {target} 的数量关系 {source_qty}:{target_qty} '
+                        f'与已有的 {existing[0]}:{existing[1]} 冲突，已保留原有关系'))
+                continue
+        edges.append((source, source_qty, target, target_qty))
+
+    engine.add_edges(edges)
+    return conflicts
+
+
+def _parse_all(paths, max_workers):
+    """按 paths 的顺序逐个产出解析结果；子进程并行解析，先完成的结果会在主进程中排队"""
+    if max_workers == 1:
+        yield from map(parse_relation_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        yield from executor.map(parse_relation_file, paths)
+
+
+def import_files(engine, paths, max_workers=None, on_conflict='last', progress=None):
+    """并行解析多个文件并按文件名顺序合并进 engine
+
+    返回 [(文件名, 成功行数, [错误, ...]), ...]；progress(已完成文件数, 文件总数) 每合并一个文件后调用。
+    """
+    paths = sorted(set(paths))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(paths)))
+
+    results = []
+    for done, (path, names, packed, success_count, errors) in enumerate(
+            _parse_all(paths, max_workers), 1):
+        errors.extend(merge_parsed_file(engine, names, packed, on_conflict))
+        results.append((path, success_count, errors))
+        if progress is not None:
+            progress(done, len(paths))
+    return results
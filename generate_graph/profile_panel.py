@@ -0,0 +1,128 @@
+"""性能面板：各环节的计时和计数、cProfile 开关和函数级耗时，可导出为 JSON
+
+数据来自 profiling.profiler，面板打开期间每秒刷新一次（数据有变化时）。
+"""
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import (QCheckBox, QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel,
+                             QMessageBox, QPlainTextEdit, QPushButton, QTableWidget, QTableWidgetItem,
+                             QVBoxLayout)
+
+from profiling import COUNTERS, STAGES, profiler
+
+REFRESH_MS = 1000
+STAGE_COLUMNS = ['环节', '次数', '总计 (ms)', '平均 (ms)', '最近 (ms)', '最长 (ms)']
+
+
+class ProfilePanel(QDialog):
+    def __init__(self, parent=None, context=None):
+        """context() 返回导出 JSON 时附加的信息（图的规模、布局缓存等）"""
+        super().__init__(parent)
+        self.context = context
+        self._version = None
+        self.setWindowTitle('性能')
+        self.resize(720, 560)
+
+        layout = QVBoxLayout(self)
+
+        self.stage_table = QTableWidget(0, len(STAGE_COLUMNS))
+        self.stage_table.setHorizontalHeaderLabels(STAGE_COLUMNS)
+        self.stage_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.stage_table.verticalHeader().setVisible(False)
+        self.stage_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.stage_table)
+
+        self.counters_label = QLabel()
+        self.counters_label.setWordWrap(True)
+        layout.addWidget(self.counters_label)
+
+        self.capture_check = QCheckBox('记录 cProfile（界面线程的函数级耗时，开销较大）')
+        self.capture_check.setChecked(profiler.capturing)
+        self.capture_check.toggled.connect(self.toggle_capture)
+        layout.addWidget(self.capture_check)
+
+        self.functions_text = QPlainTextEdit()
+        self.functions_text.setReadOnly(True)
+        self.functions_text.setFont(QFont('Consolas', 9))
+        layout.addWidget(self.functions_text)
+
+        buttons_layout = QHBoxLayout()
+        reset_btn = QPushButton('重置')
+        reset_btn.clicked.connect(self.reset)
+        buttons_layout.addWidget(reset_btn)
+
+        export_btn = QPushButton('导出 JSON...')
+        export_btn.clicked.connect(self.export_json)
+        buttons_layout.addWidget(export_btn)
+
+        buttons_layout.addStretch()
+        close_btn = QPushButton('关闭')
+        close_btn.clicked.connect(self.close)
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.capture_check.setChecked(profiler.capturing)
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        if self._version == profiler.version:
+            return
+        self._version = profiler.version
+        data = profiler.to_dict()
+
+        stages = data['stages']
+        self.stage_table.setRowCount(len(stages))
+        for row, (name, stage) in enumerate(stages.items()):
+            values = [STAGES.get(name, name), stage['count'], stage['total_ms'], stage['mean_ms'],
+                      stage['last_ms'], stage['max_ms']]
+            for column, value in enumerate(values):
+                text = f'{value:.1f}' if isinstance(value, float) else str(value)
+                self.stage_table.setItem(row, column, QTableWidgetItem(text))
+
+        counters = data['counters']
+        self.counters_label.setText('计数: ' + ('，'.join(
+            f'{COUNTERS.get(name, name)} {value}' for name, value in counters.items()) or '无'))
+
+        functions = data.get('cprofile')
+        if functions:
+            lines = [f'{"累计 (ms)":>12} {"自身 (ms)":>12} {"调用次数":>10}  函数']
+            lines += [f'{entry["cumulative_ms"]:>12.1f} {entry["total_ms"]:>12.1f} {entry["calls"]:>10}  '
+                      f'{entry["function"]}' for entry in functions]
+            self.functions_text.setPlainText('\n'.join(lines))
+        elif profiler.capturing:
+            self.functions_text.setPlainText('正在记录，取消勾选后显示结果')
+        else:
+            self.functions_text.setPlainText('勾选上面的选项开始记录')
+
+    def toggle_capture(self, checked):
+        if checked:
+            profiler.start_capture()
+        else:
+            profiler.stop_capture()
+        self._version = None
+        self.refresh()
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+    def export_json(self):
+        filename, _ = QFileDialog.getSaveFileName(self, '导出性能数据', 'profile.json',
+                                                  'JSON Files (*.json);;All Files (*)')
+        if not filename:
+            return
+        try:
+            profiler.dump(filename, **(self.context() if self.context is not None else {}))
+        except Exception as e:
+            QMessageBox.critical(self, '导出失败', f'导出性能数据失败: {e}')
@@ -0,0 +1,213 @@
+"""流水线各环节的计时和计数，可选用 cProfile 记录函数级耗时
+
+解析、数量计算、布局、绘制、列表刷新和保存等环节在固定位置计时：
+
+    with profiler.stage('layout'):
+        pos = layered_layout(graph)
+
+每个环节累计次数、总耗时、最近一次和最长一次的耗时；另有按名称累加的计数器（加入的边数、
+增量重算的节点数）。计时只是两次 perf_counter，常开也没有可察觉的开销；
+后台线程（布局、自动保存）中的计时同样记录，用锁保护。
+
+cProfile 开销较大，只在需要时打开：界面中的“性能”面板，或者启动前设置环境变量
+
+    GENE_GRAPH_PROFILE=1 python gene_graph.py              # 启动时开始记录
+    GENE_GRAPH_PROFILE=profile.json python gene_graph.py   # 另外在退出时把统计写成 JSON
+
+cProfile 只记录开启它的线程（界面线程）中的函数调用，后台线程的耗时见对应环节的计时。
+"""
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+PROFILE_ENV = 'GENE_GRAPH_PROFILE'
+# JSON 和性能面板中列出的 cProfile 函数数
+TOP_FUNCTIONS = 40
+
+# 环节名称 -> 显示名称，按流水线中的先后排列；环节之间可以嵌套（如导入包含解析）
+STAGES = {
+    'import': '导入',
+    'parse': '解析',
+    'quantities': '完整计算',
+    'quantities_incremental': '增量计算',
+    'layout': '布局',
+    'layout_incremental': '增量布局',
+    'render': '绘制',
+    'draw': '画布刷新',
+    'lists': '列表',
+    'save': '保存',
+    'load': '加载',
+}
+
+COUNTERS = {
+    'edges_added': '加入的边',
+    'nodes_recomputed': '增量重算的节点',
+}
+
+
+def format_ms(seconds):
+    milliseconds = seconds * 1000
+    return f'{milliseconds:.0f}ms' if milliseconds >= 10 else f'{milliseconds:.1f}ms'
+
+
+class Profiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}  # {环节: [次数, 总耗时, 最近一次, 最长一次]}，单位为秒
+        self.counters = {}
+        self.version = 0  # 每次记录后加 1，界面据此判断是否需要刷新显示
+        self._profile = None  # 正在记录的 cProfile.Profile
+        self._stats = None  # 已经停止的各次记录合并后的 pstats.Stats
+
+    def reset(self):
+        """清空计时、计数和 cProfile 记录（正在进行的记录重新开始）"""
+        capturing = self.capturing
+        if capturing:
+            self._profile.disable()
+            self._profile = None
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+            self._stats = None
+            self.version += 1
+        if capturing:
+            self.start_capture()
+
+    def record(self, name, seconds):
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                self.stages[name] = [1, seconds, seconds, seconds]
+            else:
+                stage[0] += 1
+                stage[1] += seconds
+                stage[2] = seconds
+                stage[3] = max(stage[3], seconds)
+            self.version += 1
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            self.version += 1
+
+    # ---- cProfile ----
+
+    @property
+    def capturing(self):
+        return self._profile is not None
+
+    def start_capture(self):
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop_capture(self):
+        """停止记录，本次记录并入之前的结果"""
+        if self._profile is None:
+            return
+        self._profile.disable()
+        if self._stats is None:
+            self._stats = pstats.Stats(self._profile)
+        else:
+            self._stats.add(self._profile)
+        self._profile = None
+        self.version += 1
+
+    def top_functions(self, limit=TOP_FUNCTIONS):
+        """已停止的 cProfile 记录中累计耗时最长的函数，没有记录时为空列表"""
+        if self._stats is None:
+            return []
+        entries = sorted(self._stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [{
+            'function': f'{function} ({os.path.basename(filename)}:{line})',
+            'calls': calls,
+            'total_ms': round(total * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        } for (filename, line, function), (_, calls, total, cumulative, _) in entries[:limit]]
+
+    # ---- 输出 ----
+
+    def summary(self):
+        """状态栏中的一行：各环节最近一次的耗时"""
+        with self._lock:
+            stages = {name: stage[2] for name, stage in self.stages.items()}
+        return ' · '.join(f'{STAGES.get(name, name)} {format_ms(seconds)}'
+                          for name, seconds in sorted(stages.items(), key=lambda item: _stage_order(item[0])))
+
+    def to_dict(self):
+        with self._lock:
+            stages = {name: {
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'mean_ms': round(total / count * 1000, 3),
+                'last_ms': round(last * 1000, 3),
+                'max_ms': round(longest * 1000, 3),
+            } for name, (count, total, last, longest) in
+                sorted(self.stages.items(), key=lambda item: _stage_order(item[0]))}
+            counters = dict(self.counters)
+        data = {
+            'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'stages': stages,
+            'counters': counters,
+        }
+        functions = self.top_functions()
+        if functions:
+            data['cprofile'] = functions
+        return data
+
+    def dump(self, filename, **extra):
+        """把计时、计数和 cProfile 结果写成 JSON，extra 中的项（图的规模等）一并写入"""
+        data = self.to_dict()
+        data.update(extra)
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _stage_order(name):
+    return (list(STAGES).index(name), name) if name in STAGES else (len(STAGES), name)
+
+
+# 整个进程共用一个，界面、engine 和后台线程都记录到这里
+profiler = Profiler()
+
+
+def timed(name):
+    """把函数的每次调用计入 profiler 的 name 环节"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def configure_from_env():
+    """环境变量 GENE_GRAPH_PROFILE 非空（且不为 0）时开始记录 cProfile，值以 .json 结尾时退出时写出统计"""
+    value = os.environ.get(PROFILE_ENV, '')
+    if not value or value == '0':
+        return
+    profiler.start_capture()
+    if value.endswith('.json'):
+        def dump():
+            profiler.stop_capture()
+            profiler.dump(value)
+        atexit.register(dump)
@@ -0,0 +1,157 @@
+"""基于稀疏矩阵的节点数量求解
+
+把图写成比例矩阵 A（A[v, u] = 目标数量 / 源数量，对应边 u→v），节点数量满足
+
+    q = b + A q
+
+其中 b 在根节点处为根节点数量、其余为 0。无环图按拓扑层逐层做稀疏矩阵乘向量，
+有环图直接求解 (I - A) q = b；环上比例乘积不小于 1 时数量发散，会被单独标记出来。
+
+数量是根节点数量的线性函数，多组根节点数量（场景）可以作为 b 的各列一起求解，
+逐层传播时就变成稀疏矩阵乘稠密矩阵，见 scenarios。
+"""
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import eigs, spsolve
+
+# 小于这个规模的强连通分量直接用稠密矩阵求谱半径
+DENSE_EIGEN_LIMIT = 200
+
+
+class RatioSystem:
+    """由一张图构建一次的比例矩阵，可以对不同的根节点数量反复求解"""
+
+    def __init__(self, store):
+        """store 为 GraphStore，矩阵的行列下标就是节点编号"""
+        self.nodes = store.nodes()
+        n = len(self.nodes)
+
+        cols, rows, source_quantity, target_quantity = store.edge_arrays()
+        ratios = target_quantity / source_quantity
+
+        # 行为目标节点、列为源节点
+        self.matrix = sp.csr_matrix((ratios, (rows, cols)), shape=(n, n))
+        in_degree = np.bincount(rows, minlength=n)
+        self.roots = np.flatnonzero(in_degree == 0)
+
+        self.levels = self._topological_levels(in_degree, cols, rows)
+        if self.levels is not None:
+            # 按拓扑层重新排列，使每一层在矩阵中是连续的一段行
+            self.order = np.concatenate(self.levels) if self.levels else np.empty(0, dtype=np.int64)
+            permuted = self.matrix[self.order][:, self.order].tocsr()
+            bounds = np.cumsum([0] + [len(level) for level in self.levels])
+            self._level_blocks = [(bounds[k], bounds[k + 1], permuted[bounds[k]:bounds[k + 1]])
+                                  for k in range(1, len(self.levels))]
+
+    @property
+    def is_acyclic(self):
+        return self.levels is not None
+
+    def _topological_levels(self, in_degree, sources, targets):
+        """向量化的 Kahn 算法，返回每一层的节点下标；有环时返回 None"""
+        n = len(self.nodes)
+        successors = sp.csr_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)),
+                                   shape=(n, n))
+        remaining = in_degree.copy()
+        frontier = np.flatnonzero(remaining == 0)
+        levels = []
+        visited = 0
+        while len(frontier):
+            levels.append(frontier)
+            visited += len(frontier)
+            touched = successors[frontier].indices
+            if not len(touched):
+                break
+            counts = np.bincount(touched, minlength=n)
+            remaining -= counts
+            touched = np.unique(touched)
+            frontier = touched[remaining[touched] == 0]
+        if visited != n:
+            return None
+        return levels
+
+    def root_vector(self, root_quantity):
+        """root_quantity 可以是标量、按 roots 排列的数组，或每列一个场景的 (根节点数, 场景数) 矩阵"""
+        root_quantity = np.asarray(root_quantity, dtype=np.float64)
+        b = np.zeros((len(self.nodes),) + root_quantity.shape[1:])
+        b[self.roots] = root_quantity
+        return b
+
+    def solve(self, root_quantity):
+        """返回 (数量数组, 发散节点的布尔数组)，数量为 0 表示无法到达
+
+        root_quantity 是矩阵时数量数组的每一列对应一个场景；只要在任一场景中发散就标记为发散。
+        """
+        b = self.root_vector(root_quantity)
+        if self.is_acyclic:
+            return self._solve_levels(b), np.zeros(len(self.nodes), dtype=bool)
+        return self._solve_cyclic(b)
+
+    def _solve_levels(self, b):
+        q = np.zeros(b.shape)
+        if not len(self.nodes):
+            return q
+        q[:len(self.levels[0])] = b[self.levels[0]]
+        for start, end, block in self._level_blocks:
+            q[start:end] = block @ q
+        result = np.empty_like(q)
+        result[self.order] = q
+        return result
+
+    def _solve_cyclic(self, b):
+        n = len(self.nodes)
+        # 能从根节点到达的节点（沿 A^T 方向传播），其余节点数量为 0
+        reachable = self._reachable(np.flatnonzero(b.reshape(n, -1).any(axis=1)))
+        divergent = self._divergent_nodes(reachable)
+
+        q = np.zeros(b.shape)
+        q[divergent] = np.inf
+        keep = np.flatnonzero(reachable & ~divergent)
+        if len(keep):
+            # 发散节点只会影响其下游（也已被标记），剩余部分是一个良定义的线性方程组
+            sub = self.matrix[keep][:, keep]
+            system = (sp.identity(len(keep), format='csc') - sub).tocsc()
+            q[keep] = np.reshape(spsolve(system, b[keep]), b[keep].shape)
+        return q, divergent
+
+    def _divergent_nodes(self, reachable):
+        """找出环上比例乘积 >= 1 且能收到根节点输入的强连通分量，以及它们的全部下游"""
+        n = len(self.nodes)
+        count, labels = connected_components(self.matrix, directed=True, connection='strong')
+        sizes = np.bincount(labels, minlength=count)
+        self_loops = np.zeros(count, dtype=bool)
+        diagonal = self.matrix.diagonal()
+        self_loops[labels[diagonal != 0]] = True
+
+        seeds = []
+        for component in np.flatnonzero((sizes > 1) | self_loops):
+            members = np.flatnonzero(labels == component)
+            if not reachable[members].any():
+                continue
+            if _spectral_radius(self.matrix[members][:, members]) >= 1 - 1e-12:
+                seeds.append(members)
+
+        divergent = np.zeros(n, dtype=bool)
+        if seeds:
+            divergent = self._reachable(np.concatenate(seeds))
+        return divergent
+
+    def _reachable(self, start):
+        successors = self.matrix.T.tocsr()
+        seen = np.zeros(len(self.nodes), dtype=bool)
+        seen[start] = True
+        frontier = np.asarray(start, dtype=np.int64)
+        while len(frontier):
+            nxt = successors[frontier].indices
+            nxt = np.unique(nxt[~seen[nxt]])
+            seen[nxt] = True
+            frontier = nxt
+        return seen
+
+
+def _spectral_radius(block):
+    if block.shape[0] <= DENSE_EIGEN_LIMIT:
+        return float(np.max(np.abs(np.linalg.eigvals(block.toarray()))))
+    return float(np.abs(eigs(block.astype(np.float64), k=1, which='LM',
+                             return_eigenvectors=False))[0])
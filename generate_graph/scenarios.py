@@ -0,0 +1,114 @@
+"""场景表：一次求出多组根节点数量下所有节点的数量
+
+场景 CSV 第一行是表头，第一列为场景名称，其余各列为根节点名称；之后每行一个场景。
+空格子以及表头中没有列出的根节点使用当前设置的数量（单独设置的或全局的）：
+
+    场景,原料A,原料B
+    基准,100,
+    扩产,150,80
+
+数量是根节点数量的线性函数，所有场景作为比例方程右端的各列一起求解（需要 scipy），
+逐层传播时是稀疏矩阵乘稠密矩阵，几百个场景和求解一个场景的遍数相同。
+结果 CSV 每行一个节点、每列一个场景，无法到达的节点为空，数量发散的为 inf：
+
+    python scenarios.py gene_graph_config.txt scenarios.csv results.csv
+"""
+import argparse
+import csv
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+
+class ScenarioTable(NamedTuple):
+    names: list  # 场景名称
+    nodes: list  # 节点编号 -> 节点名称
+    values: np.ndarray  # (节点数, 场景数)，无法到达为 NaN，发散为 inf
+
+
+def read_scenarios(filename):
+    """读取场景 CSV，返回 [(场景名称, {根节点: 数量}), ...]"""
+    with open(filename, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return []
+
+    roots = [root.strip() for root in rows[0][1:]]
+    scenarios = []
+    for line, row in enumerate(rows[1:], start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        quantities = {}
+        for root, cell in zip(roots, row[1:]):
+            cell = cell.strip()
+            if not cell:
+                continue
+            try:
+                quantities[root] = float(cell)
+            except ValueError:
+                raise ValueError(f'第 {line} 行: {root} 的数量 {cell!r} 不是数字') from None
+        scenarios.append((row[0].strip(), quantities))
+    return scenarios
+
+
+def solve_scenarios(engine, scenarios):
+    """对 engine 的图求解 [(场景名称, {根节点: 数量}), ...] 中的所有场景，返回 ScenarioTable"""
+    system = engine.ratio_system()
+    names = engine.store.names
+    roots = system.roots.tolist()
+    root_columns = {names[root]: i for i, root in enumerate(roots)}
+
+    matrix = np.empty((len(roots), len(scenarios)))
+    matrix[:] = np.reshape(np.asarray(engine.root_values(roots), dtype=np.float64), (-1, 1))
+    for column, (_, quantities) in enumerate(scenarios):
+        for root, value in quantities.items():
+            if root not in root_columns:
+                raise ValueError(f'{root} 不是根节点' if root in engine.store else f'节点 {root} 不存在')
+            matrix[root_columns[root], column] = value
+
+    values, divergent = system.solve(matrix)
+    values = np.where(values > 0, values, np.nan)
+    values[system.roots] = matrix  # 数量为 0 的根节点也如实输出
+    values[divergent] = np.inf
+    return ScenarioTable([name for name, _ in scenarios], system.nodes, values)
+
+
+def write_scenario_csv(table, filename):
+    """把 ScenarioTable 写成每行一个节点、每列一个场景的 CSV"""
+    with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['节点'] + table.names)
+        for node, row in zip(table.nodes, table.values.tolist()):
+            writer.writerow([node] + ['' if value != value else f'{value:.15g}' for value in row])
+
+
+def main(argv=None):
+    from graph_engine import GraphEngine
+
+    parser = argparse.ArgumentParser(description='按场景表中的多组根节点数量一次求出所有节点的数量')
+    parser.add_argument('config', help='配置文件（JSON 或二进制快照）')
+    parser.add_argument('scenarios', help='场景 CSV：表头为 场景,根节点1,根节点2,...，每行一个场景')
+    parser.add_argument('output', help='输出 CSV，每行一个节点、每列一个场景')
+    args = parser.parse_args(argv)
+
+    engine = GraphEngine()
+    if not engine.load_config(args.config):
+        print(f'{args.config} 不存在', file=sys.stderr)
+        return 1
+    try:
+        scenarios = read_scenarios(args.scenarios)
+        start = time.perf_counter()
+        table = solve_scenarios(engine, scenarios)
+    except ValueError as e:
+        print(f'{args.scenarios}: {e}', file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - start
+    write_scenario_csv(table, args.output)
+    print(f'{len(table.names)} 个场景, {len(table.nodes)} 个节点: 求解 {seconds:.2f}s')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""布局坐标的均匀网格索引，用于按视野裁剪节点
+
+点按所在网格（行优先编号）排序，同一行中相邻网格的点在数组里是连续的一段，
+查询一个矩形只需对覆盖到的每一行取一段切片，再按坐标精确过滤。
+"""
+import numpy as np
+
+# 平均每个网格中的点数
+POINTS_PER_CELL = 4
+
+
+class GridIndex:
+    def __init__(self, xy):
+        self.xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        n = len(self.xy)
+        self.cells = max(1, int(np.sqrt(n / POINTS_PER_CELL)))
+        if n:
+            self.low = self.xy.min(axis=0)
+            span = self.xy.max(axis=0) - self.low
+        else:
+            self.low = np.zeros(2)
+            span = np.ones(2)
+        self.cell_size = np.maximum(span, 1e-9) / self.cells
+
+        column, row = self._cell_of(self.xy).T
+        cell_ids = row * self.cells + column
+        self.order = np.argsort(cell_ids, kind='stable')
+        self.bounds = np.searchsorted(cell_ids[self.order], np.arange(self.cells * self.cells + 1))
+
+    def _cell_of(self, xy):
+        cell = np.floor((xy - self.low) / self.cell_size).astype(np.int64)
+        return np.clip(cell, 0, self.cells - 1)
+
+    def query(self, x0, x1, y0, y1):
+        """返回坐标落在 [x0, x1] × [y0, y1] 内的点的下标（升序）"""
+        if not len(self.xy):
+            return np.empty(0, dtype=np.int64)
+        (column0, row0), (column1, row1) = self._cell_of(np.array([[x0, y0], [x1, y1]]))
+        pieces = [self.order[self.bounds[row * self.cells + column0]:
+                             self.bounds[row * self.cells + column1 + 1]]
+                  for row in range(row0, row1 + 1)]
+        candidates = np.concatenate(pieces)
+        xy = self.xy[candidates]
+        inside = (xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1)
+        return np.sort(candidates[inside])
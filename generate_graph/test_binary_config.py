@@ -0,0 +1,83 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from binary_config import FORMAT_VERSION, MAGIC, read_binary_config
+from graph_engine import GraphEngine
+
+
+class BinaryConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def round_trip(self, engine):
+        filename = self.path('config.ggsnap')
+        engine.save_config(filename)
+        loaded = GraphEngine()
+        self.assertTrue(loaded.load_config(filename))
+        return loaded
+
+    def test_round_trip(self):
+        engine = GraphEngine()
+        engine.add_edges([('小麦', 2, '面粉', 3), ('面粉', 1.5, '面包', 0.25), ('水', 1, '面包', 4),
+                          ('面包', 1, '三明治', 2)])
+        engine.root_quantity = 3
+        engine.set_node_root_quantity('水', 2.5)
+        engine.calculate_quantities()
+
+        loaded = self.round_trip(engine)
+        self.assertEqual(loaded.store.edges(), engine.store.edges())
+        self.assertEqual(loaded.root_quantity, 3)
+        self.assertEqual(loaded.root_quantities, {'水': 2.5})
+        loaded.calculate_quantities()
+        self.assertEqual(loaded.quantities(), engine.quantities())
+        # 名称查找索引直接取自文件
+        self.assertEqual(loaded.search_nodes('面'), engine.search_nodes('面'))
+
+    def test_integer_columns_stay_integers(self):
+        engine = GraphEngine()
+        engine.add_edges([('a', 1, 'b', 2 ** 62)])
+        loaded = self.round_trip(engine)
+        self.assertEqual(loaded.store.edges(), [('a', 'b', 1, 2 ** 62)])
+        self.assertIs(type(loaded.store.edges()[0][3]), int)
+
+    def test_inexact_quantity_is_refused(self):
+        engine = GraphEngine()
+        # 同一列中有小数时整列是 float64，2 ** 53 + 1 存不下
+        engine.add_edges([('a', 1, 'b', 2 ** 53 + 1), ('b', 1, 'c', 0.5)])
+        with self.assertRaisesRegex(ValueError, 'JSON'):
+            engine.save_config(self.path('config.ggsnap'))
+        self.assertFalse(os.path.exists(self.path('config.ggsnap')))
+
+    def test_empty_graph(self):
+        loaded = self.round_trip(GraphEngine())
+        self.assertEqual(len(loaded.store), 0)
+        self.assertEqual(loaded.store.number_of_edges(), 0)
+
+    def test_bad_magic_and_version(self):
+        filename = self.path('config.ggsnap')
+        GraphEngine().save_config(filename)
+        with open(filename, 'rb') as f:
+            data = f.read()
+
+        cases = {
+            'JSON{}': '不是二进制配置文件',
+            MAGIC + bytes([FORMAT_VERSION + 1]) + data[len(MAGIC) + 1:]: '格式版本 2 不受支持',
+            MAGIC: '格式版本 缺失 不受支持',
+            MAGIC + bytes([FORMAT_VERSION]) + struct.pack('<Q', 1000) + b'{': '头部已损坏',
+        }
+        for content, message in cases.items():
+            with self.subTest(message=message):
+                with open(filename, 'wb') as f:
+                    f.write(content.encode() if isinstance(content, str) else content)
+                with self.assertRaisesRegex(ValueError, message):
+                    read_binary_config(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+import os
+import random
+import tempfile
+import unittest
+
+from config_journal import ConfigJournal, journal_path, read_journal
+from chain_parser import parse_buffer
+from graph_engine import GraphEngine, read_relation_blocks
+from incremental_layout import LayoutExtender, extend_layout
+from layout_cache import topology_key
+
+
+class AddEdgesTest(unittest.TestCase):
+    def test_generator_input(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_file = os.path.join(directory, 'config.txt')
+            engine = GraphEngine()
+            engine.save_config(config_file)
+            engine.journal = ConfigJournal(config_file)
+            generation = engine.journal.mark()
+            engine.add_edges((f'n{i}', 1, f'n{i + 1}', 2) for i in range(3))
+            engine.journal.close()
+
+            self.assertEqual(engine.store.number_of_edges(), 3)
+            self.assertEqual(len(read_journal(config_file, generation)), 3)
+
+
+class ReadRelationBlocksTest(unittest.TestCase):
+    TEXT = '甲.2乙.丙\r\n# 注释\r\n\r\na.b\nx..y\r\n3长名称节点。4另一个节点，c\r\nbad\nlast.one'
+
+    def read(self, data, chunk_size):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'relations.txt')
+            with open(filename, 'wb') as f:
+                f.write(data)
+            edges, success_count, errors = [], 0, []
+            read_bytes = total_bytes = 0
+            for block_edges, block_success, block_errors, read_bytes, total_bytes in \
+                    read_relation_blocks(filename, chunk_size=chunk_size):
+                edges.extend(block_edges)
+                success_count += block_success
+                errors.extend(block_errors)
+            self.assertEqual(read_bytes, total_bytes)
+            return edges, success_count, [(e.line, e.column, str(e)) for e in errors]
+
+    def test_small_chunks_match_whole_file(self):
+        data = self.TEXT.encode('utf-8')
+        edges, success_count, errors = parse_buffer(self.TEXT.replace('\r\n', '\n'))
+        expected = edges, success_count, [(e.line, e.column, str(e)) for e in errors]
+        self.assertEqual((expected[1], len(expected[2])), (5, 1))
+        # 块边界落在多字节字符、\r\n 中间和没有换行的最后一行上
+        for chunk_size in list(range(1, 20)) + [len(data) - 1, len(data), 4096]:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.read(data, chunk_size), expected)
+
+    def test_empty_file(self):
+        self.assertEqual(self.read(b'', 4), ([], 0, []))
+
+
+class JournalGenerationTest(unittest.TestCase):
+    def test_save_without_journal_does_not_replay_old_tail(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_file = os.path.join(directory, 'config.txt')
+            engine = GraphEngine()
+            engine.journal = ConfigJournal(config_file)
+            engine.save_config(config_file)  # 合并：写入分代 G1
+            engine.add_edge('a', 'b')
+            engine.add_edge('b', 'c')
+            engine.journal.close()
+
+            # 加载时重放 G1 之后的两条记录，不带日志删边后保存到同一个文件
+            engine = GraphEngine()
+            self.assertTrue(engine.load_config(config_file))
+            self.assertTrue(engine.store.has_edge('b', 'c'))
+            engine.remove_edge('b', 'c')
+            engine.save_config(config_file)
+
+            engine = GraphEngine()
+            self.assertTrue(engine.load_config(config_file))
+            self.assertTrue(engine.store.has_edge('a', 'b'))
+            self.assertFalse(engine.store.has_edge('b', 'c'))
+
+
+class ReadJournalTest(unittest.TestCase):
+    def test_stops_at_malformed_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_file = os.path.join(directory, 'config.txt')
+            for bad in ('{}', '3', '[]', 'null', '"add"'):
+                with self.subTest(bad=bad):
+                    with open(journal_path(config_file), 'w', encoding='utf-8') as f:
+                        f.write('["generation", "g1"]\n'
+                                '["add", "a", "b", 1, 2]\n'
+                                '["add", "b", "c", 1\n'  # 崩溃留下的残行照常跳过
+                                '["remove", "a", "b"]\n'
+                                f'{bad}\n'
+                                '["add", "c", "d", 1, 1]\n')
+                    self.assertEqual(read_journal(config_file, 'g1'),
+                                     [['add', 'a', 'b', 1, 2], ['remove', 'a', 'b']])
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.config_file = os.path.join(directory.name, 'config.txt')
+        self.engine = GraphEngine()
+        self.engine.journal = journal = ConfigJournal(self.config_file)
+        self.addCleanup(journal.close)
+        self.generation = journal.mark()
+
+        self.writes = []
+        write = journal._file.write
+        journal._file.write = lambda text: (self.writes.append(text), write(text))[1]
+        self.updates = 0
+        update = self.engine.update_quantities
+
+        def counting_update():
+            self.updates += 1
+            update()
+        self.engine.update_quantities = counting_update
+
+    def records(self):
+        return read_journal(self.config_file, self.generation)
+
+    def test_journal_and_recalculate_once(self):
+        engine = self.engine
+        with engine.batch():
+            engine.add_edge('a', 'b', 1, 2)
+            with engine.batch():  # 嵌套时只在最外层结束时处理
+                engine.parse_and_add_edges('b.3c')
+                engine.remove_edge('a', 'b')
+            engine.add_edge('a', 'b', 1, 2)
+            self.assertEqual(self.writes, [])
+            self.assertEqual(self.records(), [])
+            self.assertEqual(self.updates, 0)
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual(len(self.records()), 4)
+        self.assertEqual(self.updates, 1)
+        self.assertEqual(engine.quantity_of('c'), 6)
+
+    def test_exception_keeps_edits_and_flushes_journal(self):
+        engine = self.engine
+        with self.assertRaises(RuntimeError):
+            with engine.batch():
+                engine.add_edge('a', 'b', 1, 2)
+                engine.add_edge('b', 'c', 1, 3)
+                raise RuntimeError
+        # 已做的改动保留，日志照样写入，数量留到下次重算
+        self.assertEqual(engine._batch_depth, 0)
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual([record[:3] for record in self.records()], [['add', 'a', 'b'], ['add', 'b', 'c']])
+        self.assertEqual(self.updates, 0)
+        self.assertTrue(engine.store.has_edge('b', 'c'))
+
+        engine.add_edge('c', 'd')  # 之后的改动不再推迟
+        self.assertEqual(len(self.writes), 2)
+        engine.update_quantities()
+        self.assertEqual(engine.quantity_of('d'), 6)
+
+
+class LargeQuantityTest(unittest.TestCase):
+    BIG = 2 ** 53 + 1  # float64 存不下，会被舍入成 2 ** 53
+
+    def test_edge_quantities_keep_exact_values(self):
+        engine = GraphEngine()
+        engine.solver = 'exact'
+        engine.add_edge('a', 'b', 1, self.BIG)
+        engine.calculate_quantities()
+        self.assertEqual(engine.G.edges(data=True),
+                         [('a', 'b', {'source_quantity': 1, 'target_quantity': self.BIG})])
+        self.assertEqual(engine.exact_quantity, [1, self.BIG])
+
+        # 批量加边、合并、增量重算和子图复制之后仍然是原值
+        engine.add_edges([('b', 1, 'c', 2 ** 80 + 1)])
+        engine.store.compact()
+        engine.add_edge('c', 'd', 3, self.BIG)
+        engine.update_quantities()
+        self.assertEqual(engine.exact_quantity[2:], [self.BIG * (2 ** 80 + 1),
+                                                     self.BIG * (2 ** 80 + 1) * self.BIG // 3])
+        self.assertEqual(engine.G.topology_copy().store.edges(), engine.store.edges())
+
+        with tempfile.TemporaryDirectory() as directory:
+            config_file = os.path.join(directory, 'config.txt')
+            engine.save_config(config_file)
+            loaded = GraphEngine()
+            loaded.load_config(config_file)
+            self.assertEqual(loaded.store.edges(), engine.store.edges())
+
+
+class TopologyKeyTest(unittest.TestCase):
+    def test_incremental_key_matches_full_hash(self):
+        rng = random.Random(9)
+        engine = GraphEngine()
+        engine.add_edges([(f'n{i}', 1, f'n{i + 1}', 1) for i in range(20)])
+        for step in range(300):
+            u, v = f'n{rng.randrange(30)}', f'n{rng.randrange(30)}'
+            if rng.random() < 0.3:
+                engine.remove_edge(u, v)
+            else:
+                engine.add_edge(u, v, rng.randint(1, 3), 1)  # 已有的边只覆盖数量，键不变
+            with self.subTest(step=step):
+                key = engine.topology_key('dot')
+                self.assertEqual(key, topology_key(engine.G, 'dot'))
+                self.assertEqual(key, topology_key(engine.G.to_networkx(), 'dot'))
+
+    def test_direction_and_prog_change_key(self):
+        forward, backward = GraphEngine(), GraphEngine()
+        forward.add_edge('a', 'b')
+        backward.add_edge('b', 'a')
+        backward.add_edge('a', 'b')
+        backward.remove_edge('b', 'a')
+        self.assertEqual(forward.topology_key(), backward.topology_key())
+        backward.remove_edge('a', 'b')
+        backward.add_edge('b', 'a')
+        self.assertNotEqual(forward.topology_key(), backward.topology_key())
+        self.assertNotEqual(forward.topology_key('dot'), forward.topology_key('layered'))
+
+
+class LayoutExtenderTest(unittest.TestCase):
+    def test_cached_state_matches_full_extend(self):
+        rng = random.Random(4)
+        engine = GraphEngine()
+        engine.add_edges([(f'n{i}', 1, f'n{2 * i + j}', 1) for i in range(1, 8) for j in (0, 1)])
+        pos = {node: (float(i % 5) * 72, -72.0 * (i // 5)) for i, node in enumerate(engine.G.nodes())}
+        extender = LayoutExtender()
+        expected = pos
+        for step in range(60):
+            engine.add_edge(f'n{rng.randrange(1, 40)}', f'n{rng.randrange(1, 60)}')
+            previous = pos
+            pos = extender.extend(engine.G, pos, engine.reset_version)
+            expected = extend_layout(engine.G, expected)
+            with self.subTest(step=step):
+                self.assertEqual(pos, expected)
+                self.assertEqual(set(pos), set(engine.G.nodes()))
+                self.assertTrue(pos is previous or set(previous) < set(pos))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import graph_export
+from graph_engine import GraphEngine
+from layout_cache import LayoutCache
+
+
+class LayoutCacheReuseTest(unittest.TestCase):
+    def test_cli_reuses_layout_cached_by_gui(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_file = os.path.join(directory, 'config.txt')
+            cache_file = os.path.join(directory, 'layout_cache.json')
+            output = os.path.join(directory, 'graph.svg')
+
+            engine = GraphEngine()
+            engine.add_edges([('a', 1, 'b', 2), ('b', 1, 'c', 3)])
+            engine.save_config(config_file)
+            # 界面默认的布局方式（增量布局和完整布局）以 'dot' 为键缓存布局
+            cache = LayoutCache(cache_file=cache_file)
+            cache.put(engine.topology_key('dot'), {'a': (10.0, 300.0), 'b': (10.0, 200.0), 'c': (10.0, 100.0)})
+
+            with mock.patch.object(graph_export, 'layered_layout', side_effect=AssertionError('重新计算了布局')), \
+                    mock.patch.dict('sys.modules', {'networkx.drawing.nx_agraph': None}):
+                self.assertEqual(graph_export.main([config_file, output, '--layout-cache', cache_file]), 0)
+            self.assertTrue(os.path.exists(output))
+
+
+if __name__ == '__main__':
+    unittest.main()
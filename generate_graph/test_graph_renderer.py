@@ -0,0 +1,68 @@
+import unittest
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from graph_renderer import GraphRenderer
+from graph_store import GraphStore, GraphView
+
+
+class LazyLabelTest(unittest.TestCase):
+    def setUp(self):
+        # 30x30 的网格，每个节点连向右边的节点
+        store = GraphStore()
+        store.add_edges((f'n{x}_{y}', f'n{x + 1}_{y}', 1, x + 2) for x in range(29) for y in range(30))
+        self.G = GraphView(store)
+        self.pos = {f'n{x}_{y}': (x * 10.0, y * 10.0) for x in range(30) for y in range(30)}
+        fig = Figure(figsize=(8, 8), dpi=100)
+        FigureCanvasAgg(fig)
+        self.renderer = GraphRenderer(fig.add_subplot(111))
+        self.node_calls = []
+        self.edge_calls = []
+
+    def node_label(self, node):
+        self.node_calls.append(node)
+        return node
+
+    def edge_label(self, edge):
+        self.edge_calls.append(edge)
+        return f'{edge[2]}:{edge[3]}'
+
+    def set_view(self, x0, x1, y0, y1):
+        # 像工具栏平移那样同时设置两个方向，再裁剪一次
+        renderer = self.renderer
+        renderer._updating_view = True
+        renderer.ax.set_xlim(x0, x1)
+        renderer.ax.set_ylim(y0, y1)
+        renderer._updating_view = False
+        renderer.update_view()
+
+    def render(self):
+        edges = self.G.store.edges()
+        self.renderer.render(self.G, self.pos, edges, 300, self.node_label, self.edge_label,
+                             'title', reset_view=True)
+        return edges
+
+    def test_labels_only_for_visible_items(self):
+        renderer = self.renderer
+        renderer.label_zoom = 5
+        edges = self.render()
+        self.assertEqual(self.node_calls, [])  # 整图视野下不显示标签
+        self.assertEqual(self.edge_calls, [])
+
+        self.set_view(95, 125, 95, 125)
+        shown = {text.get_text() for text in renderer._node_texts if text.get_visible()}
+        self.assertIn('n10_10', shown)
+        self.assertLessEqual(len(self.node_calls), 16)
+        self.assertEqual(len(set(self.node_calls)), len(self.node_calls))
+        self.assertTrue(set(self.edge_calls) <= set(edges))
+        self.assertLess(len(self.edge_calls), 16)
+
+        # 同一次 render 中再次平移时复用已生成的标签
+        calls = len(self.node_calls)
+        self.set_view(96, 126, 95, 125)
+        self.assertEqual(len(self.node_calls), calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""增量重算（update_quantities / set_root_quantity）与完整重算的结果在随机编辑序列下一致"""
+import math
+import random
+import unittest
+from fractions import Fraction
+
+from graph_engine import GraphEngine
+
+SEEDS = 60
+
+
+def full_recompute(engine):
+    """用同样的边和根节点数量新建 engine 并完整计算"""
+    reference = GraphEngine()
+    reference.solver = engine.solver
+    reference.root_quantity = engine.root_quantity
+    reference.root_quantities = dict(engine.root_quantities)
+    reference.add_edges((edge['source'], edge['source_quantity'], edge['target'], edge['target_quantity'])
+                        for edge in engine.edges_data())
+    reference.calculate_quantities()
+    return reference.quantities()
+
+
+class IncrementalQuantitiesTest(unittest.TestCase):
+    def assert_same(self, actual, expected):
+        if expected is None or (isinstance(expected, float) and math.isnan(expected)):
+            self.assertTrue(actual is None or (isinstance(actual, float) and math.isnan(actual)),
+                            f'{actual} != {expected}')
+        elif isinstance(expected, Fraction) or isinstance(actual, Fraction):
+            self.assertEqual(Fraction(actual), Fraction(expected))
+        else:
+            self.assertTrue(math.isclose(actual, expected, rel_tol=1e-9), f'{actual} != {expected}')
+
+    def check(self, engine):
+        expected = full_recompute(engine)
+        actual = engine.quantities()
+        for node, quantity in expected.items():
+            self.assert_same(actual[node], quantity)
+        # 删边后留下的孤立节点不在新建的图中，它们是根节点
+        for node in actual.keys() - expected.keys():
+            self.assert_same(actual[node], engine.root_quantity_of(node))
+
+    def run_edits(self, solver, seed, acyclic):
+        rng = random.Random(seed)
+        engine = GraphEngine()
+        engine.solver = solver
+        engine.calculate_quantities()
+        nodes = rng.randint(3, 30)
+        for _ in range(rng.randint(10, 80)):
+            u, v = rng.randrange(nodes), rng.randrange(nodes)
+            if acyclic:
+                u, v = min(u, v), max(u, v) + (u == v)
+            r = rng.random()
+            if r < 0.6:
+                engine.add_edge(f'n{u}', f'n{v}', rng.randint(1, 4), rng.randint(1, 4))
+            elif r < 0.8:
+                engine.remove_edge(f'n{u}', f'n{v}')
+            elif r < 0.9:
+                engine.set_root_quantity(rng.randint(1, 5))
+            else:
+                engine.set_node_root_quantity(f'n{u}', rng.choice([None, rng.randint(1, 5)]))
+            engine.update_quantities()
+            self.check(engine)
+
+    def test_python_acyclic(self):
+        for seed in range(SEEDS):
+            with self.subTest(seed=seed):
+                self.run_edits('python', seed, acyclic=True)
+
+    def test_python_with_cycles(self):
+        for seed in range(SEEDS):
+            with self.subTest(seed=seed):
+                self.run_edits('python', seed, acyclic=False)
+
+    def test_exact_acyclic(self):
+        for seed in range(SEEDS):
+            with self.subTest(seed=seed):
+                self.run_edits('exact', seed, acyclic=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from layout_cache import LayoutCache, write_layout_cache
+
+
+class WriteLayoutCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache_file = os.path.join(self.directory, 'layout.json')
+
+    def test_concurrent_writers(self):
+        # 界面线程的同步保存和后台保存线程可能同时写同一个文件
+        errors = []
+
+        def write(worker):
+            try:
+                for i in range(50):
+                    write_layout_cache({f'k{worker}': {'a': (worker, i)}}, self.cache_file)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.directory), ['layout.json'])
+        with open(self.cache_file, 'r', encoding='utf-8') as f:
+            (key, pos), = json.load(f).items()
+        self.assertEqual(pos['a'], [int(key[1:]), 49])
+
+    def test_failed_write_keeps_old_cache(self):
+        write_layout_cache({'k': {'a': (1.0, 2.0)}}, self.cache_file)
+        with self.assertRaises(TypeError):
+            write_layout_cache({'k': {'a': object()}}, self.cache_file)
+        self.assertEqual(os.listdir(self.directory), ['layout.json'])
+
+        cache = LayoutCache(cache_file=self.cache_file)
+        self.assertEqual(cache.get('k'), {'a': (1.0, 2.0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import name_index
+from graph_engine import GraphEngine
+from name_index import NameIndex
+
+
+class NameIndexTest(unittest.TestCase):
+    NAMES = ['红宝石矿', '红矿', '矿红', '红矿石', '大红矿', 'RedOre', 'redore2', '铁矿']
+
+    def search(self, text, limit=name_index.SEARCH_LIMIT, names=NAMES):
+        index = NameIndex()
+        index.refresh(names, 0)
+        return [names[node] for node in index.search(text, limit)]
+
+    def test_ranking(self):
+        # 前缀 > 包含 > 按顺序含有各字符，同一档内按名称排序
+        self.assertEqual(self.search('红矿'), ['红矿', '红矿石', '大红矿', '红宝石矿'])
+        self.assertEqual(self.search('矿'), ['矿红', '大红矿', '红宝石矿', '红矿', '红矿石', '铁矿'])
+        self.assertEqual(self.search('红矿', limit=3), ['红矿', '红矿石', '大红矿'])
+
+    def test_fuzzy_ignores_case(self):
+        self.assertEqual(self.search('ro'), ['RedOre', 'redore2'])
+        # 前缀和包含区分大小写，只有模糊匹配不区分
+        self.assertEqual(self.search('Re'), ['RedOre', 'redore2'])
+        self.assertEqual(self.search('re'), ['redore2', 'RedOre'])
+
+    def test_no_match_and_invalid_text(self):
+        self.assertEqual(self.search('铜'), [])
+        self.assertEqual(self.search(''), [])
+        self.assertEqual(self.search('红\n矿'), [])
+
+    def test_new_names_are_inserted_in_order(self):
+        names = ['b', 'd']
+        index = NameIndex()
+        index.refresh(names, 0)
+        names += ['c', 'a']
+        index.refresh(names, 0)
+        self.assertEqual(index.sorted_names, ['a', 'b', 'c', 'd'])
+        self.assertEqual([names[node] for node in index.sorted_ids], index.sorted_names)
+        self.assertEqual([names[node] for node in index.search('c')], ['c'])
+
+        # 图被整体替换后重新排序
+        replaced = ['z', 'y']
+        index.refresh(replaced, 1)
+        self.assertEqual(index.sorted_names, ['y', 'z'])
+
+
+class NameIndexPersistenceTest(unittest.TestCase):
+    def engine(self):
+        engine = GraphEngine()
+        engine.add_edges([('红矿', 1, '红宝石矿', 2), ('大红矿', 1, '铁矿', 1), ('铁矿', 1, '红矿石', 3)])
+        return engine
+
+    def test_binary_snapshot_keeps_sorted_order(self):
+        engine = self.engine()
+        expected = engine.search_nodes('红矿')
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'config.ggsnap')
+            engine.save_config(filename)
+            loaded = GraphEngine()
+            loaded.load_config(filename)
+            # 排好的顺序直接取自文件，查找时不再排序
+            with mock.patch.object(name_index, 'sorted', side_effect=AssertionError('重新排序'), create=True):
+                self.assertEqual(loaded.search_nodes('红矿'), expected)
+                self.assertEqual(loaded.sorted_nodes(), engine.sorted_nodes())
+
+    def test_json_config_and_journal_replay(self):
+        engine = self.engine()
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'config.txt')
+            engine.save_config(filename)
+            loaded = GraphEngine()
+            loaded.load_config(filename)
+            self.assertEqual(loaded.search_nodes('红矿'), engine.search_nodes('红矿'))
+            loaded.add_edge('红矿', '红矿渣')
+            self.assertEqual(loaded.search_nodes('红矿'), ['红矿', '红矿渣', '红矿石', '大红矿', '红宝石矿'])
+
+
+if __name__ == '__main__':
+    unittest.main()
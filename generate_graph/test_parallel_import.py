@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from graph_engine import GraphEngine
+from parallel_import import import_files
+
+
+class ImportFilesTest(unittest.TestCase):
+    def test_failed_file_is_not_half_imported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            good = os.path.join(directory, 'a.txt')
+            bad = os.path.join(directory, 'b.txt')
+            with open(good, 'w', encoding='utf-8') as f:
+                f.write('x.y\n')
+            # 第一行正常，第二行的数量超出 64 位整数，边数组装不下
+            with open(bad, 'w', encoding='utf-8') as f:
+                f.write(f'a.b\n{2 ** 70}c.d\n')
+
+            engine = GraphEngine()
+            results = dict((path, (count, errors)) for path, count, errors in
+                           import_files(engine, [good, bad], max_workers=1))
+
+            self.assertEqual(results[good], (1, []))
+            self.assertEqual(results[bad][0], 0)
+            self.assertIsInstance(results[bad][1][-1], OverflowError)
+            self.assertEqual(sorted(engine.store.nodes()), ['x', 'y'])
+
+    def test_process_pool_matches_sequential_import(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i in range(3):
+                paths.append(os.path.join(directory, f'{i}.txt'))
+                with open(paths[-1], 'w', encoding='utf-8') as f:
+                    f.write(f'a.{i + 2}b{i}\nb{i}.c\n')
+
+            sequential, pooled = GraphEngine(), GraphEngine()
+            import_files(sequential, paths, max_workers=1)
+            import_files(pooled, paths, max_workers=2)  # 子进程以 spawn 方式启动
+            self.assertEqual(pooled.store.edges(), sequential.store.edges())
+
+
+if __name__ == '__main__':
+    unittest.main()
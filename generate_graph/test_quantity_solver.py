@@ -0,0 +1,87 @@
+"""稀疏求解（solver='sparse'）：有环图的线性方程组、发散检测，以及与逐节点计算的一致性"""
+import math
+import random
+import unittest
+
+from graph_engine import GraphEngine
+from quantity_solver import RatioSystem
+
+
+def sparse_engine(edges):
+    engine = GraphEngine()
+    engine.solver = 'sparse'
+    engine.add_edges(edges)
+    engine.calculate_quantities()
+    return engine
+
+
+class CyclicSolveTest(unittest.TestCase):
+    def test_convergent_cycle(self):
+        # a = r + b/2，b = a：a = b = 2，而不是逐节点计算时只沿一条路径传播的 1
+        engine = sparse_engine([('r', 1, 'a', 1), ('a', 1, 'b', 1), ('b', 2, 'a', 1)])
+        quantities = engine.quantities()
+        self.assertAlmostEqual(quantities['a'], 2)
+        self.assertAlmostEqual(quantities['b'], 2)
+        self.assertEqual(engine.divergent_nodes, set())
+
+    def test_divergent_cycle(self):
+        # 环上比例乘积为 1：每绕一圈都再加一份，数量发散，下游也发散
+        engine = sparse_engine([('r', 1, 'a', 1), ('a', 1, 'b', 1), ('b', 1, 'a', 1), ('b', 1, 'c', 1)])
+        quantities = engine.quantities()
+        self.assertEqual(engine.divergent_nodes, {'a', 'b', 'c'})
+        for node in 'abc':
+            self.assertEqual(quantities[node], math.inf)
+        self.assertEqual(quantities['r'], 1)
+
+    def test_unreachable_divergent_cycle_is_ignored(self):
+        # 根节点到不了的环没有输入，数量为 0（未计算出），不算发散
+        engine = sparse_engine([('r', 1, 'a', 1), ('x', 1, 'y', 1), ('y', 1, 'x', 1)])
+        self.assertEqual(engine.divergent_nodes, set())
+        self.assertIsNone(engine.quantities()['x'])
+
+    def test_several_scenarios_solved_together(self):
+        engine = sparse_engine([('r', 1, 'a', 1), ('a', 1, 'b', 1), ('b', 2, 'a', 1), ('s', 1, 'b', 3)])
+        system = RatioSystem(engine.store)
+        roots = [engine.store.names[i] for i in system.roots.tolist()]
+        values, divergent = system.solve([[1 if root == 'r' else 0, 0, 2 if root == 'r' else 1]
+                                          for root in roots])
+        a = engine.store.index['a']
+        self.assertFalse(divergent.any())
+        # a = r + b/2，b = a + 3s
+        self.assertAlmostEqual(values[a, 0], 2)
+        self.assertAlmostEqual(values[a, 1], 0)
+        self.assertAlmostEqual(values[a, 2], 2 * (2 + 1.5))
+
+
+class SparseMatchesPythonTest(unittest.TestCase):
+    def test_random_dags(self):
+        for seed in range(20):
+            rng = random.Random(seed)
+            size = rng.randint(2, 40)
+            edges = []
+            for _ in range(rng.randint(1, 3 * size)):
+                u, v = sorted(rng.sample(range(size), 2))
+                edges.append((f'n{u}', rng.randint(1, 5), f'n{v}', rng.randint(1, 5)))
+
+            python = GraphEngine()
+            python.add_edges(edges)
+            python.root_quantity = rng.randint(1, 4)
+            python.calculate_quantities()
+            sparse = sparse_engine(edges)
+            sparse.root_quantity = python.root_quantity
+            sparse.calculate_quantities()
+
+            with self.subTest(seed=seed):
+                expected = python.quantities()
+                actual = sparse.quantities()
+                self.assertEqual(actual.keys(), expected.keys())
+                for node, quantity in expected.items():
+                    if quantity is None:
+                        self.assertIsNone(actual[node])
+                    else:
+                        self.assertTrue(math.isclose(actual[node], quantity, rel_tol=1e-9),
+                                        f'{node}: {actual[node]} != {quantity}')
+
+
+if __name__ == '__main__':
+    unittest.main()
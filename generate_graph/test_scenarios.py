@@ -0,0 +1,97 @@
+import csv
+import math
+import os
+import random
+import tempfile
+import unittest
+
+import scenarios
+from graph_engine import GraphEngine
+
+
+def random_dag(seed):
+    rng = random.Random(seed)
+    size = rng.randint(4, 30)
+    edges = [(f'节点{u}', rng.randint(1, 4), f'节点{v}', rng.randint(1, 4))
+             for u, v in (sorted(rng.sample(range(size), 2)) for _ in range(2 * size))]
+    engine = GraphEngine()
+    engine.add_edges(edges)
+    return engine, rng
+
+
+class ScenarioPipelineTest(unittest.TestCase):
+    def test_csv_pipeline_matches_per_scenario_calculation(self):
+        for seed in range(8):
+            engine, rng = random_dag(seed)
+            engine.root_quantity = 2
+            roots = engine.store.roots()
+            engine.set_node_root_quantity(roots[0], 5)
+
+            # 表头列出部分根节点；空格子和没有列出的根节点沿用当前设置
+            header = roots[:max(1, len(roots) - 1)]
+            rows = [[f'场景{i}'] + [rng.choice(['', str(rng.randint(0, 9)), f'{rng.random() * 10:.3f}'])
+                                    for _ in header] for i in range(5)]
+
+            with tempfile.TemporaryDirectory() as directory, self.subTest(seed=seed):
+                config_file = os.path.join(directory, 'config.txt')
+                scenario_file = os.path.join(directory, 'scenarios.csv')
+                output_file = os.path.join(directory, 'results.csv')
+                engine.save_config(config_file)
+                with open(scenario_file, 'w', newline='', encoding='utf-8-sig') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(['场景'] + header)
+                    writer.writerows(rows[:2] + [[]] + rows[2:])  # 空行被跳过
+
+                self.assertEqual(scenarios.main([config_file, scenario_file, output_file]), 0)
+                with open(output_file, newline='', encoding='utf-8-sig') as f:
+                    table = list(csv.reader(f))
+                self.assertEqual(table[0], ['节点'] + [row[0] for row in rows])
+                results = {line[0]: line[1:] for line in table[1:]}
+
+                for column, row in enumerate(rows):
+                    expected = GraphEngine()
+                    expected.load_config(config_file)
+                    for root, cell in zip(header, row[1:]):
+                        if cell:
+                            expected.set_node_root_quantity(root, float(cell))
+                    expected.calculate_quantities()
+                    for node, quantity in expected.quantities().items():
+                        cell = results[node][column]
+                        if quantity is None:
+                            self.assertEqual(cell, '', node)
+                        else:
+                            self.assertTrue(math.isclose(float(cell), quantity, rel_tol=1e-12),
+                                            f'{row[0]} {node}: {cell} != {quantity}')
+
+    def test_solve_scenarios_matches_engine(self):
+        engine, _ = random_dag(42)
+        roots = engine.store.roots()
+        cases = [('全部为 1', {}), ('第一个根为 3', {roots[0]: 3.0})]
+        table = scenarios.solve_scenarios(engine, cases)
+        for column, (_, quantities) in enumerate(cases):
+            engine.root_quantities = dict(quantities)
+            engine.calculate_quantities()
+            for node, value in zip(table.nodes, table.values[:, column].tolist()):
+                expected = engine.quantities()[node]
+                if expected is None:
+                    self.assertTrue(math.isnan(value))
+                else:
+                    self.assertAlmostEqual(value, expected)
+
+    def test_invalid_tables(self):
+        engine = GraphEngine()
+        engine.add_edge('a', 'b')
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'scenarios.csv')
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write('场景,a\n基准,十\n')
+            with self.assertRaisesRegex(ValueError, '第 2 行'):
+                scenarios.read_scenarios(filename)
+        with self.assertRaisesRegex(ValueError, 'b 不是根节点'):
+            scenarios.solve_scenarios(engine, [('x', {'b': 1.0})])
+        with self.assertRaisesRegex(ValueError, '节点 c 不存在'):
+            scenarios.solve_scenarios(engine, [('x', {'c': 1.0})])
+
+
+if __name__ == '__main__':
+    unittest.main()
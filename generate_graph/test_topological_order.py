@@ -0,0 +1,25 @@
+import unittest
+
+from graph_engine import GraphEngine
+
+
+class CycleReportTest(unittest.TestCase):
+    def test_second_cycle_reported_on_cyclic_graph(self):
+        engine = GraphEngine()
+        engine.topological_order.is_acyclic()  # 拓扑序已经建好，之后的加边走增量路径
+        self.assertIsNone(engine.add_edge('a', 'b'))
+        self.assertEqual(engine.add_edge('b', 'a'), ['b', 'a', 'b'])
+
+        self.assertIsNone(engine.add_edge('c', 'd'))
+        self.assertEqual(engine.add_edge('d', 'c'), ['d', 'c', 'd'])
+        self.assertIsNone(engine.add_edge('a', 'c'))
+
+    def test_cycle_reported_after_rebuild(self):
+        engine = GraphEngine()
+        engine.add_edges([('a', 1, 'b', 1), ('b', 1, 'a', 1)])
+        self.assertEqual(engine.add_edge('c', 'd'), None)
+        self.assertEqual(engine.add_edge('d', 'c'), ['d', 'c', 'd'])
+
+
+if __name__ == '__main__':
+    unittest.main()
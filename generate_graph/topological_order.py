@@ -0,0 +1,115 @@
+"""随边的增删增量维护的拓扑序（Pearce-Kelly 算法）
+
+加入边 u→v 时，如果 u 已经排在 v 前面，拓扑序不变；否则只在 v 到 u 之间的位置范围内，
+从 v 向后、从 u 向前各做一次有界的深度优先搜索，把受影响的节点在它们原来占用的位置上
+重新排列。向后搜索碰到 u 说明新边形成了环，可以在加入时立即报告。删除边不会破坏拓扑序。
+
+图中有环时没有拓扑序，之后删除边可能让环消失，下次需要拓扑序时再用 Kahn 算法完整排一次。
+"""
+
+
+class DynamicTopologicalOrder:
+    __slots__ = ('store', 'position', 'order', 'cyclic', '_stale')
+
+    def __init__(self, store):
+        self.store = store
+        self.position = []  # 节点编号 -> 在拓扑序中的位置
+        self.order = []  # 位置 -> 节点编号
+        self.cyclic = False
+        self._stale = True
+
+    def invalidate(self):
+        """图被整体替换或批量修改后调用，下次使用时重新排序"""
+        self._stale = True
+
+    def _ensure(self):
+        if self._stale:
+            order = self.store.topological_ids()
+            self._stale = False
+            self.cyclic = order is None
+            self.order = order or []
+            self.position = [0] * len(self.order)
+            for i, node in enumerate(self.order):
+                self.position[node] = i
+        # 新加入的孤立节点排在最后
+        for node in range(len(self.order), len(self.store)):
+            self.position.append(len(self.order))
+            self.order.append(node)
+
+    def order_ids(self):
+        """当前的拓扑序（节点编号列表），有环时返回 None"""
+        self._ensure()
+        return None if self.cyclic else self.order
+
+    def is_acyclic(self):
+        self._ensure()
+        return not self.cyclic
+
+    def remove_edge(self):
+        if self.cyclic:
+            self._stale = True  # 环可能已经断开
+
+    def add_edge(self, u, v):
+        """边 u→v 已经加入图中；形成环时返回环上的节点编号 [u, v, ..., u]，否则返回 None"""
+        if self.cyclic and not self._stale:
+            # 已经有环，拓扑序等到环断开后再重建；新边是否形成另一个环仍然要检查
+            return self._cycle_through(u, v)
+        if self._stale:
+            # 重新排序时新边已经包含在内，有环时再确认一下环是否经过新边
+            self._ensure()
+            return self._cycle_through(u, v) if self.cyclic else None
+        self._ensure()
+        position = self.position
+        lower, upper = position[v], position[u]
+        if lower > upper:
+            return None
+
+        # 从 v 出发向后搜索位置不超过 u 的节点，碰到 u 就是环
+        cycle, forward = self._search_forward(u, v, upper)
+        if cycle is not None:
+            self.cyclic = True
+            return cycle
+
+        # 从 u 出发向前搜索位置不小于 v 的节点
+        in_edge_ids = self.store.in_edge_ids
+        backward = {u}
+        stack = [u]
+        while stack:
+            for predecessor, _, _ in in_edge_ids(stack.pop()):
+                if predecessor not in backward and position[predecessor] > lower:
+                    backward.add(predecessor)
+                    stack.append(predecessor)
+
+        # u 的祖先整体排到 v 的后代前面，各自保持原来的相对顺序
+        moved = sorted(backward, key=position.__getitem__) + sorted(forward, key=position.__getitem__)
+        slots = sorted(position[node] for node in moved)
+        for node, slot in zip(moved, slots):
+            position[node] = slot
+            self.order[slot] = node
+        return None
+
+    def _search_forward(self, u, v, upper=None):
+        """从 v 出发深度优先搜索（upper 不为 None 时只走位置小于 upper 的节点），
+        返回 (经过 u→v 的环或 None, 访问过的节点 {节点: 父节点})"""
+        if u == v:
+            return [u, u], {}
+        successor_ids = self.store.successor_ids
+        position = self.position
+        parents = {v: None}
+        stack = [v]
+        while stack:
+            node = stack.pop()
+            for successor in successor_ids(node):
+                if successor == u:
+                    path = []
+                    while node is not None:
+                        path.append(node)
+                        node = parents[node]
+                    return [u] + path[::-1] + [u], parents
+                if successor not in parents and (upper is None or position[successor] < upper):
+                    parents[successor] = node
+                    stack.append(successor)
+        return None, parents
+
+    def _cycle_through(self, u, v):
+        return self._search_forward(u, v)[0]
@@ -0,0 +1,101 @@
+"""图拓扑（节点集合和边集合）的顺序无关哈希，随增删边 O(1) 更新
+
+每个节点名称取 64 位 blake2b 哈希，每条边的哈希由两端名称的哈希混合得到（区分方向），
+整张图的哈希是所有节点哈希之和与所有边哈希之和（各自模 2^64）。求和与顺序无关，
+加边、删边只需加上或减去一条边的哈希，不必像排序后整体哈希那样每次 O(V log V + E)。
+哈希只取决于名称，同样的图在不同进程、不同的节点编号下得到同样的键，可以共用磁盘布局缓存。
+"""
+import hashlib
+
+import numpy as np
+
+MASK = (1 << 64) - 1
+_EDGE_SALT = np.uint64(0x9e3779b97f4a7c15)
+
+
+def name_hashes(names):
+    """名称 -> 64 位哈希（np.uint64 数组）"""
+    return np.fromiter((int.from_bytes(hashlib.blake2b(str(name).encode('utf-8'), digest_size=8).digest(),
+                                       'little') for name in names), dtype=np.uint64, count=len(names))
+
+
+def _mix(x):
+    """splitmix64 的末尾混合，x 为 np.uint64 数组（乘法按 2^64 回绕）"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xbf58476d1ce4e5b9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def edge_hashes(source_hashes, target_hashes):
+    return _mix(source_hashes ^ _mix(target_hashes + _EDGE_SALT))
+
+
+def _sum(hashes):
+    return int(hashes.sum(dtype=np.uint64)) if len(hashes) else 0
+
+
+def graph_key(names, sources, targets, prog):
+    """由节点名称和边（names 的下标数组）计算键，与 TopologyHash.key 的结果相同"""
+    hashes = name_hashes(names)
+    edge_sum = _sum(edge_hashes(hashes[np.asarray(sources, dtype=np.int64)],
+                                hashes[np.asarray(targets, dtype=np.int64)]))
+    return _format_key(prog, len(names), len(sources), _sum(hashes), edge_sum)
+
+
+def _format_key(prog, node_count, edge_count, node_sum, edge_sum):
+    return f'{prog}:{node_count}:{edge_count}:{node_sum:016x}{edge_sum:016x}'
+
+
+class TopologyHash:
+    """随 GraphStore 的增删边维护的拓扑哈希
+
+    GraphEngine 在逐条增删边时调用 add_edge / remove_edge；批量加边后调用 invalidate_edges()，
+    清空或整体替换图后调用 invalidate()，下次取键时再用 NumPy 整体计算一次。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.invalidate()
+
+    def invalidate(self):
+        self._node_hashes = np.empty(0, dtype=np.uint64)
+        self._node_sum = 0
+        self._edge_sum = None
+
+    def invalidate_edges(self):
+        self._edge_sum = None
+
+    def _sync_nodes(self):
+        """为新出现的节点名称（store.names 只在末尾追加）补上哈希"""
+        names = self.store.names
+        count = len(self._node_hashes)
+        if count < len(names):
+            new = name_hashes(names[count:])
+            self._node_hashes = np.concatenate([self._node_hashes, new])
+            self._node_sum = (self._node_sum + _sum(new)) & MASK
+
+    def _edge_hash(self, u, v):
+        self._sync_nodes()
+        hashes = self._node_hashes
+        return int(edge_hashes(hashes[u:u + 1], hashes[v:v + 1])[0])
+
+    def add_edge(self, u, v):
+        """新边 u→v（节点编号）已经加入 store"""
+        if self._edge_sum is not None:
+            self._edge_sum = (self._edge_sum + self._edge_hash(u, v)) & MASK
+
+    def remove_edge(self, u, v):
+        if self._edge_sum is not None:
+            self._edge_sum = (self._edge_sum - self._edge_hash(u, v)) & MASK
+
+    def key(self, prog='dot'):
+        """当前拓扑的键，附带布局程序名"""
+        self._sync_nodes()
+        if self._edge_sum is None:
+            sources, targets, _, _ = self.store.edge_arrays()
+            hashes = self._node_hashes
+            self._edge_sum = _sum(edge_hashes(hashes[sources], hashes[targets]))
+        return _format_key(prog, len(self.store), self.store.number_of_edges(),
+                           self._node_sum, self._edge_sum)